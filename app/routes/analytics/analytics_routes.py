@@ -3,8 +3,14 @@ from app.routes.analytics import bp
 from app.system.auth.middleware import auth_required
 from app.system.auth.permissions import get_workspace_user_id, check_workspace_permission, require_permission
 from app.system.services.firebase_service import UserService
+from app.scripts.accounts.x_posts_snapshot import get_x_posts_snapshot
+from app.scripts.accounts.analytics_engine import (
+    ROLLING_WINDOW, TimeBuckets, BucketedPosts, DailyRecords, calculate_trends,
+    rolling_mean, rolling_ratio, values_as_of, optional_floats
+)
 import firebase_admin
 from firebase_admin import firestore
+import numpy as np
 import logging
 from datetime import datetime, timedelta
 
@@ -14,6 +20,16 @@ logger = logging.getLogger('analytics_routes')
 # Cache for TikTok analytics data
 tiktok_cache = {}
 
+# Overview trend name -> x_analytics history field
+X_TREND_METRICS = {
+    'followers_trend': 'followers_count',
+    'engagement_trend': 'rolling_avg_engagement',
+    'views_trend': 'rolling_avg_views'
+}
+
+# YouTube daily_data columns summed for the selected timeframe
+YOUTUBE_DAILY_FIELDS = ('views', 'watch_time_minutes', 'subscribers_gained')
+
 @bp.route('/analytics')
 @auth_required
 @require_permission('analytics')
@@ -108,28 +124,17 @@ def x_overview():
             '6months': 180
         }.get(timeframe, 180)
         
-        # Get posts within timeframe for calculations
-        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
+        # Get posts within timeframe for calculations (shared columnar snapshot)
+        snapshot = get_x_posts_snapshot(db, user_id)
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
         cutoff_timestamp = cutoff_date.timestamp()
         
         # Calculate metrics from posts within timeframe
-        total_views = 0
-        total_engagement = 0
-        post_count = 0
-        
-        for doc in posts_collection.stream():
-            post = doc.to_dict()
-            if post.get('created_at_timestamp', 0) >= cutoff_timestamp:
-                views = post.get('views', 0)
-                engagement = (post.get('likes', 0) + 
-                            post.get('retweets', 0) + 
-                            post.get('replies', 0) + 
-                            post.get('bookmarks', 0))
-                
-                total_views += views
-                total_engagement += engagement
-                post_count += 1
+        window_start = snapshot.window_start(cutoff_timestamp)
+        window_end = snapshot.dated_count
+        total_views = int(snapshot.views[window_start:window_end].sum())
+        total_engagement = int(snapshot.engagement[window_start:window_end].sum())
+        post_count = window_end - window_start
         
         # Update metrics with timeframe-specific calculations
         if post_count > 0:
@@ -166,7 +171,7 @@ def x_overview():
         historical_data.sort(key=lambda x: x['date'])
         
         # Calculate trends
-        trends = calculate_trends(historical_data)
+        trends = calculate_trends(historical_data, X_TREND_METRICS)
         
         return jsonify({
             'current': latest_data,
@@ -203,140 +208,53 @@ def x_impressions():
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
         cutoff_timestamp = cutoff_date.timestamp()
         
-        # Get all posts (not just in timeframe for rolling average calculation)
-        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
-        
-        # Collect all posts
-        all_posts = []
-        for doc in posts_collection.stream():
-            post = doc.to_dict()
-            if post.get('created_at_timestamp'):
-                all_posts.append(post)
-        
-        # Sort posts by timestamp (oldest first for rolling calculation)
-        all_posts.sort(key=lambda x: x.get('created_at_timestamp', 0))
+        # Get all posts (not just in timeframe for rolling average calculation),
+        # already sorted by timestamp (oldest first for rolling calculation)
+        snapshot = get_x_posts_snapshot(db, user_id)
+        total_posts = snapshot.dated_count
+        timestamps = snapshot.timestamps[:total_posts]
+        views = snapshot.views[:total_posts]
         
         # Check if we have sufficient data for rolling averages (at least 10 posts total)
-        has_sufficient_data = len(all_posts) >= 10
-        
-        # Calculate rolling averages for ALL posts first
-        rolling_avg_by_timestamp = {}
-        if has_sufficient_data:
-            for i, post in enumerate(all_posts):
-                # Get the last 10 posts including current (only when we have at least 10)
-                if i >= 9:
-                    start_idx = i - 9
-                    window_posts = all_posts[start_idx:i+1]
-                    
-                    total_views = sum(p.get('views', 0) for p in window_posts)
-                    avg_views = total_views / len(window_posts)
-                    
-                    # Store by timestamp for lookup
-                    rolling_avg_by_timestamp[post.get('created_at_timestamp')] = avg_views
+        has_sufficient_data = total_posts >= ROLLING_WINDOW
         
         # Determine grouping based on timeframe
         group_by_week = timeframe == '6months'
         
-        # Create complete timeline from cutoff to now
-        current_date = datetime.now().date()
-        timeline_data = {}
-        
-        if group_by_week:
-            # Generate weeks from cutoff to now
-            current_week_start = current_date - timedelta(days=current_date.weekday())
-            cutoff_week_start = cutoff_date.date() - timedelta(days=cutoff_date.weekday())
-            
-            week_start = cutoff_week_start
-            while week_start <= current_week_start:
-                week_key = week_start.strftime('%Y-%m-%d')
-                timeline_data[week_key] = {
-                    'total_views': 0,
-                    'posts_count': 0,
-                    'posts': [],
-                    'week_end': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
-                }
-                week_start += timedelta(days=7)
-        else:
-            # Generate daily timeline from cutoff to now
-            timeline_date = cutoff_date.date()
-            while timeline_date <= current_date:
-                date_key = timeline_date.strftime('%Y-%m-%d')
-                timeline_data[date_key] = {
-                    'total_views': 0,
-                    'posts_count': 0,
-                    'posts': []
-                }
-                timeline_date += timedelta(days=1)
-        
-        # Fill in actual post data
-        for post in all_posts:
-            timestamp = post.get('created_at_timestamp', 0)
-            if timestamp >= cutoff_timestamp:
-                post_date = datetime.fromtimestamp(timestamp)
-                
-                if group_by_week:
-                    # Get start of week (Monday)
-                    week_start = post_date - timedelta(days=post_date.weekday())
-                    date_key = week_start.strftime('%Y-%m-%d')
-                else:
-                    date_key = post_date.strftime('%Y-%m-%d')
-                
-                if date_key in timeline_data:
-                    timeline_data[date_key]['total_views'] += post.get('views', 0)
-                    timeline_data[date_key]['posts_count'] += 1
-                    timeline_data[date_key]['posts'].append(post)
+        # Bucket posts in the timeframe by day (or week) from cutoff to now
+        buckets = TimeBuckets(cutoff_date.date(), datetime.now().date(), by_week=group_by_week)
+        bucketed = BucketedPosts(timestamps, buckets, snapshot.window_start(cutoff_timestamp))
+        daily_impressions = bucketed.sums(views).tolist()
+        posts_counts = bucketed.counts().tolist()
         
-        # Create rolling average timeline for the timeframe
-        rolling_avg_timeline = {}
+        # Rolling averages are computed over ALL posts; a week uses its most recent
+        # post's value, a day the latest value at or before the start of the day
+        rolling_avg_timeline = [None] * len(buckets)
         if has_sufficient_data:
-            # For each date in our timeline, find the most recent rolling average
-            for date_key in sorted(timeline_data.keys()):
-                if group_by_week:
-                    # For weekly view, check all posts in that week
-                    week_posts = timeline_data[date_key]['posts']
-                    if week_posts:
-                        # Use the rolling average from the most recent post in the week
-                        latest_post = max(week_posts, key=lambda p: p.get('created_at_timestamp', 0))
-                        latest_timestamp = latest_post.get('created_at_timestamp')
-                        if latest_timestamp in rolling_avg_by_timestamp:
-                            rolling_avg_timeline[date_key] = rolling_avg_by_timestamp[latest_timestamp]
-                else:
-                    # For daily view, find the latest rolling average up to this date
-                    target_date = datetime.strptime(date_key, '%Y-%m-%d')
-                    target_timestamp = target_date.timestamp()
-                    
-                    # Find the most recent rolling average before or on this date
-                    latest_avg = None
-                    for ts, avg in rolling_avg_by_timestamp.items():
-                        if ts <= target_timestamp:
-                            latest_avg = avg
-                        else:
-                            break
-                    
-                    if latest_avg is not None:
-                        rolling_avg_timeline[date_key] = latest_avg
-        
-        # Convert to sorted list
+            rolling_avg = rolling_mean(views)
+            if group_by_week:
+                rolling_avg_timeline = optional_floats(bucketed.last_values(rolling_avg))
+            else:
+                rolling_avg_timeline = optional_floats(values_as_of(timestamps, rolling_avg, buckets.starts))
+        
         impressions_data = []
-        for date in sorted(timeline_data.keys()):
-            day_data = timeline_data[date]
-            
+        for i, date in enumerate(buckets.keys):
             impressions_data.append({
                 'date': date,
-                'daily_impressions': day_data['total_views'],
-                'posts_count': day_data['posts_count'],
-                'rolling_avg': rolling_avg_timeline.get(date),
+                'daily_impressions': daily_impressions[i],
+                'posts_count': posts_counts[i],
+                'rolling_avg': rolling_avg_timeline[i],
                 'is_week': group_by_week,
-                'week_end': day_data.get('week_end') if group_by_week else None
+                'week_end': buckets.week_ends[i]
             })
         
-        logger.info(f"Returning impressions data: {len(impressions_data)} {'weeks' if group_by_week else 'days'}, {len(all_posts)} total posts, rolling avg available: {has_sufficient_data}")
+        logger.info(f"Returning impressions data: {len(impressions_data)} {'weeks' if group_by_week else 'days'}, {total_posts} total posts, rolling avg available: {has_sufficient_data}")
         
         return jsonify({
             'impressions_data': impressions_data,
             'has_sufficient_data': has_sufficient_data,
             'timeframe': timeframe,
-            'total_posts': len(all_posts),
+            'total_posts': total_posts,
             'grouped_by': 'week' if group_by_week else 'day'
         })
         
@@ -369,159 +287,63 @@ def x_engagement():
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
         cutoff_timestamp = cutoff_date.timestamp()
         
-        # Get all posts (not just in timeframe for rolling average calculation)
-        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
-        
-        # Collect all posts
-        all_posts = []
-        for doc in posts_collection.stream():
-            post = doc.to_dict()
-            if post.get('created_at_timestamp'):
-                all_posts.append(post)
-        
-        # Sort posts by timestamp (oldest first for rolling calculation)
-        all_posts.sort(key=lambda x: x.get('created_at_timestamp', 0))
+        # Get all posts (not just in timeframe for rolling average calculation),
+        # already sorted by timestamp (oldest first for rolling calculation)
+        snapshot = get_x_posts_snapshot(db, user_id)
+        total_posts = snapshot.dated_count
+        timestamps = snapshot.timestamps[:total_posts]
+        views = snapshot.views[:total_posts]
+        engagement = snapshot.engagement[:total_posts]
         
         # Check if we have sufficient data for rolling averages
-        has_sufficient_data = len(all_posts) >= 10
-        
-        # Calculate rolling engagement rates for ALL posts first
-        rolling_engagement_by_timestamp = {}
-        if has_sufficient_data:
-            for i, post in enumerate(all_posts):
-                # Get the last 10 posts including current (only when we have at least 10)
-                if i >= 9:
-                    start_idx = i - 9
-                    window_posts = all_posts[start_idx:i+1]
-                    
-                    total_views = sum(p.get('views', 0) for p in window_posts)
-                    total_engagement = sum(
-                        p.get('likes', 0) + p.get('retweets', 0) + 
-                        p.get('replies', 0) + p.get('bookmarks', 0) 
-                        for p in window_posts
-                    )
-                    
-                    if total_views > 0:
-                        engagement_rate = (total_engagement / total_views) * 100
-                        rolling_engagement_by_timestamp[post.get('created_at_timestamp')] = engagement_rate
+        has_sufficient_data = total_posts >= ROLLING_WINDOW
         
         # Determine grouping based on timeframe
         group_by_week = timeframe == '6months'
         
-        # Create complete timeline from cutoff to now
-        current_date = datetime.now().date()
-        timeline_data = {}
+        # Bucket posts in the timeframe by day (or week) from cutoff to now
+        buckets = TimeBuckets(cutoff_date.date(), datetime.now().date(), by_week=group_by_week)
+        bucketed = BucketedPosts(timestamps, buckets, snapshot.window_start(cutoff_timestamp))
+        bucket_views = bucketed.sums(views)
+        bucket_engagement = bucketed.sums(engagement)
         
-        if group_by_week:
-            # Generate weeks from cutoff to now
-            current_week_start = current_date - timedelta(days=current_date.weekday())
-            cutoff_week_start = cutoff_date.date() - timedelta(days=cutoff_date.weekday())
-            
-            week_start = cutoff_week_start
-            while week_start <= current_week_start:
-                week_key = week_start.strftime('%Y-%m-%d')
-                timeline_data[week_key] = {
-                    'total_views': 0,
-                    'total_engagement': 0,
-                    'posts_count': 0,
-                    'posts': [],
-                    'week_end': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
-                }
-                week_start += timedelta(days=7)
-        else:
-            # Generate daily timeline from cutoff to now
-            timeline_date = cutoff_date.date()
-            while timeline_date <= current_date:
-                date_key = timeline_date.strftime('%Y-%m-%d')
-                timeline_data[date_key] = {
-                    'total_views': 0,
-                    'total_engagement': 0,
-                    'posts_count': 0,
-                    'posts': []
-                }
-                timeline_date += timedelta(days=1)
+        # Daily/weekly engagement rate
+        engagement_rates = np.zeros(len(buckets))
+        has_views = bucket_views > 0
+        engagement_rates[has_views] = (bucket_engagement[has_views] / bucket_views[has_views]) * 100
         
-        # Fill in actual post data
-        for post in all_posts:
-            timestamp = post.get('created_at_timestamp', 0)
-            if timestamp >= cutoff_timestamp:
-                post_date = datetime.fromtimestamp(timestamp)
-                
-                if group_by_week:
-                    # Get start of week (Monday)
-                    week_start = post_date - timedelta(days=post_date.weekday())
-                    date_key = week_start.strftime('%Y-%m-%d')
-                else:
-                    date_key = post_date.strftime('%Y-%m-%d')
-                
-                if date_key in timeline_data:
-                    views = post.get('views', 0)
-                    engagement = (post.get('likes', 0) + 
-                                post.get('retweets', 0) + 
-                                post.get('replies', 0) + 
-                                post.get('bookmarks', 0))
-                    
-                    timeline_data[date_key]['total_views'] += views
-                    timeline_data[date_key]['total_engagement'] += engagement
-                    timeline_data[date_key]['posts_count'] += 1
-                    timeline_data[date_key]['posts'].append(post)
-        
-        # Create rolling engagement rate timeline for the timeframe
-        rolling_engagement_timeline = {}
+        # Rolling engagement rates are computed over ALL posts; a week uses its most
+        # recent post's value, a day the latest value at or before the start of the day
+        rolling_engagement_timeline = [None] * len(buckets)
         if has_sufficient_data:
-            # For each date in our timeline, find the most recent rolling engagement rate
-            for date_key in sorted(timeline_data.keys()):
-                if group_by_week:
-                    # For weekly view, check all posts in that week
-                    week_posts = timeline_data[date_key]['posts']
-                    if week_posts:
-                        # Use the rolling engagement from the most recent post in the week
-                        latest_post = max(week_posts, key=lambda p: p.get('created_at_timestamp', 0))
-                        latest_timestamp = latest_post.get('created_at_timestamp')
-                        if latest_timestamp in rolling_engagement_by_timestamp:
-                            rolling_engagement_timeline[date_key] = rolling_engagement_by_timestamp[latest_timestamp]
-                else:
-                    # For daily view, find the latest rolling engagement up to this date
-                    target_date = datetime.strptime(date_key, '%Y-%m-%d')
-                    target_timestamp = target_date.timestamp()
-                    
-                    # Find the most recent rolling engagement before or on this date
-                    latest_rate = None
-                    for ts, rate in rolling_engagement_by_timestamp.items():
-                        if ts <= target_timestamp:
-                            latest_rate = rate
-                        else:
-                            break
-                    
-                    if latest_rate is not None:
-                        rolling_engagement_timeline[date_key] = latest_rate
-        
-        # Convert to sorted list
+            rolling_engagement = rolling_ratio(engagement, views)
+            if group_by_week:
+                rolling_engagement_timeline = optional_floats(bucketed.last_values(rolling_engagement))
+            else:
+                rolling_engagement_timeline = optional_floats(
+                    values_as_of(timestamps, rolling_engagement, buckets.starts)
+                )
+        
+        engagement_rates = engagement_rates.tolist()
+        total_engagement = bucket_engagement.tolist()
         engagement_data = []
-        for date in sorted(timeline_data.keys()):
-            day_data = timeline_data[date]
-            
-            # Daily/weekly engagement rate
-            engagement_rate = 0
-            if day_data['total_views'] > 0:
-                engagement_rate = (day_data['total_engagement'] / day_data['total_views']) * 100
-            
+        for i, date in enumerate(buckets.keys):
             engagement_data.append({
                 'date': date,
-                'engagement_rate': engagement_rate,
-                'total_engagement': day_data['total_engagement'],
-                'rolling_engagement_rate': rolling_engagement_timeline.get(date),
+                'engagement_rate': engagement_rates[i],
+                'total_engagement': total_engagement[i],
+                'rolling_engagement_rate': rolling_engagement_timeline[i],
                 'is_week': group_by_week,
-                'week_end': day_data.get('week_end') if group_by_week else None
+                'week_end': buckets.week_ends[i]
             })
         
-        logger.info(f"Returning engagement data: {len(engagement_data)} {'weeks' if group_by_week else 'days'}, {len(all_posts)} total posts, rolling avg available: {has_sufficient_data}")
+        logger.info(f"Returning engagement data: {len(engagement_data)} {'weeks' if group_by_week else 'days'}, {total_posts} total posts, rolling avg available: {has_sufficient_data}")
         
         return jsonify({
             'engagement_data': engagement_data,
             'has_sufficient_data': has_sufficient_data,
             'timeframe': timeframe,
-            'total_posts': len(all_posts),
+            'total_posts': total_posts,
             'grouped_by': 'week' if group_by_week else 'day'
         })
         
@@ -555,57 +377,22 @@ def x_posts_count():
         cutoff_timestamp = cutoff_date.timestamp()
         
         # Get individual posts to count by date
-        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
+        snapshot = get_x_posts_snapshot(db, user_id)
         
         # Determine if we should group by week
         group_by_week = timeframe == '6months'
         
-        # Create complete timeline from cutoff to now
-        current_date = datetime.now().date()
-        timeline_data = {}
+        # Count posts in the timeframe by day (or week) from cutoff to now
+        buckets = TimeBuckets(cutoff_date.date(), datetime.now().date(), by_week=group_by_week)
+        bucketed = BucketedPosts(snapshot.timestamps[:snapshot.dated_count], buckets,
+                                 snapshot.window_start(cutoff_timestamp))
+        posts_counts = bucketed.counts().tolist()
         
-        if group_by_week:
-            # Generate weeks from cutoff to now
-            current_week_start = current_date - timedelta(days=current_date.weekday())
-            cutoff_week_start = cutoff_date.date() - timedelta(days=cutoff_date.weekday())
-            
-            week_start = cutoff_week_start
-            while week_start <= current_week_start:
-                week_key = week_start.strftime('%Y-%m-%d')
-                timeline_data[week_key] = 0
-                week_start += timedelta(days=7)
-        else:
-            # Generate daily timeline from cutoff to now
-            timeline_date = cutoff_date.date()
-            while timeline_date <= current_date:
-                date_key = timeline_date.strftime('%Y-%m-%d')
-                timeline_data[date_key] = 0
-                timeline_date += timedelta(days=1)
-        
-        # Count posts by date
-        for doc in posts_collection.stream():
-            post = doc.to_dict()
-            timestamp = post.get('created_at_timestamp', 0)
-            
-            if timestamp >= cutoff_timestamp:
-                post_date = datetime.fromtimestamp(timestamp)
-                
-                if group_by_week:
-                    # Get start of week (Monday)
-                    week_start = post_date - timedelta(days=post_date.weekday())
-                    date_key = week_start.strftime('%Y-%m-%d')
-                else:
-                    date_key = post_date.strftime('%Y-%m-%d')
-                
-                if date_key in timeline_data:
-                    timeline_data[date_key] += 1
-        
-        # Convert to sorted list
         posts_count_data = []
-        for date in sorted(timeline_data.keys()):
+        for i, date in enumerate(buckets.keys):
             posts_count_data.append({
                 'date': date,
-                'posts_count': timeline_data[date],
+                'posts_count': posts_counts[i],
                 'is_week': group_by_week
             })
         
@@ -774,6 +561,7 @@ def x_posts_paginated():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 12))  # Changed to 12 per page
     filter_type = request.args.get('filter', 'all')
+    cursor = request.args.get('cursor')
     
     try:
         if not firebase_admin._apps:
@@ -781,54 +569,15 @@ def x_posts_paginated():
         
         db = firestore.client()
         
-        # Get all posts from individual posts collection
-        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
-        
-        # Get all posts
-        all_posts = []
-        posts_docs = posts_collection.stream()
-        
-        for doc in posts_docs:
-            post = doc.to_dict()
-            
-            # Calculate engagement rate for each post
-            views = post.get('views', 0)
-            engagement = post.get('likes', 0) + post.get('retweets', 0) + post.get('replies', 0) + post.get('bookmarks', 0)
-            
-            if views > 0:
-                post['engagement_rate'] = (engagement / views) * 100
-            else:
-                post['engagement_rate'] = 0
-            
-            post['total_engagement'] = engagement
-            all_posts.append(post)
-        
-        # Apply filtering
-        if filter_type == 'views':
-            # Sort by views (highest first)
-            all_posts.sort(key=lambda x: x.get('views', 0), reverse=True)
-        elif filter_type == 'engagement':
-            # Filter posts with meaningful views and sort by engagement rate
-            filtered_posts = [p for p in all_posts if p.get('views', 0) > 100]
-            filtered_posts.sort(key=lambda x: x.get('engagement_rate', 0), reverse=True)
-            all_posts = filtered_posts
-        else:
-            # Default: all posts sorted by date (most recent first)
-            all_posts.sort(key=lambda x: x.get('created_at_timestamp', 0), reverse=True)
-        
-        # Calculate pagination
-        total_posts = len(all_posts)
-        total_pages = (total_posts + per_page - 1) // per_page
-        
-        # Get posts for current page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        page_posts = all_posts[start_idx:end_idx]
+        # Indexed query on the precomputed sort keys (reads about one page of posts)
+        from app.scripts.accounts.x_analytics import get_x_posts_page
+        page_data = get_x_posts_page(db, user_id, filter_type, per_page, cursor=cursor, page=page)
+        if page_data is None:
+            # Posts stored before sort keys existed: page the in-memory snapshot
+            page_data = _x_posts_page_from_snapshot(db, user_id, filter_type, page, per_page)
         
         return jsonify({
-            'posts': page_posts,
-            'total_posts': total_posts,
-            'total_pages': total_pages,
+            **page_data,
             'current_page': page,
             'per_page': per_page
         })
@@ -837,6 +586,53 @@ def x_posts_paginated():
         logger.error(f"Error fetching X posts: {str(e)}")
         return jsonify({'error': 'Failed to fetch posts data'}), 500
 
+def _x_posts_page_from_snapshot(db, user_id, filter_type, page, per_page):
+    """Sort and slice a page of posts from the columnar posts snapshot"""
+    snapshot = get_x_posts_snapshot(db, user_id)
+    views = snapshot.views
+    engagement = snapshot.engagement
+    
+    # Calculate engagement rate for each post
+    engagement_rates = np.where(views > 0, engagement / np.maximum(views, 1) * 100, 0.0)
+    
+    # Apply filtering (row order of the snapshot is oldest first, undated posts last)
+    if filter_type == 'views':
+        # Sort by views (highest first)
+        order = np.argsort(-views, kind='stable')
+    elif filter_type == 'engagement':
+        # Filter posts with meaningful views and sort by engagement rate
+        candidates = np.flatnonzero(views > 100)
+        order = candidates[np.argsort(-engagement_rates[candidates], kind='stable')]
+    else:
+        # Default: all posts sorted by date (most recent first)
+        order = np.concatenate([
+            np.arange(snapshot.dated_count)[::-1],
+            np.arange(snapshot.dated_count, len(snapshot))
+        ])
+    
+    # Calculate pagination
+    total_posts = len(order)
+    total_pages = (total_posts + per_page - 1) // per_page
+    
+    # Get posts for current page (copies - the snapshot is shared)
+    start_idx = (page - 1) * per_page
+    end_idx = start_idx + per_page
+    page_posts = [
+        {
+            **snapshot.posts[i],
+            'engagement_rate': float(engagement_rates[i]),
+            'total_engagement': int(engagement[i])
+        }
+        for i in order[start_idx:end_idx].tolist()
+    ]
+    
+    return {
+        'posts': page_posts,
+        'total_posts': total_posts,
+        'total_pages': total_pages,
+        'next_cursor': None
+    }
+
 @bp.route('/analytics/youtube/overview')
 @auth_required
 @require_permission('analytics')
@@ -1032,19 +828,15 @@ def youtube_daily_views():
         cutoff_date = datetime.now() - timedelta(days=timeframe_days)
         cutoff_date_str = cutoff_date.strftime('%Y-%m-%d')
         
-        filtered_data = [
-            day for day in daily_data 
-            if day.get('date', '') >= cutoff_date_str
-        ]
-        
-        # Sort by date
-        filtered_data.sort(key=lambda x: x.get('date', ''))
+        # Sort by date and keep the days on or after the cutoff
+        daily_records = DailyRecords(daily_data, YOUTUBE_DAILY_FIELDS).window(cutoff_date_str)
+        filtered_data = daily_records.records
         
         # Calculate overview metrics from filtered daily data
-        total_views = sum(day.get('views', 0) for day in filtered_data)
-        total_watch_time_minutes = sum(day.get('watch_time_minutes', 0) for day in filtered_data)
+        total_views = daily_records.total('views')
+        total_watch_time_minutes = daily_records.total('watch_time_minutes')
         total_watch_time_hours = round(total_watch_time_minutes / 60, 2) if total_watch_time_minutes > 0 else 0
-        total_subscribers_gained = sum(day.get('subscribers_gained', 0) for day in filtered_data)
+        total_subscribers_gained = daily_records.total('subscribers_gained')
         
         # Calculate averages
         num_days = len(filtered_data) if filtered_data else 1
@@ -1411,49 +1203,3 @@ def calculate_data_age(data):
             'warning_level': 'error',
             'needs_refresh': True
         }
-
-def calculate_trends(historical_data):
-    """Calculate trends from historical data"""
-    if len(historical_data) < 2:
-        return {
-            'followers_trend': 0,
-            'engagement_trend': 0,
-            'views_trend': 0
-        }
-    
-    # Get data from 7 days ago and today
-    seven_days_ago = None
-    today = None
-    
-    for data in historical_data[-8:]:  # Last 8 days of data
-        if seven_days_ago is None:
-            seven_days_ago = data
-        today = data
-    
-    if not seven_days_ago or not today:
-        return {
-            'followers_trend': 0,
-            'engagement_trend': 0,
-            'views_trend': 0
-        }
-    
-    # Calculate percentage changes
-    def calc_percentage_change(old_val, new_val):
-        if old_val == 0:
-            return 100 if new_val > 0 else 0
-        return ((new_val - old_val) / old_val) * 100
-    
-    return {
-        'followers_trend': calc_percentage_change(
-            seven_days_ago.get('followers_count', 0),
-            today.get('followers_count', 0)
-        ),
-        'engagement_trend': calc_percentage_change(
-            seven_days_ago.get('rolling_avg_engagement', 0),
-            today.get('rolling_avg_engagement', 0)
-        ),
-        'views_trend': calc_percentage_change(
-            seven_days_ago.get('rolling_avg_views', 0),
-            today.get('rolling_avg_views', 0)
-        )
-    }
\ No newline at end of file
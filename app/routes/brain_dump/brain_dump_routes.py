@@ -3,6 +3,10 @@ from . import bp
 from app.system.auth.middleware import auth_required
 from app.system.auth.permissions import get_workspace_user_id, check_workspace_permission, require_permission
 from app.system.services.firebase_service import db
+from app.scripts.brain_dump.note_index import (
+    index_note_changes, search_note_index, get_note_index_stats, strip_html
+)
+from google.cloud.firestore_v1.base_query import FieldFilter
 from datetime import datetime, timedelta, timezone
 import logging
 import json
@@ -23,6 +27,9 @@ PRESET_TAGS = [
     {'name': 'tutorial', 'label': '📚 Tutorial', 'color': '#2ECC71'},
 ]
 
+# Most notes a search reads and returns (best matches first)
+SEARCH_RESULTS_LIMIT = 50
+
 @bp.route('/brain-dump')
 @auth_required
 @require_permission('brain_dump')
@@ -93,6 +100,8 @@ def create_note():
         doc_ref = notes_ref.add(new_note)
         note_id = doc_ref[1].id
 
+        index_note_changes(db, user_id, {note_id: new_note})
+
         # Add the ID to the note object for response
         new_note['id'] = note_id
 
@@ -195,6 +204,7 @@ def update_note(note_id):
         # Get updated note
         updated_doc = note_ref.get()
         note = updated_doc.to_dict()
+        index_note_changes(db, user_id, {note_id: note})
         note['id'] = updated_doc.id
 
         logger.info(f"Updated note {note_id} for user {user_id}")
@@ -240,6 +250,7 @@ def delete_note(note_id):
 
         # Delete note from Firebase
         note_ref.delete()
+        index_note_changes(db, user_id, {note_id: None})
 
         logger.info(f"Deleted note {note_id} for user {user_id}")
 
@@ -283,6 +294,7 @@ def toggle_favorite(note_id):
         # Get updated note
         updated_doc = note_ref.get()
         note = updated_doc.to_dict()
+        index_note_changes(db, user_id, {note_id: note})
         note['id'] = updated_doc.id
 
         return jsonify({
@@ -306,42 +318,36 @@ def search_notes():
         query = request.args.get('q', '').lower().strip()
         user_id = get_workspace_user_id()
 
-        # Get all user's notes from Firebase
         notes_ref = db.collection('users').document(user_id).collection('brain_dump')
-        notes_docs = notes_ref.stream()
 
         notes = []
-        for doc in notes_docs:
-            note_data = doc.to_dict()
-            note_data['id'] = doc.id
-
-            if not query:
-                # Return all notes if no query
+        total = 0
+        if not query:
+            # Return all notes if no query, sorted by updated_at descending
+            for doc in notes_ref.stream():
+                note_data = doc.to_dict()
+                note_data['id'] = doc.id
                 notes.append(note_data)
-            else:
-                # Search in title and content
-                title_match = query in (note_data.get('title', '') or '').lower()
-
-                # Remove HTML tags for content search
-                content = note_data.get('content', '') or ''
-                import re
-                clean_content = re.sub('<[^<]+?>', '', content)
-                content_match = query in clean_content.lower()
-
-                # Search in tags
-                tags_match = any(query in tag.lower() for tag in (note_data.get('tags', []) or []))
-
-                if title_match or content_match or tags_match:
-                    notes.append(note_data)
-
-        # Sort by updated_at descending
-        notes.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+            notes.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+            total = len(notes)
+        else:
+            # Rank with the note index, then read only the best matching notes
+            note_ids = search_note_index(db, user_id, query)
+            total = len(note_ids)
+            note_ids = note_ids[:SEARCH_RESULTS_LIMIT]
+            matches = {}
+            for doc in db.get_all([notes_ref.document(note_id) for note_id in note_ids]):
+                if doc.exists:
+                    note_data = doc.to_dict()
+                    note_data['id'] = doc.id
+                    matches[doc.id] = note_data
+            notes = [matches[note_id] for note_id in note_ids if note_id in matches]
 
         return jsonify({
             'success': True,
             'notes': notes,
             'query': query,
-            'total': len(notes)
+            'total': total
         })
 
     except Exception as e:
@@ -358,20 +364,11 @@ def get_all_tags():
     try:
         user_id = get_workspace_user_id()
 
-        # Get all user's notes from Firebase
-        notes_ref = db.collection('users').document(user_id).collection('brain_dump')
-        notes_docs = notes_ref.stream()
-
-        # Collect all unique tags
-        all_tags = set()
-        for doc in notes_docs:
-            note_data = doc.to_dict()
-            tags = note_data.get('tags', [])
-            if tags:
-                all_tags.update(tags)
+        # Unique tags are counted in the note index as notes change
+        tag_counts = get_note_index_stats(db, user_id)['tag_counts']
 
         # Sort tags alphabetically
-        tags_list = sorted(list(all_tags))
+        tags_list = sorted(tag_counts)
 
         return jsonify({
             'success': True,
@@ -440,12 +437,14 @@ def share_note(note_id):
         shared_ref.set(shared_note)
 
         # Update the original note with share info
-        note_ref.update({
+        share_info = {
             'is_shared': True,
             'share_id': share_id,
             'share_url': f'https://creatrics.com/shared/note/{share_id}',
             'shared_at': shared_at.isoformat()
-        })
+        }
+        note_ref.update(share_info)
+        index_note_changes(db, user_id, {note_id: {**note_data, **share_info}})
 
         return jsonify({
             'success': True,
@@ -491,12 +490,14 @@ def unshare_note(note_id):
                 shared_ref.delete()
 
         # Update the original note
-        note_ref.update({
+        share_info = {
             'is_shared': False,
             'share_id': None,
             'share_url': None,
             'shared_at': None
-        })
+        }
+        note_ref.update(share_info)
+        index_note_changes(db, user_id, {note_id: {**note_data, **share_info}})
 
         return jsonify({
             'success': True,
@@ -597,6 +598,9 @@ def update_shared_note(share_id):
             }
             original_ref = db.collection('users').document(owner_id).collection('brain_dump').document(note_id)
             original_ref.update(original_update)
+            original_doc = original_ref.get()
+            if original_doc.exists:
+                index_note_changes(db, owner_id, {note_id: original_doc.to_dict()})
 
         return jsonify({
             'success': True,
@@ -713,8 +717,7 @@ def export_notes():
                 updated = note.get('updated_at', '')
                 
                 # Remove HTML tags from content
-                import re
-                clean_content = re.sub('<[^<]+?>', '', content)
+                clean_content = strip_html(content)
                 
                 markdown_content += f"## {title}\n\n"
                 markdown_content += f"**Created:** {created}\n"
@@ -806,43 +809,20 @@ def get_stats():
     try:
         user_id = get_workspace_user_id()
 
-        # Get all user's notes from Firebase
-        notes_ref = db.collection('users').document(user_id).collection('brain_dump')
-        notes_docs = notes_ref.stream()
-
-        notes_list = []
-        for doc in notes_docs:
-            note_data = doc.to_dict()
-            notes_list.append(note_data)
-        
-        # Calculate stats
-        total_notes = len(notes_list)
-        favorite_count = sum(1 for note in notes_list if note.get('is_favorite', False))
-        shared_count = sum(1 for note in notes_list if note.get('is_shared', False))
-        
-        # Get all tags
-        all_tags = []
-        for note in notes_list:
-            tags = note.get('tags', [])
-            if tags:
-                all_tags.extend(tags)
-        
-        unique_tags = len(set(all_tags))
-        
-        # Calculate average note length
-        total_length = 0
-        for note in notes_list:
-            content = note.get('content', '')
-            # Remove HTML tags
-            import re
-            clean_content = re.sub('<[^<]+?>', '', content)
-            total_length += len(clean_content)
+        # Counters are precomputed in the note index as notes change
+        index_stats = get_note_index_stats(db, user_id)
+        total_notes = index_stats['total_notes']
+        favorite_count = index_stats['favorites']
+        shared_count = index_stats['shared']
+        unique_tags = len(index_stats['tag_counts'])
+        total_length = index_stats['total_length']
         
         avg_length = total_length // total_notes if total_notes > 0 else 0
         
-        # Get recent notes (last 7 days)
+        # Get recent notes (last 7 days) with an aggregation query
         week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
-        recent_notes = sum(1 for note in notes_list if note.get('updated_at', '') >= week_ago)
+        notes_ref = db.collection('users').document(user_id).collection('brain_dump')
+        recent_notes = notes_ref.where(filter=FieldFilter('updated_at', '>=', week_ago)).count().get()[0][0].value
         
         return jsonify({
             'success': True,
@@ -878,6 +858,7 @@ def import_notes():
         notes_ref = db.collection('users').document(user_id).collection('brain_dump')
 
         imported_count = 0
+        indexed_notes = {}
 
         for note_data in imported_notes:
             now = datetime.now(timezone.utc).isoformat()
@@ -892,9 +873,12 @@ def import_notes():
             }
 
             # Add to Firebase
-            notes_ref.add(new_note)
+            doc_ref = notes_ref.add(new_note)
+            indexed_notes[doc_ref[1].id] = new_note
             imported_count += 1
 
+        index_note_changes(db, user_id, indexed_notes)
+
         logger.info(f"Imported {imported_count} notes for user {user_id}")
 
         return jsonify({
@@ -175,6 +175,10 @@ def save_file():
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
 
+        # Serve the new version from this worker right away (others pick it up on their next mtime check)
+        from app.utils.prompt_registry import reload_prompt_file
+        reload_prompt_file(file_path)
+
         logger.info(f"Saved prompt file: {folder_name}/{filename}")
 
         return jsonify({
@@ -3,11 +3,16 @@
 from flask import Blueprint, jsonify, request
 from app.system.services.firebase_service import db
 from app.system.services.content_library_service import ContentLibraryManager
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 import logging
 import os
+import time
+import hashlib
+import uuid
 from functools import wraps
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import threading
 
 # Setup logger
@@ -212,11 +217,113 @@ def update_default_reply_lists():
             "timestamp": datetime.utcnow().isoformat()
         }), 500
 
-def update_user_analytics(user_id, user_data):
-    """Update analytics for a single user (used in parallel processing)"""
+def _refresh_x_analytics(user_id):
+    """Refresh X analytics for one user"""
     from app.scripts.accounts.x_analytics import fetch_x_analytics
-    from app.scripts.accounts.youtube_analytics import fetch_youtube_analytics
 
+    outcome = {'updated': False, 'error': None, 'skipped': False}
+    try:
+        logger.info(f"Updating X analytics for user {user_id}")
+        fetch_x_analytics(user_id, is_initial=False)
+        outcome['updated'] = True
+    except Exception as x_error:
+        logger.error(f"Failed to update X analytics for user {user_id}: {str(x_error)}")
+        outcome['error'] = str(x_error)
+
+    return outcome
+
+def _refresh_youtube_analytics(user_id, freshness_hours=None):
+    """
+    Refresh YouTube analytics for one user
+
+    Args:
+        user_id: User ID
+        freshness_hours: Skip the user if their analytics were fetched within this many hours
+    """
+    from app.scripts.accounts.youtube_analytics import fetch_youtube_analytics, check_if_refresh_needed
+
+    outcome = {'updated': False, 'error': None, 'skipped': False}
+
+    if freshness_hours is not None and not check_if_refresh_needed(user_id, max_age_hours=freshness_hours):
+        logger.info(f"Skipping YouTube analytics for user {user_id} - data is still fresh")
+        outcome['skipped'] = True
+        return outcome
+
+    try:
+        logger.info(f"Updating YouTube analytics for user {user_id}")
+        # Always verify token by attempting refresh (YouTube API compliance)
+        analytics_result = fetch_youtube_analytics(user_id, force_refresh=True)
+
+        if analytics_result:
+            outcome['updated'] = True
+        else:
+            # Failed to fetch - token may have been revoked and cleaned up
+            outcome['error'] = 'Failed to fetch analytics'
+            logger.warning(f"YouTube analytics returned None for user {user_id} - likely token revoked")
+    except Exception as yt_error:
+        error_str = str(yt_error).lower()
+        logger.error(f"Failed to update YouTube analytics for user {user_id}: {str(yt_error)}")
+        outcome['error'] = str(yt_error)
+
+        # Clean up tokens if access was revoked (YouTube API compliance)
+        if 'invalid_grant' in error_str or 'token has been expired or revoked' in error_str:
+            logger.warning(f"YouTube token revoked for user {user_id}, cleaning up")
+            from app.scripts.accounts.youtube_analytics import clean_youtube_user_data
+            clean_youtube_user_data(user_id)
+            outcome['token_cleaned'] = True
+
+    return outcome
+
+def _refresh_tiktok_analytics(user_id):
+    """Refresh TikTok analytics for one user"""
+    from app.scripts.accounts.tiktok_analytics import fetch_tiktok_analytics
+
+    outcome = {'updated': False, 'error': None, 'skipped': False}
+    try:
+        logger.info(f"Updating TikTok analytics for user {user_id}")
+        fetch_tiktok_analytics(user_id)
+        outcome['updated'] = True
+    except Exception as tt_error:
+        logger.error(f"Failed to update TikTok analytics for user {user_id}: {str(tt_error)}")
+        outcome['error'] = str(tt_error)
+
+    return outcome
+
+# Platform -> user document field that marks the account as connected
+CONNECTED_ACCOUNT_FIELDS = {
+    'x': 'x_account',
+    'youtube': 'youtube_account',
+    'tiktok': 'tiktok_account'
+}
+
+PLATFORM_REFRESHERS = {
+    'x': _refresh_x_analytics,
+    'youtube': _refresh_youtube_analytics,
+    'tiktok': _refresh_tiktok_analytics
+}
+
+# Each platform gets its own pool so a slow API can't starve the others
+ANALYTICS_PLATFORM_CONCURRENCY = {
+    'x': int(os.environ.get('ANALYTICS_CRON_X_WORKERS', '4')),
+    'youtube': int(os.environ.get('ANALYTICS_CRON_YOUTUBE_WORKERS', '6')),
+    'tiktok': int(os.environ.get('ANALYTICS_CRON_TIKTOK_WORKERS', '3'))
+}
+
+ANALYTICS_CRON_STATE_COLLECTION = 'cron_state'
+ANALYTICS_SHARD_COUNT = int(os.environ.get('ANALYTICS_CRON_SHARDS', '8'))
+# Stop claiming new shards after this long; the next invocation resumes from the checkpoint
+ANALYTICS_CRON_TIME_BUDGET_SECONDS = int(os.environ.get('ANALYTICS_CRON_TIME_BUDGET_SECONDS', '480'))
+# A shard whose worker crashed is re-claimable once its lease runs out
+ANALYTICS_SHARD_LEASE = timedelta(minutes=15)
+# A worker extends its lease this often while the shard is still being processed
+ANALYTICS_SHARD_LEASE_RENEW_INTERVAL = timedelta(minutes=5)
+# Users refreshed within this window (e.g. by a resumed shard) are skipped
+ANALYTICS_FRESHNESS_HOURS = 20
+# Calls that leave shards pending answer 503 with this Retry-After so the scheduler calls again
+ANALYTICS_CRON_RETRY_AFTER_SECONDS = int(os.environ.get('ANALYTICS_CRON_RETRY_AFTER_SECONDS', '60'))
+
+def update_user_analytics(user_id, user_data):
+    """Update analytics for a single user across all connected platforms"""
     result = {
         'user_id': user_id,
         'x_updated': False,
@@ -227,136 +334,338 @@ def update_user_analytics(user_id, user_data):
         'tiktok_error': None
     }
 
-    # Update X Analytics if connected
-    if user_data.get('x_account'):
-        try:
-            logger.info(f"Updating X analytics for user {user_id}")
-            fetch_x_analytics(user_id, is_initial=False)
-            result['x_updated'] = True
-        except Exception as x_error:
-            logger.error(f"Failed to update X analytics for user {user_id}: {str(x_error)}")
-            result['x_error'] = str(x_error)
-
-    # Update YouTube Analytics if connected
-    if user_data.get('youtube_account'):
-        try:
-            logger.info(f"Updating YouTube analytics for user {user_id}")
-            # Always verify token by attempting refresh (YouTube API compliance)
-            analytics_result = fetch_youtube_analytics(user_id, force_refresh=True)
-
-            if analytics_result:
-                result['youtube_updated'] = True
-            else:
-                # Failed to fetch - token may have been revoked and cleaned up
-                result['youtube_error'] = 'Failed to fetch analytics'
-                logger.warning(f"YouTube analytics returned None for user {user_id} - likely token revoked")
-        except Exception as yt_error:
-            error_str = str(yt_error).lower()
-            logger.error(f"Failed to update YouTube analytics for user {user_id}: {str(yt_error)}")
-            result['youtube_error'] = str(yt_error)
-
-            # Clean up tokens if access was revoked (YouTube API compliance)
-            if 'invalid_grant' in error_str or 'token has been expired or revoked' in error_str:
-                logger.warning(f"YouTube token revoked for user {user_id}, cleaning up")
-                from app.scripts.accounts.youtube_analytics import clean_youtube_user_data
-                clean_youtube_user_data(user_id)
-                result['youtube_token_cleaned'] = True
-
-    # Update TikTok Analytics if connected
-    if user_data.get('tiktok_account'):
-        try:
-            logger.info(f"Updating TikTok analytics for user {user_id}")
-            from app.scripts.accounts.tiktok_analytics import fetch_tiktok_analytics
-            fetch_tiktok_analytics(user_id)
-            result['tiktok_updated'] = True
-        except Exception as tt_error:
-            logger.error(f"Failed to update TikTok analytics for user {user_id}: {str(tt_error)}")
-            result['tiktok_error'] = str(tt_error)
+    for platform, refresher in PLATFORM_REFRESHERS.items():
+        if not user_data.get(CONNECTED_ACCOUNT_FIELDS[platform]):
+            continue
+
+        outcome = refresher(user_id)
+        result[f'{platform}_updated'] = outcome['updated']
+        result[f'{platform}_error'] = outcome['error']
+        if outcome.get('token_cleaned'):
+            result[f'{platform}_token_cleaned'] = True
 
     return result
 
-@bp.route('/update-all-users-analytics')
-@verify_cron_request
-def update_all_users_analytics():
+def _analytics_shard_for_user(user_id, shard_count):
+    """Stable shard assignment (independent of process and hash seed)"""
+    return int(hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:8], 16) % shard_count
+
+def _analytics_shard_key(shard):
+    return f'shard_{shard:02d}'
+
+def _empty_analytics_stats(total_users=0):
+    stats = {'total_users': total_users}
+    for platform in PLATFORM_REFRESHERS:
+        stats[f'{platform}_updated'] = 0
+        stats[f'{platform}_errors'] = 0
+        stats[f'{platform}_skipped'] = 0
+    return stats
+
+def _get_connected_users():
     """
-    Daily cron job to update analytics for all connected accounts (X, YouTube, TikTok)
-    Uses parallel processing to handle 100+ users efficiently
+    Query users with at least one connected account
+
+    Returns:
+        Dict of user_id -> set of connected platforms
     """
-    try:
-        logger.info("Starting parallel analytics update for all users")
+    connected_users = {}
 
-        # Get all users from Firestore
-        users_ref = db.collection('users')
-        users = users_ref.stream()
+    for platform, field in CONNECTED_ACCOUNT_FIELDS.items():
+        # Range filter on '' matches non-empty strings only (skips '', None and missing fields)
+        query = (db.collection('users')
+                 .where(filter=FieldFilter(field, '>', ''))
+                 .select([field]))
+        for user_doc in query.stream():
+            connected_users.setdefault(user_doc.id, set()).add(platform)
 
-        # Collect user data
-        users_data = []
-        for user_doc in users:
-            user_data = user_doc.to_dict()
-            # Only process users with at least one connected account
-            if user_data.get('x_account') or user_data.get('youtube_account') or user_data.get('tiktok_account'):
-                users_data.append((user_doc.id, user_data))
+    return connected_users
 
-        total_users = len(users_data)
-        logger.info(f"Found {total_users} users with connected accounts to update")
+def _claim_analytics_shard(state_ref, run_date, requested_shard=None):
+    """
+    Claim the next pending shard of today's run (or a specific one) under a lease
 
-        stats = {
-            'total_users': total_users,
-            'x_updated': 0,
-            'youtube_updated': 0,
-            'tiktok_updated': 0,
-            'x_errors': 0,
-            'youtube_errors': 0,
-            'tiktok_errors': 0
-        }
+    Returns:
+        (shard, shard_count, lease_id), or (None, shard_count, None) if nothing is left to claim
+    """
+    transaction = db.transaction()
+
+    @firestore.transactional
+    def claim_in_transaction(transaction, state_ref):
+        snapshot = state_ref.get(transaction=transaction)
+        state = snapshot.to_dict() if snapshot.exists else {}
+        # Keep the shard layout of a run that is already in progress
+        shard_count = state.get('shard_count', ANALYTICS_SHARD_COUNT)
+        shards = state.get('shards', {})
+        now = datetime.now(timezone.utc)
+
+        candidates = [requested_shard] if requested_shard is not None else range(shard_count)
+        for shard in candidates:
+            if shard < 0 or shard >= shard_count:
+                continue
+
+            key = _analytics_shard_key(shard)
+            shard_state = shards.get(key, {})
+            status = shard_state.get('status', 'pending')
+            lease_expires_at = shard_state.get('lease_expires_at')
+
+            if status == 'done':
+                continue
+            if status == 'running' and lease_expires_at and lease_expires_at > now:
+                continue
+
+            claimed_state = {
+                'status': 'running',
+                'lease_id': uuid.uuid4().hex,
+                'lease_expires_at': now + ANALYTICS_SHARD_LEASE,
+                'attempts': shard_state.get('attempts', 0) + 1,
+                'claimed_at': now
+            }
+
+            if snapshot.exists:
+                transaction.update(state_ref, {
+                    f'shards.{key}.{field}': value for field, value in claimed_state.items()
+                })
+            else:
+                transaction.set(state_ref, {
+                    'job': 'update_all_users_analytics',
+                    'run_date': run_date,
+                    'shard_count': shard_count,
+                    'created_at': now,
+                    'shards': {key: claimed_state}
+                })
+            return shard, shard_count, claimed_state['lease_id']
 
-        # Process users in parallel (max 10 concurrent workers to avoid API rate limits)
-        max_workers = min(10, total_users) if total_users > 0 else 1
+        return None, shard_count, None
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_user = {
-                executor.submit(update_user_analytics, user_id, user_data): user_id
-                for user_id, user_data in users_data
-            }
+    return claim_in_transaction(transaction, state_ref)
 
-            # Collect results as they complete
-            for future in as_completed(future_to_user):
-                try:
-                    result = future.result()
+def _update_held_analytics_shard(state_ref, shard, lease_id, updates):
+    """
+    Apply updates to a shard's state only while this worker still holds its lease
 
-                    if result['x_updated']:
-                        stats['x_updated'] += 1
-                    if result['x_error']:
-                        stats['x_errors'] += 1
+    A shard whose lease ran out may have been re-claimed by another invocation;
+    that worker owns the shard from then on, so stale workers must not touch it.
 
-                    if result['youtube_updated']:
-                        stats['youtube_updated'] += 1
-                    if result['youtube_error']:
-                        stats['youtube_errors'] += 1
+    Returns:
+        True if the lease was held and the updates were written
+    """
+    key = _analytics_shard_key(shard)
+    transaction = db.transaction()
+
+    @firestore.transactional
+    def update_in_transaction(transaction, state_ref):
+        snapshot = state_ref.get(transaction=transaction)
+        shard_state = (snapshot.to_dict() or {}).get('shards', {}).get(key, {}) if snapshot.exists else {}
+        if shard_state.get('status') != 'running' or shard_state.get('lease_id') != lease_id:
+            return False
+
+        transaction.update(state_ref, {
+            f'shards.{key}.{field}': value for field, value in updates.items()
+        })
+        return True
+
+    return update_in_transaction(transaction, state_ref)
+
+def _process_analytics_shard(platforms_by_user, renew_lease):
+    """
+    Refresh every (user, platform) pair of a shard using per-platform worker pools
 
-                    if result['tiktok_updated']:
-                        stats['tiktok_updated'] += 1
-                    if result['tiktok_error']:
-                        stats['tiktok_errors'] += 1
+    renew_lease() is called every ANALYTICS_SHARD_LEASE_RENEW_INTERVAL and returns
+    False once the lease is lost; the refreshes not yet started are then cancelled.
 
+    Returns:
+        (stats, lease_held)
+    """
+    stats = _empty_analytics_stats(len(platforms_by_user))
+    renew_seconds = ANALYTICS_SHARD_LEASE_RENEW_INTERVAL.total_seconds()
+    lease_held = True
+
+    executors = {
+        platform: ThreadPoolExecutor(max_workers=ANALYTICS_PLATFORM_CONCURRENCY[platform])
+        for platform in PLATFORM_REFRESHERS
+    }
+
+    try:
+        future_to_job = {}
+        for user_id, platforms in platforms_by_user.items():
+            for platform in platforms:
+                if platform == 'youtube':
+                    future = executors[platform].submit(_refresh_youtube_analytics, user_id, ANALYTICS_FRESHNESS_HOURS)
+                else:
+                    future = executors[platform].submit(PLATFORM_REFRESHERS[platform], user_id)
+                future_to_job[future] = (user_id, platform)
+
+        pending = set(future_to_job)
+        last_renewed = time.monotonic()
+        while pending:
+            done, pending = wait(pending, timeout=renew_seconds, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                user_id, platform = future_to_job[future]
+                try:
+                    outcome = future.result()
                 except Exception as e:
-                    user_id = future_to_user[future]
-                    logger.error(f"Unexpected error processing user {user_id}: {str(e)}")
+                    logger.error(f"Unexpected error updating {platform} analytics for user {user_id}: {str(e)}")
+                    outcome = {'updated': False, 'error': str(e), 'skipped': False}
+
+                if outcome['updated']:
+                    stats[f'{platform}_updated'] += 1
+                if outcome['error']:
+                    stats[f'{platform}_errors'] += 1
+                if outcome.get('skipped'):
+                    stats[f'{platform}_skipped'] += 1
+
+            if pending and time.monotonic() - last_renewed >= renew_seconds:
+                if not renew_lease():
+                    lease_held = False
+                    for future in pending:
+                        future.cancel()
+                    break
+                last_renewed = time.monotonic()
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    return stats, lease_held
 
-        logger.info(f"Analytics update completed: {stats}")
+@bp.route('/update-all-users-analytics')
+@verify_cron_request
+def update_all_users_analytics():
+    """
+    Daily cron job to update analytics for all connected accounts (X, YouTube, TikTok)
 
-        return jsonify({
-            "status": "success",
+    Users are split into stable shards; each shard is claimed under a lease and
+    checkpointed in cron_state once finished, so the job can be called repeatedly
+    (or fanned out with ?shard=N) until the day's run is complete. Each call stops
+    claiming shards once its time budget is spent.
+
+    While shards are left (or the requested shard didn't finish) the call answers
+    503 with a Retry-After header instead of 200, so the scheduler's retry policy
+    (e.g. Cloud Scheduler retry_config with max_retry_duration covering the day's
+    run) keeps calling until every shard is done. A finished run answers 200.
+    """
+    try:
+        started_at = time.monotonic()
+        run_date = datetime.utcnow().strftime('%Y-%m-%d')
+        requested_shard = request.args.get('shard', type=int)
+        if 'shard' in request.args and requested_shard is None:
+            return jsonify({
+                "status": "error",
+                "job": "update_all_users_analytics",
+                "error": f"Invalid shard: {request.args.get('shard')}",
+                "timestamp": datetime.utcnow().isoformat()
+            }), 400
+
+        state_ref = db.collection(ANALYTICS_CRON_STATE_COLLECTION).document(f'update_all_users_analytics_{run_date}')
+
+        logger.info(f"Starting sharded analytics update for {run_date}")
+
+        connected_users = None
+        stats = _empty_analytics_stats()
+        processed_shards = []
+
+        while time.monotonic() - started_at < ANALYTICS_CRON_TIME_BUDGET_SECONDS:
+            shard, shard_count, lease_id = _claim_analytics_shard(state_ref, run_date, requested_shard)
+            if shard is None:
+                if requested_shard is not None and not 0 <= requested_shard < shard_count:
+                    return jsonify({
+                        "status": "error",
+                        "job": "update_all_users_analytics",
+                        "error": f"Shard {requested_shard} is out of range (0-{shard_count - 1})",
+                        "timestamp": datetime.utcnow().isoformat()
+                    }), 400
+                break
+
+            if connected_users is None:
+                connected_users = _get_connected_users()
+                logger.info(f"Found {len(connected_users)} users with connected accounts")
+
+            shard_users = {
+                user_id: platforms
+                for user_id, platforms in connected_users.items()
+                if _analytics_shard_for_user(user_id, shard_count) == shard
+            }
+
+            logger.info(f"Processing analytics shard {shard + 1}/{shard_count} ({len(shard_users)} users)")
+
+            def renew_lease():
+                return _update_held_analytics_shard(state_ref, shard, lease_id, {
+                    'lease_expires_at': datetime.now(timezone.utc) + ANALYTICS_SHARD_LEASE
+                })
+
+            try:
+                shard_stats, lease_held = _process_analytics_shard(shard_users, renew_lease)
+            except Exception as shard_error:
+                logger.error(f"Analytics shard {shard} failed: {shard_error}")
+                _update_held_analytics_shard(state_ref, shard, lease_id, {
+                    'status': 'pending',
+                    'last_error': str(shard_error),
+                    'lease_expires_at': firestore.DELETE_FIELD
+                })
+                break
+
+            # Only the current lease holder may checkpoint the shard as done
+            if not lease_held or not _update_held_analytics_shard(state_ref, shard, lease_id, {
+                'status': 'done',
+                'stats': shard_stats,
+                'completed_at': datetime.now(timezone.utc),
+                'lease_expires_at': firestore.DELETE_FIELD
+            }):
+                logger.warning(f"Lost the lease on analytics shard {shard}; leaving it to its new owner")
+                if requested_shard is not None:
+                    break
+                continue
+
+            for stat_key, value in shard_stats.items():
+                stats[stat_key] += value
+            processed_shards.append(shard)
+
+            if requested_shard is not None:
+                break
+
+        # Overall progress of today's run, across every invocation
+        state_doc = state_ref.get()
+        state = state_doc.to_dict() if state_doc.exists else {}
+        shard_count = state.get('shard_count', ANALYTICS_SHARD_COUNT)
+        shard_states = state.get('shards', {})
+        remaining_shards = [
+            shard for shard in range(shard_count)
+            if shard_states.get(_analytics_shard_key(shard), {}).get('status') != 'done'
+        ]
+
+        logger.info(f"Analytics update processed shards {processed_shards}: {stats} "
+                    f"({len(remaining_shards)} shards remaining)")
+
+        # A fanned-out call is only responsible for its own shard
+        if requested_shard is not None:
+            incomplete = requested_shard in remaining_shards
+        else:
+            incomplete = bool(remaining_shards)
+
+        response = jsonify({
+            "status": "partial" if incomplete else "success",
             "job": "update_all_users_analytics",
             "timestamp": datetime.utcnow().isoformat(),
             "stats": stats,
-            "message": f"Updated analytics for {stats['total_users']} users in parallel",
+            "message": f"Updated analytics for {stats['total_users']} users in {len(processed_shards)} shards",
+            "progress": {
+                "run_date": run_date,
+                "shard_count": shard_count,
+                "processed_shards": processed_shards,
+                "remaining_shards": remaining_shards
+            },
             "performance": {
-                "concurrent_workers": max_workers,
-                "processing_mode": "parallel"
+                "concurrent_workers": ANALYTICS_PLATFORM_CONCURRENCY,
+                "processing_mode": "sharded",
+                "duration_seconds": round(time.monotonic() - started_at, 2)
             }
-        }), 200
+        })
+
+        if incomplete:
+            response.status_code = 503
+            response.headers['Retry-After'] = str(ANALYTICS_CRON_RETRY_AFTER_SECONDS)
+            return response
+        return response, 200
 
     except Exception as e:
         logger.error(f"Analytics update job failed: {e}")
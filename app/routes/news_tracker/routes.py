@@ -203,13 +203,15 @@ def get_personalized_feed():
     try:
         user_id = get_workspace_user_id()
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
 
         feed_service = FeedService()
-        articles = feed_service.get_personalized_feed(user_id, limit)
+        page = feed_service.get_personalized_feed_page(user_id, limit, cursor)
 
         return jsonify({
             'success': True,
-            'articles': articles
+            'articles': page['articles'],
+            'next_cursor': page['next_cursor']
         })
     except Exception as e:
         logger.error(f"Error getting personalized feed: {e}", exc_info=True)
@@ -225,17 +227,20 @@ def get_category_feed(category):
     """Get articles for a specific category"""
     try:
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
         logger.info(f"Fetching category feed for: {category} (limit: {limit})")
 
         feed_service = FeedService()
-        articles = feed_service.get_category_feed(category, limit)
+        page = feed_service.get_category_feed_page(category, limit, cursor)
+        articles = page['articles']
 
         logger.info(f"Found {len(articles)} articles for category: {category}")
 
         return jsonify({
             'success': True,
             'category': category,
-            'articles': articles
+            'articles': articles,
+            'next_cursor': page['next_cursor']
         })
     except Exception as e:
         logger.error(f"Error getting category feed: {e}", exc_info=True)
@@ -573,14 +573,19 @@ def optimize_video_analysis(video_id):
         }
 
         # Only update fields that were actually generated in this request
-        if 'title' in selected_optimizations:
+        # (a generator that failed or timed out keeps its previously cached value)
+        failed_optimizations = result.get('failed_optimizations', {})
+        if failed_optimizations:
+            logger.warning(f"Partial optimization for {video_id}, failed: {failed_optimizations}")
+
+        if 'title' in selected_optimizations and 'title' not in failed_optimizations:
             optimization_data['optimized_title'] = result.get('optimized_title', '')
             optimization_data['title_suggestions'] = result.get('title_suggestions', [])
 
-        if 'description' in selected_optimizations:
+        if 'description' in selected_optimizations and 'description' not in failed_optimizations:
             optimization_data['optimized_description'] = result.get('optimized_description', '')
 
-        if 'tags' in selected_optimizations:
+        if 'tags' in selected_optimizations and 'tags' not in failed_optimizations:
             optimization_data['optimized_tags'] = result.get('optimized_tags', [])
 
         # Always include recommendations if present (or preserve existing)
@@ -657,7 +662,8 @@ def optimize_video_analysis(video_id):
 
         return jsonify({
             'success': True,
-            'data': optimization_data
+            'data': optimization_data,
+            'failed_optimizations': failed_optimizations
         })
 
     except Exception as e:
@@ -1129,36 +1135,40 @@ def correct_captions(video_id):
             else:
                 return jsonify(result), 500
 
-        # Deduct credits for AI usage
+        # Deduct credits for AI usage (batched corrections report one usage per model/provider)
         token_usage = result.get('token_usage')
         if token_usage and token_usage.get('input_tokens', 0) > 0:
             credits_manager = CreditsManager()
             from app.system.ai_provider.ai_provider import AIProvider
 
-            provider_enum_str = token_usage.get('provider_enum')
-            provider_enum = None
-            if provider_enum_str:
-                try:
-                    provider_enum = AIProvider(provider_enum_str)
-                except (ValueError, KeyError):
-                    logger.warning(f"Invalid provider enum value: {provider_enum_str}")
-
-            deduction_result = credits_manager.deduct_llm_credits(
-                user_id=user_id,
-                model_name=token_usage.get('model'),
-                input_tokens=token_usage.get('input_tokens', 0),
-                output_tokens=token_usage.get('output_tokens', 0),
-                description=f"Caption Correction - {video_id}",
-                provider_enum=provider_enum
-            )
-
-            if not deduction_result['success']:
-                logger.error(f"Failed to deduct credits: {deduction_result.get('message')}")
-                return jsonify({
-                    'success': False,
-                    'error': 'Credit deduction failed',
-                    'error_type': 'insufficient_credits'
-                }), 402
+            for usage in token_usage.get('usages') or [token_usage]:
+                if usage.get('input_tokens', 0) <= 0 and usage.get('output_tokens', 0) <= 0:
+                    continue
+
+                provider_enum_str = usage.get('provider_enum')
+                provider_enum = None
+                if provider_enum_str:
+                    try:
+                        provider_enum = AIProvider(provider_enum_str)
+                    except (ValueError, KeyError):
+                        logger.warning(f"Invalid provider enum value: {provider_enum_str}")
+
+                deduction_result = credits_manager.deduct_llm_credits(
+                    user_id=user_id,
+                    model_name=usage.get('model'),
+                    input_tokens=usage.get('input_tokens', 0),
+                    output_tokens=usage.get('output_tokens', 0),
+                    description=f"Caption Correction - {video_id}",
+                    provider_enum=provider_enum
+                )
+
+                if not deduction_result['success']:
+                    logger.error(f"Failed to deduct credits: {deduction_result.get('message')}")
+                    return jsonify({
+                        'success': False,
+                        'error': 'Credit deduction failed',
+                        'error_type': 'insufficient_credits'
+                    }), 402
 
         logger.info(f"Successfully corrected captions for video {video_id} by user {user_id}")
 
@@ -241,9 +241,9 @@ def select_list():
         if not success:
             return jsonify({'success': False, 'error': 'Failed to select list'}), 500
         
-        # Quick check for existing analysis
-        analysis = service.get_current_analysis(user_id, list_id, list_type)
-        opportunities_count = len(analysis.get('tweet_opportunities', [])) if analysis else 0
+        # Quick check for existing analysis (count only - no opportunity pages are read)
+        analysis = service.get_current_analysis(user_id, list_id, list_type, limit=0)
+        opportunities_count = analysis.get('total_count', 0) if analysis else 0
         
         return jsonify({
             'success': True, 
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, jsonify, g, redirect, url
 from app.system.auth.middleware import auth_required
 from app.system.auth.supabase import get_supabase_config
 from app.system.services.firebase_service import db
+from app.system.auth.permissions import invalidate_workspace_membership
 from datetime import datetime
 import uuid
 import requests
@@ -394,6 +395,7 @@ def accept_invite():
             'member_id': user_id,
             'accepted_at': datetime.now().isoformat()
         })
+        invalidate_workspace_membership(member_id=user_id, owner_id=invite_data.get('owner_id'))
 
         # Clear any notifications about this invite
         try:
@@ -432,6 +434,8 @@ def update_member_permissions():
             'permissions': permissions,
             'updated_at': datetime.now().isoformat()
         })
+        # member_id is the team_members document ID, so clear the whole workspace
+        invalidate_workspace_membership(owner_id=workspace_id)
 
         return jsonify({
             'success': True,
@@ -469,6 +473,8 @@ def remove_team_member():
             })
             message = 'Member removed successfully'
 
+        invalidate_workspace_membership(owner_id=workspace_id)
+
         return jsonify({
             'success': True,
             'message': message
@@ -536,6 +542,7 @@ def decline_invite():
             'status': 'declined',
             'declined_at': datetime.now().isoformat()
         })
+        invalidate_workspace_membership(member_id=user_id, owner_id=invite_data.get('owner_id'))
 
         # Clear any notifications
         try:
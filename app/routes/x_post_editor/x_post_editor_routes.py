@@ -2,7 +2,7 @@
 Clean Routes for Post Editor
 Thin controllers that delegate to appropriate services
 NO business logic here - just HTTP handling
-ADDED: Pagination support with offset/limit for loading more drafts
+ADDED: Cursor-based pagination for loading more drafts
 """
 from flask import render_template, request, jsonify, current_app, g, redirect, url_for
 import uuid
@@ -16,6 +16,7 @@ from app.system.auth.permissions import get_workspace_user_id, check_workspace_p
 from app.system.services.firebase_service import UserService
 from app.system.services.content_library_service import ContentLibraryManager
 from app.scripts.accounts.x_analytics import XAnalytics
+from app.utils.cursor import encode_cursor, decode_cursor
 
 def get_user_posts_collection():
     """Get the user's posts collection reference"""
@@ -28,28 +29,64 @@ def get_user_posts_collection():
         current_app.logger.error(f"Error getting Firestore client: {e}")
         raise
 
-def get_user_drafts_safe(user_id, limit=20, offset=0):
-    """Safely get user drafts with pagination support"""
+def _draft_cursor(doc, direction):
+    """Cursor that continues from a draft in the given direction ('next' or 'prev')"""
+    timestamp = doc.to_dict().get('timestamp')
+    return encode_cursor({
+        'id': doc.id,
+        'ts': timestamp.isoformat() if isinstance(timestamp, datetime) else None,
+        'dir': direction
+    })
+
+def _cursor_position(collection, cursor):
+    """
+    Document snapshot (or timestamp values, if the draft was deleted since) to page from
+    """
+    cursor_doc = collection.document(cursor['id']).get()
+    if cursor_doc.exists:
+        return cursor_doc
+    if cursor.get('ts'):
+        return {'timestamp': datetime.fromisoformat(cursor['ts'])}
+    return None
+
+def get_user_drafts_page(user_id, limit=20, cursor=None, offset=0):
+    """
+    Get one page of user drafts, newest first
+
+    Pages continue from an opaque cursor with start_after/end_before, so loading
+    a page reads about `limit` drafts however deep it is. `offset` is only used
+    when no cursor is given.
+
+    Returns:
+        Dict with drafts, has_more, next_cursor and prev_cursor
+    """
+    empty_page = {'drafts': [], 'has_more': False, 'next_cursor': None, 'prev_cursor': None}
     try:
         collection = get_user_posts_collection()
-        
-        # Build query with offset support
         query = collection.order_by('timestamp', direction='DESCENDING')
-        
-        # Apply offset if provided
-        if offset > 0:
-            # Get the document at the offset position to use as startAfter
-            offset_query = collection.order_by('timestamp', direction='DESCENDING').limit(offset)
-            offset_docs = list(offset_query.stream())
-            if offset_docs:
-                last_doc = offset_docs[-1]
-                query = query.start_after(last_doc)
-        
-        # Apply limit
-        query = query.limit(limit)
-        
+
+        after = decode_cursor(cursor, required=('id',))
+        position = _cursor_position(collection, after) if after else None
+        backwards = position is not None and after.get('dir') == 'prev'
+
+        # Read one extra draft to know whether another page exists in that direction
+        if backwards:
+            docs = list(query.end_before(position).limit_to_last(limit + 1).get())
+            has_previous = len(docs) > limit
+            docs = docs[-limit:] if has_previous else docs
+            has_more = True
+        else:
+            if position is not None:
+                query = query.start_after(position)
+            elif offset > 0:
+                query = query.offset(offset)
+            docs = list(query.limit(limit + 1).stream())
+            has_more = len(docs) > limit
+            docs = docs[:limit]
+            has_previous = position is not None or offset > 0
+
         drafts = []
-        for doc in query.stream():
+        for doc in docs:
             draft_data = doc.to_dict()
             draft_data['id'] = doc.id
             
@@ -58,21 +95,30 @@ def get_user_drafts_safe(user_id, limit=20, offset=0):
             # This prevents expensive Firebase Storage API calls for ALL drafts on page load
             
             drafts.append(draft_data)
-        
-        return drafts
+
+        if not docs:
+            return empty_page
+
+        return {
+            'drafts': drafts,
+            'has_more': has_more,
+            'next_cursor': _draft_cursor(docs[-1], 'next') if has_more else None,
+            'prev_cursor': _draft_cursor(docs[0], 'prev') if has_previous else None
+        }
         
     except Exception as e:
         current_app.logger.error(f"Error getting user drafts: {str(e)}")
-        return []
+        return empty_page
+
+def get_user_drafts_safe(user_id, limit=20, offset=0):
+    """Safely get user drafts with pagination support"""
+    return get_user_drafts_page(user_id, limit=limit, offset=offset)['drafts']
 
 def get_total_drafts_count(user_id):
-    """Get total count of user's drafts"""
+    """Get total count of user's drafts with an aggregation query (no documents read)"""
     try:
         collection = get_user_posts_collection()
-        
-        # Count all drafts for the user
-        docs = list(collection.stream())
-        return len(docs)
+        return collection.count().get()[0][0].value
         
     except Exception as e:
         current_app.logger.error(f"Error counting drafts: {str(e)}")
@@ -100,11 +146,12 @@ def index():
 
         user_id = get_workspace_user_id()
         # Get first 10 drafts and total count for initial load
-        recent_drafts = get_user_drafts_safe(user_id, limit=10, offset=0)
+        drafts_page = get_user_drafts_page(user_id, limit=10)
+        recent_drafts = drafts_page['drafts']
         total_count = get_total_drafts_count(user_id)
 
         # Determine if there are more drafts to load
-        has_more = len(recent_drafts) < total_count
+        has_more = drafts_page['has_more']
 
         # Get user data for template, including x_account if available
         user_data = g.user.copy() if hasattr(g, 'user') else {}
@@ -170,6 +217,7 @@ def get_drafts():
         # Get pagination parameters
         offset = int(request.args.get('offset', 0))
         limit = int(request.args.get('limit', 20))
+        cursor = request.args.get('cursor')
         
         # Validate parameters
         if offset < 0:
@@ -177,19 +225,20 @@ def get_drafts():
         if limit < 1 or limit > 50:  # Max 50 per request
             limit = 20
         
-        drafts = get_user_drafts_safe(user_id, limit=limit, offset=offset)
+        # With a cursor, offset only tells us how many drafts the client already has
+        drafts_page = get_user_drafts_page(user_id, limit=limit, cursor=cursor, offset=offset)
+        drafts = drafts_page['drafts']
         total_count = get_total_drafts_count(user_id)
         
-        # Calculate if there are more drafts to load
-        has_more = (offset + len(drafts)) < total_count
-        
         return jsonify({
             "success": True,
             "drafts": drafts,
             "offset": offset,
             "limit": limit,
             "total_count": total_count,
-            "has_more": has_more,
+            "has_more": drafts_page['has_more'],
+            "next_cursor": drafts_page['next_cursor'],
+            "prev_cursor": drafts_page['prev_cursor'],
             "loaded_count": offset + len(drafts)
         })
     except Exception as e:
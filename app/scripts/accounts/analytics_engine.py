@@ -0,0 +1,227 @@
+"""
+Analytics Engine - array-backed helpers for the analytics chart endpoints
+Rolling windows are computed from cumulative sums and posts are assigned to day/week
+buckets with np.searchsorted over the bucket edges, so a chart costs a few NumPy
+passes over the posts instead of a Python loop (and window slice) per post.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+ROLLING_WINDOW = 10
+
+
+def rolling_sum(values: np.ndarray, window: int = ROLLING_WINDOW) -> np.ndarray:
+    """
+    Sum of each value and the window - 1 values before it
+
+    Returns a float array aligned with values; positions without a full window are NaN.
+    """
+    values = np.asarray(values)
+    sums = np.full(len(values), np.nan)
+    if len(values) >= window:
+        # Integer columns stay int64 so window sums are exact
+        cumulative = np.concatenate(([0], np.cumsum(values)))
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def rolling_mean(values: np.ndarray, window: int = ROLLING_WINDOW) -> np.ndarray:
+    """Mean over a trailing window (NaN until the first full window)"""
+    return rolling_sum(values, window) / window
+
+
+def rolling_ratio(numerator: np.ndarray, denominator: np.ndarray, window: int = ROLLING_WINDOW,
+                  scale: float = 100) -> np.ndarray:
+    """
+    Ratio of two trailing-window sums (e.g. engagement / views * 100)
+
+    NaN where the window is incomplete or the denominator sum is zero.
+    """
+    numerator_sums = rolling_sum(numerator, window)
+    denominator_sums = rolling_sum(denominator, window)
+    ratios = np.full(len(numerator_sums), np.nan)
+    valid = denominator_sums > 0
+    ratios[valid] = (numerator_sums[valid] / denominator_sums[valid]) * scale
+    return ratios
+
+
+def _local_midnight(day: date) -> float:
+    return datetime.combine(day, time()).timestamp()
+
+
+class TimeBuckets:
+    """
+    Consecutive local-time days (or Monday-based weeks) covering a date range
+
+    `edges` holds the start timestamp of every bucket plus the end of the last
+    one, so bucket b covers [edges[b], edges[b + 1]).
+    """
+
+    def __init__(self, start: date, end: date, by_week: bool = False):
+        step = 7 if by_week else 1
+        if by_week:
+            start = start - timedelta(days=start.weekday())
+            end = end - timedelta(days=end.weekday())
+
+        days = []
+        day = start
+        while day <= end:
+            days.append(day)
+            day += timedelta(days=step)
+
+        self.by_week = by_week
+        self.keys: List[str] = [d.strftime('%Y-%m-%d') for d in days]
+        self.week_ends: List[Optional[str]] = [
+            (d + timedelta(days=6)).strftime('%Y-%m-%d') if by_week else None for d in days
+        ]
+        self.edges = np.array([_local_midnight(d) for d in days] + [_local_midnight(day)], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.edges[:-1]
+
+
+class BucketedPosts:
+    """
+    Posts (sorted oldest first) assigned to TimeBuckets
+
+    Only posts from `first_index` on are bucketed, so callers can apply a cutoff
+    that falls inside the first bucket; posts outside the buckets are ignored.
+    """
+
+    def __init__(self, timestamps: np.ndarray, buckets: TimeBuckets, first_index: int = 0):
+        self.buckets = buckets
+        self.first_index = first_index
+
+        window = timestamps[first_index:]
+        bucket_index = np.searchsorted(buckets.edges, window, side='right') - 1
+        self._in_range = (bucket_index >= 0) & (bucket_index < len(buckets))
+        self._bucket_index = bucket_index[self._in_range]
+
+        # Last post (index into timestamps) of each bucket, -1 when the bucket is empty
+        bucket_starts = np.maximum(np.searchsorted(timestamps, buckets.edges[:-1], side='left'), first_index)
+        bucket_ends = np.searchsorted(timestamps, buckets.edges[1:], side='left') - 1
+        self.last_post = np.where(bucket_ends >= bucket_starts, bucket_ends, -1)
+
+    def counts(self) -> np.ndarray:
+        return np.bincount(self._bucket_index, minlength=len(self.buckets))
+
+    def sums(self, values: np.ndarray) -> np.ndarray:
+        """Per-bucket sum of a per-post column aligned with the timestamps"""
+        window = np.asarray(values)[self.first_index:][self._in_range]
+        sums = np.bincount(self._bucket_index, weights=window, minlength=len(self.buckets))
+        # bincount sums in float64, which is exact for integer columns below 2**53
+        return sums.astype(np.int64) if window.dtype.kind in 'iub' else sums
+
+    def last_values(self, values: np.ndarray) -> np.ndarray:
+        """Value of each bucket's most recent post (NaN for empty buckets)"""
+        has_post = self.last_post >= 0
+        result = np.full(len(self.buckets), np.nan)
+        result[has_post] = np.asarray(values, dtype=np.float64)[self.last_post[has_post]]
+        return result
+
+
+def values_as_of(timestamps: np.ndarray, values: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Latest non-NaN value with a timestamp at or before each target
+
+    Args:
+        timestamps: Sorted timestamps aligned with values
+        values: Per-post values, NaN where there is none
+        targets: Timestamps to look up
+
+    Returns:
+        Float array aligned with targets, NaN where no earlier value exists
+    """
+    values = np.asarray(values, dtype=np.float64)
+    has_value = ~np.isnan(values)
+    value_timestamps = timestamps[has_value]
+    positions = np.searchsorted(value_timestamps, targets, side='right') - 1
+
+    result = np.full(len(targets), np.nan)
+    found = positions >= 0
+    result[found] = values[has_value][positions[found]]
+    return result
+
+
+def optional_floats(values: np.ndarray) -> List[Optional[float]]:
+    """Float array as a JSON-ready list with NaN as None"""
+    return [None if value != value else value for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def percentage_change(old_values, new_values) -> np.ndarray:
+    """
+    Percentage change from old to new, element-wise
+
+    A change from zero counts as 100% when the new value is positive, else 0%.
+    """
+    old_values = np.asarray(old_values, dtype=np.float64)
+    new_values = np.asarray(new_values, dtype=np.float64)
+    from_zero = np.where(new_values > 0, 100.0, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (new_values - old_values) / old_values * 100
+    return np.where(old_values == 0, from_zero, change)
+
+
+def calculate_trends(history: Sequence[Dict], metrics: Dict[str, str], lookback: int = 7) -> Dict[str, float]:
+    """
+    Percentage change of each metric over the last `lookback` history entries
+
+    Args:
+        history: Snapshots sorted oldest first
+        metrics: Trend name -> field name in each snapshot
+        lookback: Compare the latest entry with the one this many entries before it
+            (or the oldest available)
+    """
+    if len(history) < 2:
+        return {name: 0 for name in metrics}
+
+    oldest = history[-(lookback + 1):][0]
+    latest = history[-1]
+    fields = list(metrics.values())
+    changes = percentage_change(
+        [oldest.get(field, 0) or 0 for field in fields],
+        [latest.get(field, 0) or 0 for field in fields]
+    )
+    return dict(zip(metrics.keys(), changes.tolist()))
+
+
+class DailyRecords:
+    """
+    Date-keyed daily records (e.g. YouTube daily_data) as sorted columns
+
+    Records are sorted by their 'date' string; window() slices by cutoff date
+    with a binary search.
+    """
+
+    def __init__(self, records: Sequence[Dict], fields: Sequence[str]):
+        dates = np.array([record.get('date', '') for record in records], dtype=str)
+        order = np.argsort(dates, kind='stable')
+        self.records = [records[i] for i in order]
+        self.dates = dates[order]
+        self.columns = {
+            field: np.array([record.get(field, 0) or 0 for record in self.records])
+            for field in fields
+        }
+
+    def window(self, cutoff_date: str) -> 'DailyRecords':
+        """Records dated on or after cutoff_date (YYYY-MM-DD)"""
+        start = int(np.searchsorted(self.dates, cutoff_date, side='left'))
+        window = DailyRecords.__new__(DailyRecords)
+        window.records = self.records[start:]
+        window.dates = self.dates[start:]
+        window.columns = {field: column[start:] for field, column in self.columns.items()}
+        return window
+
+    def __len__(self):
+        return len(self.records)
+
+    def total(self, field: str):
+        """Sum of a column as a plain int/float"""
+        column = self.columns[field]
+        return column.sum().item() if len(column) else 0
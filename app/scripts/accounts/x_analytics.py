@@ -14,7 +14,10 @@ from datetime import datetime, timedelta
 from google.cloud import firestore
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 from dotenv import load_dotenv
+from app.scripts.accounts.x_posts_snapshot import invalidate_x_posts_snapshot, X_POSTS_VERSION_DOC
+from app.utils.cursor import encode_cursor, decode_cursor
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -22,6 +25,34 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Per-day rollups of post metrics, kept current incrementally (users/{uid}/x_daily_metrics/{YYYY-MM-DD})
+DAILY_ROLLUP_COLLECTION = 'x_daily_metrics'
+DAILY_ROLLUP_VERSION = 1
+# Posts written per transaction: each post plus at most two rollup days (old and new
+# date) keeps a chunk within Firestore's 500 writes
+DAILY_ROLLUP_WRITE_CHUNK_SIZE = 100
+# Rollups are rebuilt from all posts at least this often, correcting any drift
+DAILY_ROLLUP_RECONCILE_DAYS = 7
+
+# Sort keys stored on every post so the posts table pages with indexed queries;
+# users/{uid}/x_analytics/{X_POSTS_VERSION_DOC} records once all stored posts have them
+POST_SORT_KEYS_VERSION = 1
+# Posts need more than this many views to be ranked by engagement rate
+ENGAGEMENT_RANK_MIN_VIEWS = 100
+# Posts table filter -> field it is sorted by (descending)
+POST_SORT_FIELDS = {
+    'all': 'created_at_timestamp',
+    'views': 'views',
+    'engagement': 'engagement_rank'
+}
+# Posts table filter -> (operator, value) a post's sort field must satisfy to be listed.
+# The count uses the same constraint, so it matches the posts the sorted query returns.
+POST_SORT_CONSTRAINTS = {
+    'all': ('>', 0),
+    'views': ('>=', 0),
+    'engagement': ('>=', 0)
+}
+
 class XAnalytics:
     """Handle X/Twitter analytics data fetching and processing with Firebase storage"""
     
@@ -47,6 +78,11 @@ class XAnalytics:
         # Get Firestore client
         self.db = firestore.client()
         
+        # Incremental daily rollup state (see _write_posts)
+        self._daily_rollups_ready = None
+        self._rollup_rebuild_needed = False
+        self._touched_rollup_days = set()
+
         # Get X handle from Firebase
         self.x_handle = self._get_handle()
         logger.info(f"Initialized X Analytics for handle: {self.x_handle}")
@@ -604,6 +640,8 @@ class XAnalytics:
             else:
                 # Update recent posts only
                 self._update_recent_posts(timeline_data)
+            self._ensure_post_sort_keys()
+            invalidate_x_posts_snapshot(self.db, self.user_id)
             logger.info(f"[X_SETUP] Step 3/5 Complete: Posts stored in Firebase")
 
             # Calculate and store metrics
@@ -823,11 +861,8 @@ class XAnalytics:
             # Get posts collection reference
             posts_collection = self.db.collection('users').document(self.user_id).collection('x_posts_individual')
             
-            # Store each post as individual document
-            batch = self.db.batch()
-            batch_count = 0
-            posts_stored = 0
-
+            # Build each post document first so daily rollups can be updated from the changes
+            post_docs = []
             for post in filtered_posts:
                 # Extract media URL if available
                 media_url = self._extract_media_url(post)
@@ -859,26 +894,11 @@ class XAnalytics:
                     'last_updated': datetime.now().isoformat(),
                     'is_historical': True  # Mark as historical data
                 }
-                
-                # Use tweet ID as document ID
-                doc_id = post_data['id']
-                if doc_id:
-                    doc_ref = posts_collection.document(doc_id)
-                    batch.set(doc_ref, post_data, merge=True)
-                    batch_count += 1
-                    posts_stored += 1
-
-                    # Commit batch every 100 documents
-                    if batch_count >= 100:
-                        batch.commit()
-                        batch = self.db.batch()
-                        batch_count = 0
-                        logger.info(f"[X_SETUP] Committed batch of 100 posts ({posts_stored} of {len(filtered_posts)} total)")
-
-            # Commit remaining batch
-            if batch_count > 0:
-                batch.commit()
-                logger.info(f"[X_SETUP] Committed final batch of {batch_count} posts")
+                if post_data['id']:
+                    post_docs.append(self._with_sort_keys(post_data))
+
+            # Store each post as individual document (tweet ID as document ID)
+            self._write_posts(posts_collection, post_docs)
 
             logger.info(f"[X_SETUP] Successfully stored {len(filtered_posts)} posts for user {self.user_id}")
             
@@ -896,43 +916,7 @@ class XAnalytics:
             posts_collection = self.db.collection('users').document(self.user_id).collection('x_posts_individual')
 
             # First, cleanup posts older than 6 months
-            logger.info(f"Checking for posts older than 6 months to delete")
-            all_posts_query = posts_collection.stream()
-            posts_to_delete = []
-
-            for doc in all_posts_query:
-                post_data = doc.to_dict()
-                created_at = post_data.get('created_at', '')
-                if created_at:
-                    try:
-                        post_date = datetime.strptime(created_at, '%a %b %d %H:%M:%S %z %Y')
-                        if post_date.replace(tzinfo=None) < six_months_ago:
-                            posts_to_delete.append(doc.id)
-                    except Exception as e:
-                        logger.debug(f"Error parsing date for cleanup: {e}")
-
-            # Delete old posts in batches
-            if posts_to_delete:
-                logger.info(f"Deleting {len(posts_to_delete)} posts older than 6 months")
-                batch = self.db.batch()
-                batch_count = 0
-
-                for post_id in posts_to_delete:
-                    doc_ref = posts_collection.document(post_id)
-                    batch.delete(doc_ref)
-                    batch_count += 1
-
-                    if batch_count >= 500:  # Firestore batch limit
-                        batch.commit()
-                        batch = self.db.batch()
-                        batch_count = 0
-
-                if batch_count > 0:
-                    batch.commit()
-
-                logger.info(f"Successfully deleted {len(posts_to_delete)} old posts")
-            else:
-                logger.info("No posts older than 6 months to delete")
+            self._prune_expired_posts(posts_collection, six_months_ago)
 
             # Filter posts from last 7 days for update
             recent_posts = []
@@ -954,10 +938,8 @@ class XAnalytics:
                 self._store_posts(posts[:100])
                 return
             
-            # Update posts
-            batch = self.db.batch()
-            batch_count = 0
-            
+            # Build updated post documents
+            post_docs = []
             for post in recent_posts:
                 # Extract media URL if available
                 media_url = self._extract_media_url(post)
@@ -988,24 +970,12 @@ class XAnalytics:
                     'media_url': media_url,
                     'last_updated': datetime.now().isoformat()
                 }
-                
-                # Use tweet ID as document ID
-                doc_id = post_data['id']
-                if doc_id:
-                    doc_ref = posts_collection.document(doc_id)
-                    batch.set(doc_ref, post_data, merge=True)
-                    batch_count += 1
-                    
-                    # Commit batch every 100 documents
-                    if batch_count >= 100:
-                        batch.commit()
-                        batch = self.db.batch()
-                        batch_count = 0
-            
-            # Commit remaining batch
-            if batch_count > 0:
-                batch.commit()
-            
+                if post_data['id']:
+                    post_docs.append(self._with_sort_keys(post_data))
+
+            # Update posts (tweet ID as document ID)
+            self._write_posts(posts_collection, post_docs)
+
             logger.info(f"Updated {len(recent_posts)} recent posts")
             
             # Also update the timeline document
@@ -1014,8 +984,302 @@ class XAnalytics:
         except Exception as e:
             logger.error(f"Error updating recent posts: {str(e)}")
     
+    @staticmethod
+    def _with_daily_averages(data):
+        """Add engagement rate and per-post averages to a day's totals"""
+        data = dict(data)
+        if data.get('total_views', 0) > 0:
+            data['engagement_rate'] = (data['total_engagement'] / data['total_views']) * 100
+        else:
+            data['engagement_rate'] = 0
+
+        if data.get('posts_count', 0) > 0:
+            data['avg_views_per_post'] = data['total_views'] / data['posts_count']
+            data['avg_engagement_per_post'] = data['total_engagement'] / data['posts_count']
+        else:
+            data['avg_views_per_post'] = 0
+            data['avg_engagement_per_post'] = 0
+        return data
+
+    @staticmethod
+    def _with_sort_keys(post_data):
+        """Add the precomputed sort keys used by the paginated posts table"""
+        views = post_data.get('views', 0) or 0
+        total_engagement = sum(post_data.get(field, 0) or 0 for field in ('likes', 'retweets', 'replies', 'bookmarks'))
+        engagement_rate = (total_engagement / views) * 100 if views > 0 else 0
+
+        post_data['total_engagement'] = total_engagement
+        post_data['engagement_rate'] = engagement_rate
+        # -1 keeps low-view posts out of the engagement ranking query
+        post_data['engagement_rank'] = engagement_rate if views > ENGAGEMENT_RANK_MIN_VIEWS else -1
+        return post_data
+
+    def _ensure_post_sort_keys(self):
+        """
+        Backfill sort keys on posts stored before they were precomputed
+
+        Runs once per user; afterwards every post write includes the sort keys.
+        """
+        try:
+            state_ref = self.db.collection('users').document(self.user_id).collection('x_analytics').document(X_POSTS_VERSION_DOC)
+            state_doc = state_ref.get()
+            if state_doc.exists and state_doc.to_dict().get('sort_keys_version') == POST_SORT_KEYS_VERSION:
+                return
+
+            posts_collection = self.db.collection('users').document(self.user_id).collection('x_posts_individual')
+            posts_docs = posts_collection.select(['views', 'likes', 'retweets', 'replies', 'bookmarks']).stream()
+
+            batch = self.db.batch()
+            batch_count = 0
+            updated = 0
+            for doc in posts_docs:
+                sort_keys = self._with_sort_keys(doc.to_dict())
+                batch.update(doc.reference, {
+                    field: sort_keys[field] for field in ('total_engagement', 'engagement_rate', 'engagement_rank')
+                })
+                batch_count += 1
+                updated += 1
+                if batch_count >= 500:  # Firestore batch limit
+                    batch.commit()
+                    batch = self.db.batch()
+                    batch_count = 0
+            if batch_count > 0:
+                batch.commit()
+
+            state_ref.set({'sort_keys_version': POST_SORT_KEYS_VERSION}, merge=True)
+            logger.info(f"Backfilled post sort keys on {updated} posts for user {self.user_id}")
+
+        except Exception as e:
+            logger.error(f"Error backfilling post sort keys: {str(e)}")
+
+    @staticmethod
+    def _post_rollup_contribution(post_data):
+        """Return (day_key, totals) that a stored post contributes to the daily rollups"""
+        timestamp = post_data.get('created_at_timestamp')
+        if timestamp is None:
+            return None, None
+
+        likes = post_data.get('likes', 0) or 0
+        retweets = post_data.get('retweets', 0) or 0
+        replies = post_data.get('replies', 0) or 0
+        bookmarks = post_data.get('bookmarks', 0) or 0
+        day_key = datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d')
+        return day_key, {
+            'posts_count': 1,
+            'total_views': post_data.get('views', 0) or 0,
+            'total_likes': likes,
+            'total_retweets': retweets,
+            'total_replies': replies,
+            'total_bookmarks': bookmarks,
+            'total_engagement': likes + retweets + replies + bookmarks
+        }
+
+    def _check_daily_rollups_ready(self):
+        """
+        Whether incremental per-day rollups exist for this user (cached per instance)
+
+        Rollups last rebuilt more than DAILY_ROLLUP_RECONCILE_DAYS ago count as not
+        ready, so they are periodically reconciled against the stored posts.
+        """
+        if self._daily_rollups_ready is None:
+            try:
+                summary_doc = self.db.collection('users').document(self.user_id).collection('x_analytics').document('daily_metrics').get()
+                summary = summary_doc.to_dict() if summary_doc.exists else {}
+                reconcile_cutoff = (datetime.now() - timedelta(days=DAILY_ROLLUP_RECONCILE_DAYS)).isoformat()
+                self._daily_rollups_ready = (
+                    summary.get('rollup_version') == DAILY_ROLLUP_VERSION
+                    and summary.get('rebuilt_at', '') >= reconcile_cutoff
+                )
+            except Exception as e:
+                logger.warning(f"Could not check daily rollup state: {str(e)}")
+                self._daily_rollups_ready = False
+        return self._daily_rollups_ready
+
+    def _write_posts(self, posts_collection, post_docs):
+        """
+        Write post documents (merged) and keep the per-day rollups in step
+
+        Each chunk of posts is written in one transaction that reads the posts'
+        stored metrics, sets the posts and increments each affected day by
+        (new - old). A failed chunk changes neither, and overlapping refreshes of
+        the same user serialize on the post documents instead of applying the same
+        delta twice. Without rollups (or after a failure) posts are written in plain
+        batches and the next daily metrics pass rebuilds the rollups.
+        """
+        if not post_docs:
+            return
+
+        rollups_collection = self.db.collection('users').document(self.user_id).collection(DAILY_ROLLUP_COLLECTION)
+        field_paths = ['created_at_timestamp', 'views', 'likes', 'retweets', 'replies', 'bookmarks']
+
+        @firestore.transactional
+        def write_chunk(transaction, chunk):
+            refs = [posts_collection.document(post_data['id']) for post_data in chunk]
+            previous = {
+                doc.id: doc.to_dict()
+                for doc in self.db.get_all(refs, field_paths=field_paths, transaction=transaction)
+                if doc.exists
+            }
+
+            deltas = {}
+
+            def _accumulate(day_key, totals, sign):
+                if not day_key:
+                    return
+                day = deltas.setdefault(day_key, {})
+                for field, value in totals.items():
+                    day[field] = day.get(field, 0) + sign * value
+
+            for post_data in chunk:
+                old_post = previous.get(post_data['id'])
+                if old_post:
+                    _accumulate(*self._post_rollup_contribution(old_post), -1)
+                _accumulate(*self._post_rollup_contribution(post_data), 1)
+
+            for ref, post_data in zip(refs, chunk):
+                transaction.set(ref, post_data, merge=True)
+
+            touched_days = []
+            for day_key, day_delta in deltas.items():
+                changes = {field: firestore.Increment(value) for field, value in day_delta.items() if value}
+                if not changes:
+                    continue
+                changes['date'] = day_key
+                transaction.set(rollups_collection.document(day_key), changes, merge=True)
+                touched_days.append(day_key)
+            return touched_days
+
+        written = 0
+        if self._check_daily_rollups_ready():
+            for i in range(0, len(post_docs), DAILY_ROLLUP_WRITE_CHUNK_SIZE):
+                chunk = post_docs[i:i + DAILY_ROLLUP_WRITE_CHUNK_SIZE]
+                try:
+                    self._touched_rollup_days.update(write_chunk(self.db.transaction(), chunk))
+                    written += len(chunk)
+                except Exception as e:
+                    # Fall back to a full rebuild on the next daily metrics pass
+                    logger.error(f"Error writing posts with daily rollup deltas: {str(e)}")
+                    self._daily_rollups_ready = False
+                    self._rollup_rebuild_needed = True
+                    break
+            else:
+                logger.info(f"Wrote {written} posts with daily rollup deltas for {len(self._touched_rollup_days)} days")
+                return
+
+        batch = self.db.batch()
+        batch_count = 0
+        for post_data in post_docs[written:]:
+            batch.set(posts_collection.document(post_data['id']), post_data, merge=True)
+            batch_count += 1
+
+            # Commit batch every 100 documents
+            if batch_count >= 100:
+                batch.commit()
+                batch = self.db.batch()
+                batch_count = 0
+        if batch_count > 0:
+            batch.commit()
+        logger.info(f"Wrote {len(post_docs) - written} posts without rollup deltas")
+
+    def _prune_expired_posts(self, posts_collection, cutoff_date):
+        """Delete posts older than cutoff_date using an indexed created_at_timestamp query"""
+        cutoff_timestamp = cutoff_date.timestamp()
+        deleted = 0
+        try:
+            while True:
+                expired_docs = list(
+                    posts_collection
+                    .where(filter=FieldFilter('created_at_timestamp', '<', cutoff_timestamp))
+                    .select([])
+                    .limit(500)  # Firestore batch limit
+                    .stream()
+                )
+                if not expired_docs:
+                    break
+
+                batch = self.db.batch()
+                for doc in expired_docs:
+                    batch.delete(doc.reference)
+                batch.commit()
+                deleted += len(expired_docs)
+
+                if len(expired_docs) < 500:
+                    break
+
+            if deleted:
+                logger.info(f"Deleted {deleted} posts older than 6 months")
+            else:
+                logger.info("No posts older than 6 months to delete")
+
+        except Exception as e:
+            logger.error(f"Error pruning expired posts: {str(e)}")
+
     def _calculate_daily_metrics(self):
-        """Calculate daily metrics from individual posts"""
+        """
+        Refresh the daily metrics summary from the per-day rollup documents
+
+        Only the days touched since the last run are re-read; days older than
+        6 months are dropped from the summary and their rollup documents deleted.
+        """
+        try:
+            if self._rollup_rebuild_needed or not self._check_daily_rollups_ready():
+                logger.info(f"[X_SETUP] No incremental daily rollups for user {self.user_id}, rebuilding from all posts")
+                self._rebuild_daily_metrics()
+                self._rollup_rebuild_needed = False
+                self._touched_rollup_days = set()
+                return
+
+            user_ref = self.db.collection('users').document(self.user_id)
+            rollups_collection = user_ref.collection(DAILY_ROLLUP_COLLECTION)
+            daily_metrics_ref = user_ref.collection('x_analytics').document('daily_metrics')
+            cutoff_key = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
+
+            summary_doc = daily_metrics_ref.get()
+            summary = (summary_doc.to_dict() or {}) if summary_doc.exists else {}
+            daily_data = summary.get('metrics', {})
+
+            # Re-read only the days whose rollups changed
+            touched_days = sorted(day for day in self._touched_rollup_days if day >= cutoff_key)
+            if touched_days:
+                for doc in self.db.get_all([rollups_collection.document(day) for day in touched_days]):
+                    if doc.exists:
+                        daily_data[doc.id] = self._with_daily_averages(doc.to_dict())
+                    else:
+                        daily_data.pop(doc.id, None)
+
+            # Drop expired days from the summary and delete their rollup documents
+            daily_data = {day: data for day, data in daily_data.items() if day >= cutoff_key}
+            expired_rollups = list(
+                rollups_collection.where(filter=FieldFilter('date', '<', cutoff_key)).select([]).limit(500).stream()
+            )
+            if expired_rollups:
+                batch = self.db.batch()
+                for doc in expired_rollups:
+                    batch.delete(doc.reference)
+                batch.commit()
+
+            daily_metrics_ref.set({
+                'last_updated': datetime.now().isoformat(),
+                'rebuilt_at': summary.get('rebuilt_at', ''),
+                'rollup_version': DAILY_ROLLUP_VERSION,
+                'metrics': daily_data
+            })
+            self._touched_rollup_days = set()
+
+            logger.info(f"[X_SETUP] Refreshed daily metrics: {len(touched_days)} days updated, "
+                        f"{len(expired_rollups)} expired, {len(daily_data)} days stored")
+
+        except Exception as e:
+            logger.error(f"Error calculating daily metrics: {str(e)}")
+
+    def _rebuild_daily_metrics(self):
+        """
+        Rebuild the per-day rollups from every stored post
+
+        Needed once per user (before incremental rollups exist) and then every
+        DAILY_ROLLUP_RECONCILE_DAYS as a reconcile; in between, _write_posts keeps
+        them current from the posts that changed.
+        """
         try:
             # Get all posts
             posts_collection = self.db.collection('users').document(self.user_id).collection('x_posts_individual')
@@ -1101,31 +1365,42 @@ class XAnalytics:
                 sorted_dates = sorted(daily_data.keys())
                 logger.info(f"[X_SETUP] Date range: {sorted_dates[0]} to {sorted_dates[-1]}")
             
-            # Calculate engagement rates and averages
+            # Store per-day rollup documents (totals only), removing days that no longer have posts
+            rollups_collection = self.db.collection('users').document(self.user_id).collection(DAILY_ROLLUP_COLLECTION)
+            stale_days = [doc.reference for doc in rollups_collection.select([]).stream() if doc.id not in daily_data]
+            batch = self.db.batch()
+            batch_count = 0
             for date_key, data in daily_data.items():
-                if data['total_views'] > 0:
-                    data['engagement_rate'] = (data['total_engagement'] / data['total_views']) * 100
-                else:
-                    data['engagement_rate'] = 0
-                
-                if data['posts_count'] > 0:
-                    data['avg_views_per_post'] = data['total_views'] / data['posts_count']
-                    data['avg_engagement_per_post'] = data['total_engagement'] / data['posts_count']
-                else:
-                    data['avg_views_per_post'] = 0
-                    data['avg_engagement_per_post'] = 0
-            
-            # Store daily metrics
+                batch.set(rollups_collection.document(date_key), data)
+                batch_count += 1
+                if batch_count >= 500:  # Firestore batch limit
+                    batch.commit()
+                    batch = self.db.batch()
+                    batch_count = 0
+            for stale_ref in stale_days:
+                batch.delete(stale_ref)
+                batch_count += 1
+                if batch_count >= 500:  # Firestore batch limit
+                    batch.commit()
+                    batch = self.db.batch()
+                    batch_count = 0
+            if batch_count > 0:
+                batch.commit()
+
+            # Store daily metrics summary (with engagement rates and averages)
             daily_metrics_ref = self.db.collection('users').document(self.user_id).collection('x_analytics').document('daily_metrics')
             daily_metrics_ref.set({
                 'last_updated': datetime.now().isoformat(),
-                'metrics': daily_data
+                'rebuilt_at': datetime.now().isoformat(),
+                'rollup_version': DAILY_ROLLUP_VERSION,
+                'metrics': {date_key: self._with_daily_averages(data) for date_key, data in daily_data.items()}
             })
+            self._daily_rollups_ready = True
 
             logger.info(f"[X_SETUP] Calculated and stored daily metrics for {len(daily_data)} days")
             
         except Exception as e:
-            logger.error(f"Error calculating daily metrics: {str(e)}")
+            logger.error(f"Error rebuilding daily metrics: {str(e)}")
     
     def _store_posts(self, posts):
         """Store all posts in Firebase subcollection (backward compatibility)"""
@@ -1328,6 +1603,64 @@ def fetch_x_analytics(user_id, is_initial=False):
     analytics = XAnalytics(user_id)
     return analytics.get_analytics_data(is_initial=is_initial)
 
+def get_x_posts_page(db, user_id, filter_type='all', per_page=12, cursor=None, page=1):
+    """
+    Get one page of a user's X posts with an indexed, sorted Firestore query
+
+    Pages continue from the cursor's last post with start_after, so a page reads
+    about per_page documents however deep it is. Single-field indexes cover all
+    three sort orders.
+
+    Args:
+        db: Firestore client
+        user_id: User ID
+        filter_type: 'all' (newest first), 'views' or 'engagement' (highest first)
+        per_page: Posts per page
+        cursor: next_cursor from the previous page
+        page: Page number, only used to skip ahead when there is no cursor
+
+    Returns:
+        Dict with posts, total_posts, total_pages and next_cursor, or None if the
+        user's posts don't all have sort keys yet
+    """
+    state_doc = db.collection('users').document(user_id).collection('x_analytics').document(X_POSTS_VERSION_DOC).get()
+    if not state_doc.exists or state_doc.to_dict().get('sort_keys_version') != POST_SORT_KEYS_VERSION:
+        return None
+
+    posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
+    if filter_type not in POST_SORT_FIELDS:
+        filter_type = 'all'
+    sort_field = POST_SORT_FIELDS[filter_type]
+    operator, value = POST_SORT_CONSTRAINTS[filter_type]
+
+    query = posts_collection.where(filter=FieldFilter(sort_field, operator, value))
+    total_posts = query.count().get()[0][0].value
+
+    query = query.order_by(sort_field, direction=firestore.Query.DESCENDING)
+    after = decode_cursor(cursor)
+    last_doc = None
+    if after and after.get('id'):
+        last_doc = posts_collection.document(after['id']).get()
+    if last_doc is not None and last_doc.exists:
+        query = query.start_after(last_doc)
+    elif page > 1:
+        query = query.offset((page - 1) * per_page)
+
+    # Read one extra document to know whether another page exists
+    docs = list(query.limit(per_page + 1).stream())
+    posts = [doc.to_dict() for doc in docs[:per_page]]
+
+    next_cursor = None
+    if len(docs) > per_page:
+        next_cursor = encode_cursor({'id': docs[per_page - 1].id})
+
+    return {
+        'posts': posts,
+        'total_posts': total_posts,
+        'total_pages': (total_posts + per_page - 1) // per_page,
+        'next_cursor': next_cursor
+    }
+
 def clean_user_data(user_id):
     """Clean all X analytics data for a user when they disconnect their account"""
     try:
@@ -1376,6 +1709,14 @@ def clean_user_data(user_id):
             doc.reference.delete()
             deleted_count += 1
         
+        invalidate_x_posts_snapshot(db, user_id)
+
+        # Delete daily metric rollups
+        rollup_docs = db.collection('users').document(user_id).collection(DAILY_ROLLUP_COLLECTION).stream()
+        for doc in rollup_docs:
+            doc.reference.delete()
+            deleted_count += 1
+
         # Delete daily metrics
         daily_metrics_ref = db.collection('users').document(user_id).collection('x_analytics').document('daily_metrics')
         if daily_metrics_ref.get().exists:
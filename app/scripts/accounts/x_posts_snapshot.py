@@ -0,0 +1,154 @@
+"""
+X Posts Snapshot - per-user, in-process columnar copy of x_posts_individual
+Built once per user and shared by every X analytics endpoint; XAnalytics bumps a
+version document whenever it writes posts so every worker rebuilds on next use.
+"""
+import uuid
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+X_POSTS_SNAPSHOT_CACHE_SIZE = 128
+# Upper bound on staleness if a version bump is ever missed
+X_POSTS_SNAPSHOT_TTL_SECONDS = 15 * 60
+# users/{uid}/x_analytics/{X_POSTS_VERSION_DOC} holds the current posts version
+# (and XAnalytics' sort_keys_version)
+X_POSTS_VERSION_DOC = 'posts_version'
+
+METRIC_FIELDS = ('views', 'likes', 'retweets', 'replies', 'bookmarks')
+
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+# One build at a time per user (the dashboard requests every chart at once)
+_build_locks: Dict[str, threading.Lock] = {}
+
+
+def _count(value) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class XPostsSnapshot:
+    """
+    Columnar view of a user's X posts, ordered oldest first
+
+    Posts with a created_at_timestamp come first (the first `dated_count` rows),
+    followed by undated posts. Arrays are aligned with `posts`.
+    """
+
+    def __init__(self, posts: List[Dict], version: Optional[str] = None):
+        raw_timestamps = np.array(
+            [post.get('created_at_timestamp') or np.nan for post in posts], dtype=np.float64
+        )
+        order = np.argsort(raw_timestamps, kind='stable')  # NaN (undated) sorts last
+
+        self.version = version
+        self.built_at = time.monotonic()
+        self.posts = [posts[i] for i in order]
+        self.timestamps = raw_timestamps[order]
+        self.dated_count = int(np.count_nonzero(~np.isnan(self.timestamps)))
+
+        for field in METRIC_FIELDS:
+            setattr(self, field, np.array([_count(post.get(field)) for post in self.posts], dtype=np.int64))
+        self.engagement = self.likes + self.retweets + self.replies + self.bookmarks
+
+    def __len__(self):
+        return len(self.posts)
+
+    def window_start(self, cutoff_timestamp: float) -> int:
+        """Index of the first dated post at or after cutoff_timestamp"""
+        return int(np.searchsorted(self.timestamps[:self.dated_count], cutoff_timestamp, side='left'))
+
+    @property
+    def dated_posts(self) -> List[Dict]:
+        """Posts with a timestamp, oldest first"""
+        return self.posts[:self.dated_count]
+
+
+def _get_posts_version(db, user_id: str) -> Optional[str]:
+    doc = db.collection('users').document(user_id).collection('x_analytics').document(X_POSTS_VERSION_DOC).get()
+    return doc.to_dict().get('version') if doc.exists else None
+
+
+def _build_lock(user_id: str) -> threading.Lock:
+    with _snapshots_lock:
+        lock = _build_locks.get(user_id)
+        if lock is None:
+            lock = threading.Lock()
+            _build_locks[user_id] = lock
+        return lock
+
+
+def _cached_snapshot(user_id: str, version: Optional[str]) -> Optional[XPostsSnapshot]:
+    with _snapshots_lock:
+        snapshot = _snapshots.get(user_id)
+        if snapshot is None:
+            return None
+        if snapshot.version != version or time.monotonic() - snapshot.built_at > X_POSTS_SNAPSHOT_TTL_SECONDS:
+            del _snapshots[user_id]
+            return None
+        _snapshots.move_to_end(user_id)
+        return snapshot
+
+
+def get_x_posts_snapshot(db, user_id: str) -> XPostsSnapshot:
+    """
+    Get the columnar posts snapshot for a user, streaming x_posts_individual only
+    when there is no snapshot for the current posts version
+
+    Args:
+        db: Firestore client
+        user_id: User ID
+    """
+    version = _get_posts_version(db, user_id)
+    snapshot = _cached_snapshot(user_id, version)
+    if snapshot is not None:
+        return snapshot
+
+    with _build_lock(user_id):
+        # Another request may have built it while we waited
+        snapshot = _cached_snapshot(user_id, version)
+        if snapshot is not None:
+            return snapshot
+
+        started = time.monotonic()
+        posts_collection = db.collection('users').document(user_id).collection('x_posts_individual')
+        posts = [doc.to_dict() for doc in posts_collection.stream()]
+        snapshot = XPostsSnapshot(posts, version)
+
+        with _snapshots_lock:
+            _snapshots[user_id] = snapshot
+            _snapshots.move_to_end(user_id)
+            while len(_snapshots) > X_POSTS_SNAPSHOT_CACHE_SIZE:
+                evicted_user_id, _ = _snapshots.popitem(last=False)
+                _build_locks.pop(evicted_user_id, None)
+
+        logger.info(f"Built X posts snapshot for user {user_id}: {len(snapshot)} posts "
+                    f"in {time.monotonic() - started:.2f}s")
+        return snapshot
+
+
+def invalidate_x_posts_snapshot(db, user_id: str):
+    """
+    Mark a user's posts as changed (call after writing x_posts_individual)
+
+    Drops this process's snapshot and bumps the version document so snapshots
+    held by other workers are rebuilt on their next use.
+    """
+    with _snapshots_lock:
+        _snapshots.pop(user_id, None)
+
+    try:
+        db.collection('users').document(user_id).collection('x_analytics').document(X_POSTS_VERSION_DOC).set({
+            'version': uuid.uuid4().hex
+        }, merge=True)
+    except Exception as e:
+        logger.warning(f"Could not bump X posts version for user {user_id}: {e}")
@@ -7,6 +7,7 @@ import os
 import json
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import firebase_admin
 from firebase_admin import credentials, firestore
 from google.oauth2.credentials import Credentials
@@ -30,6 +31,17 @@ if not ENCRYPTION_KEY:
 
 cipher_suite = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else ENCRYPTION_KEY)
 
+# Reporting windows (label -> days back); rollups for all of them come from daily rows
+ANALYTICS_WINDOWS = {
+    '7days': 7,
+    '30days': 30,
+    '90days': 90,
+    '6months': 180
+}
+AGGREGATE_CHANNEL_METRICS = 'views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,subscribersGained,subscribersLost,likes,dislikes,comments,shares'
+ADDITIVE_CHANNEL_METRICS = ['views', 'estimatedMinutesWatched', 'subscribersGained', 'subscribersLost', 'likes', 'dislikes', 'comments', 'shares']
+YOUTUBE_ANALYTICS_MAX_WORKERS = 6
+
 def decrypt_token(encrypted_token):
     """Decrypt token data for use"""
     try:
@@ -157,185 +169,83 @@ class YouTubeAnalytics:
             return None
         
         try:
-            youtube_analytics = build('youtubeAnalytics', 'v2', credentials=self.credentials)
-            
             # Date ranges
             end_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            start_date_7d = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            start_date_30d = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            start_date_90d = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-            start_date_180d = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')  # 6 months
-            
-            # Basic metrics (aggregate)
-            metrics_90d = None
-            try:
-                metrics_90d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_90d,
-                    endDate=end_date,
-                    metrics='views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,subscribersGained,subscribersLost,likes,dislikes,comments,shares'
-                ).execute()
-            except Exception as e:
-                error_str = str(e).lower()
-                logger.error(f"Error fetching basic metrics: {str(e)}")
-
-                # If token is revoked, clean up and fail immediately
-                if 'invalid_grant' in error_str or 'token has been expired or revoked' in error_str:
-                    logger.error(f"Token revoked for user {self.user_id}, cleaning up data")
-                    clean_youtube_user_data(self.user_id)
-                    raise Exception("YouTube access has been revoked") from e
-            
-            # Daily metrics for time series (6 months for better timeframe support)
-            daily_metrics = None
-            try:
-                daily_metrics = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
+            start_dates = {
+                window: (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+                for window, days in ANALYTICS_WINDOWS.items()
+            }
+            start_date_180d = start_dates['6months']
+            channel_ids = f'channel=={self.channel_id}'
+
+            # Channel totals and traffic sources are fetched once at daily granularity for the
+            # longest window and rolled up locally; only top videos need a query per window
+            # (the video dimension can't be combined with day)
+            queries = {
+                'daily_channel': dict(
+                    ids=channel_ids,
                     startDate=start_date_180d,
                     endDate=end_date,
                     dimensions='day',
-                    metrics='views,estimatedMinutesWatched,subscribersGained'
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch daily metrics: {str(e)}")
-            
-            # Traffic sources for different timeframes
-            traffic_sources_7d = None
-            traffic_sources_30d = None
-            traffic_sources_90d = None
-            traffic_sources_180d = None
-            
-            # 7 days
-            try:
-                traffic_sources_7d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_7d,
-                    endDate=end_date,
-                    dimensions='insightTrafficSourceType',
-                    metrics='views',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 7-day traffic sources: {str(e)}")
-            
-            # 30 days
-            try:
-                traffic_sources_30d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_30d,
-                    endDate=end_date,
-                    dimensions='insightTrafficSourceType',
-                    metrics='views',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 30-day traffic sources: {str(e)}")
-            
-            # 90 days
-            try:
-                traffic_sources_90d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_90d,
-                    endDate=end_date,
-                    dimensions='insightTrafficSourceType',
-                    metrics='views',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 90-day traffic sources: {str(e)}")
-            
-            # 6 months (180 days)
-            try:
-                traffic_sources_180d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
+                    metrics=AGGREGATE_CHANNEL_METRICS
+                ),
+                'daily_traffic': dict(
+                    ids=channel_ids,
                     startDate=start_date_180d,
                     endDate=end_date,
-                    dimensions='insightTrafficSourceType',
-                    metrics='views',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 180-day traffic sources: {str(e)}")
-            
-            # Top videos for different timeframes
-            top_videos_7d = None
-            top_videos_30d = None
-            top_videos_90d = None
-            top_videos_180d = None
-            
-            # 7 days
-            start_date_7d = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            try:
-                top_videos_7d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_7d,
-                    endDate=end_date,
-                    dimensions='video',
-                    metrics='views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,likes,dislikes,comments,shares,subscribersGained',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 7-day top videos: {str(e)}")
-            
-            # 30 days
-            try:
-                top_videos_30d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_30d,
-                    endDate=end_date,
-                    dimensions='video',
-                    metrics='views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,likes,dislikes,comments,shares,subscribersGained',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 30-day top videos: {str(e)}")
-            
-            # 90 days
-            try:
-                top_videos_90d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_90d,
-                    endDate=end_date,
-                    dimensions='video',
-                    metrics='views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,likes,dislikes,comments,shares,subscribersGained',
-                    sort='-views',
-                    maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 90-day top videos: {str(e)}")
-            
-            # 6 months (180 days)
-            try:
-                top_videos_180d = youtube_analytics.reports().query(
-                    ids=f'channel=={self.channel_id}',
-                    startDate=start_date_180d,
+                    dimensions='day,insightTrafficSourceType',
+                    metrics='views'
+                )
+            }
+            for window, start_date in start_dates.items():
+                queries[f'top_videos_{window}'] = dict(
+                    ids=channel_ids,
+                    startDate=start_date,
                     endDate=end_date,
                     dimensions='video',
                     metrics='views,estimatedMinutesWatched,averageViewDuration,averageViewPercentage,likes,dislikes,comments,shares,subscribersGained',
                     sort='-views',
                     maxResults=10
-                ).execute()
-            except Exception as e:
-                logger.warning(f"Could not fetch 180-day top videos: {str(e)}")
-            
-            # Process the data
-            top_videos_data = {
-                '7days': top_videos_7d,
-                '30days': top_videos_30d,
-                '90days': top_videos_90d,
-                '6months': top_videos_180d
-            }
+                )
+
+            responses = self._run_report_queries(queries)
+
+            # Daily metrics for time series (6 months for better timeframe support)
+            daily_metrics = responses.get('daily_channel')
+            if isinstance(daily_metrics, Exception):
+                error_str = str(daily_metrics).lower()
+                logger.error(f"Error fetching daily channel metrics: {str(daily_metrics)}")
+
+                # If token is revoked, clean up and fail immediately
+                if 'invalid_grant' in error_str or 'token has been expired or revoked' in error_str:
+                    logger.error(f"Token revoked for user {self.user_id}, cleaning up data")
+                    clean_youtube_user_data(self.user_id)
+                    raise Exception("YouTube access has been revoked") from daily_metrics
+                daily_metrics = None
+
+            # Basic metrics (aggregate) - rolled up from the daily rows
+            metrics_90d = self._rollup_channel_metrics(daily_metrics, start_dates['90days'])
+
+            # Traffic sources for different timeframes
+            daily_traffic = responses.get('daily_traffic')
+            if isinstance(daily_traffic, Exception):
+                logger.warning(f"Could not fetch daily traffic sources: {str(daily_traffic)}")
+                daily_traffic = None
             traffic_sources_data = {
-                '7days': traffic_sources_7d,
-                '30days': traffic_sources_30d,
-                '90days': traffic_sources_90d,
-                '6months': traffic_sources_180d
+                window: self._rollup_traffic_sources(daily_traffic, start_date)
+                for window, start_date in start_dates.items()
             }
+
+            # Top videos for different timeframes
+            top_videos_data = {}
+            for window in start_dates:
+                top_videos = responses.get(f'top_videos_{window}')
+                if isinstance(top_videos, Exception):
+                    logger.warning(f"Could not fetch {window} top videos: {str(top_videos)}")
+                    top_videos = None
+                top_videos_data[window] = top_videos
+
+            # Process the data
             processed_analytics = self._process_analytics(metrics_90d, daily_metrics, traffic_sources_data, top_videos_data)
             
             # Store analytics data
@@ -350,6 +260,91 @@ class YouTubeAnalytics:
             logger.error(f"Error fetching analytics data: {str(e)}")
             return None
     
+    def _run_report_queries(self, queries):
+        """
+        Run YouTube Analytics report queries concurrently
+
+        Each worker builds its own client because the underlying httplib2
+        connection is not thread-safe.
+
+        Returns:
+            dict: query name -> API response, or the Exception it raised
+        """
+        def _execute(params):
+            client = build('youtubeAnalytics', 'v2', credentials=self.credentials, cache_discovery=False)
+            return client.reports().query(**params).execute()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(YOUTUBE_ANALYTICS_MAX_WORKERS, len(queries))) as executor:
+            futures = {executor.submit(_execute, params): name for name, params in queries.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+        logger.info(f"Ran {len(queries)} YouTube Analytics queries concurrently for user {self.user_id}")
+        return results
+
+    @staticmethod
+    def _rollup_channel_metrics(daily_metrics, start_date):
+        """
+        Sum daily channel rows from start_date onwards into a single-row report
+        shaped like a non-dimensioned reports().query() response
+
+        Averages are recombined from the additive metrics: view duration from
+        minutes watched / views, view percentage weighted by each day's views.
+        """
+        if not daily_metrics or not daily_metrics.get('rows'):
+            return None
+
+        column_index = {col['name']: idx for idx, col in enumerate(daily_metrics['columnHeaders'])}
+        totals = {name: 0 for name in ADDITIVE_CHANNEL_METRICS}
+        weighted_view_percentage = 0.0
+
+        for row in daily_metrics['rows']:
+            if row[column_index['day']] < start_date:
+                continue
+            for name in ADDITIVE_CHANNEL_METRICS:
+                totals[name] += row[column_index[name]] or 0
+            weighted_view_percentage += (row[column_index['averageViewPercentage']] or 0) * (row[column_index['views']] or 0)
+
+        views = totals['views']
+        averages = {
+            'averageViewDuration': (totals['estimatedMinutesWatched'] * 60 / views) if views else 0,
+            'averageViewPercentage': (weighted_view_percentage / views) if views else 0
+        }
+
+        metric_names = [name.strip() for name in AGGREGATE_CHANNEL_METRICS.split(',')]
+        return {
+            'columnHeaders': [{'name': name} for name in metric_names],
+            'rows': [[totals[name] if name in totals else averages[name] for name in metric_names]]
+        }
+
+    @staticmethod
+    def _rollup_traffic_sources(daily_traffic, start_date, limit=10):
+        """
+        Sum daily traffic-source views from start_date onwards and keep the top `limit`
+        sources, shaped like an insightTrafficSourceType reports().query() response
+        """
+        if not daily_traffic or not daily_traffic.get('rows'):
+            return None
+
+        column_index = {col['name']: idx for idx, col in enumerate(daily_traffic['columnHeaders'])}
+        views_by_source = {}
+        for row in daily_traffic['rows']:
+            if row[column_index['day']] < start_date:
+                continue
+            source = row[column_index['insightTrafficSourceType']]
+            views_by_source[source] = views_by_source.get(source, 0) + (row[column_index['views']] or 0)
+
+        top_sources = sorted(views_by_source.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {
+            'columnHeaders': [{'name': 'insightTrafficSourceType'}, {'name': 'views'}],
+            'rows': [[source, views] for source, views in top_sources]
+        }
+
     def _process_analytics(self, metrics_90d, daily_metrics, traffic_sources_data, top_videos_data):
         """Process raw analytics data into structured metrics"""
         now = datetime.now()
@@ -626,11 +621,16 @@ def fetch_youtube_analytics(user_id, force_refresh=False):
         logger.error(f"YouTube analytics fetch exception for user {user_id}: {str(e)}")
         return None
 
-def check_if_refresh_needed(user_id):
+def check_if_refresh_needed(user_id, max_age_hours=None):
     """
     Check if analytics data needs refresh (30-day compliance check)
     Policy: III.E.4.b - verify every 30 days
 
+    Args:
+        user_id: User ID
+        max_age_hours: Optional stricter freshness window (e.g. the daily cron skips
+                       users already refreshed within the last day)
+
     Returns:
         True if refresh needed, False if cached data is acceptable
     """
@@ -659,7 +659,16 @@ def check_if_refresh_needed(user_id):
         # Parse timestamp
         try:
             fetched_time = datetime.fromisoformat(fetched_at)
-            age_days = (datetime.now() - fetched_time).days
+            age = datetime.now() - fetched_time
+            age_days = age.days
+
+            if max_age_hours is not None:
+                age_hours = age.total_seconds() / 3600
+                if age_hours >= max_age_hours:
+                    logger.info(f"Analytics data for user {user_id} is {age_hours:.1f} hours old, refresh needed")
+                    return True
+                logger.info(f"Analytics data for user {user_id} is {age_hours:.1f} hours old, still fresh")
+                return False
 
             # Compliance: Refresh if >30 days old
             if age_days >= 30:
@@ -0,0 +1,548 @@
+"""
+Brain Dump Note Index
+Per-user inverted index over HTML-stripped note text, with precomputed tag and
+stat counts, so search, tags and stats don't read every note
+
+Index entries (per-note term frequencies) are stored in zlib-compressed shard
+documents and kept current on every note write; a stats document holds the
+counters and a version that tells each worker when to rebuild its in-memory
+inverted index.
+
+The shard count grows with the number of notes so no shard nears Firestore's
+1 MiB document limit. A full rebuild writes a new generation of shards and
+publishes it by writing the stats document, under a lease; note writes that
+land while the rebuild runs invalidate it instead of being lost.
+"""
+import re
+import json
+import math
+import html
+import zlib
+import uuid
+import hashlib
+import logging
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+logger = logging.getLogger(__name__)
+
+# users/{uid}/brain_dump_index/{stats | rebuild | shard_<generation>_NNN}
+NOTE_INDEX_COLLECTION = 'brain_dump_index'
+NOTE_INDEX_STATS_DOC = 'stats'
+NOTE_INDEX_REBUILD_DOC = 'rebuild'
+NOTE_INDEX_VERSION = 2
+NOTE_INDEX_CACHE_SIZE = 64
+
+# Shard count is max(NOTE_INDEX_MIN_SHARDS, notes / NOTE_INDEX_NOTES_PER_SHARD),
+# doubled until every compressed shard fits in NOTE_INDEX_MAX_SHARD_BYTES
+NOTE_INDEX_MIN_SHARDS = 16
+NOTE_INDEX_NOTES_PER_SHARD = 250
+NOTE_INDEX_MAX_SHARD_BYTES = 900_000
+# Rebuild writes are committed in batches of at most this many payload bytes
+NOTE_INDEX_WRITE_BATCH_BYTES = 8_000_000
+NOTE_INDEX_REBUILD_LEASE = timedelta(minutes=5)
+NOTE_INDEX_REBUILD_ATTEMPTS = 3
+# Version 1 layout: shard_00..shard_15 without a generation
+_LEGACY_SHARD_COUNT = 16
+
+# Title words count this many times towards a note's term frequencies
+TITLE_WEIGHT = 2
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+HTML_TAG_PATTERN = re.compile('<[^<]+?>')
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def strip_html(content: str) -> str:
+    """Note content without HTML tags"""
+    return HTML_TAG_PATTERN.sub('', content or '')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of plain text"""
+    return _TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _note_tags(note: Dict) -> List[str]:
+    return [str(tag) for tag in (note.get('tags') or [])]
+
+
+def build_entry(note: Dict) -> Dict:
+    """Index entry for a note: term frequencies plus the fields stats are counted from"""
+    clean_content = strip_html(note.get('content', ''))
+    tags = _note_tags(note)
+
+    terms = defaultdict(int)
+    for token in tokenize(note.get('title', '')):
+        terms[token] += TITLE_WEIGHT
+    for token in tokenize(html.unescape(clean_content)):
+        terms[token] += 1
+    for tag in tags:
+        for token in tokenize(tag):
+            terms[token] += 1
+
+    return {
+        't': dict(terms),
+        'dl': sum(terms.values()),
+        'g': tags,
+        'f': bool(note.get('is_favorite', False)),
+        's': bool(note.get('is_shared', False)),
+        'cl': len(clean_content),
+        'u': note.get('updated_at', '') or ''
+    }
+
+
+def _shard_of(note_id: str, shard_count: int) -> int:
+    return int(hashlib.sha1(note_id.encode('utf-8')).hexdigest(), 16) % shard_count
+
+
+def _shard_doc_id(generation: Optional[str], shard: int) -> str:
+    if not generation:
+        return f'shard_{shard:02d}'
+    return f'shard_{generation}_{shard:03d}'
+
+
+def _shard_doc_ids(stats: Dict) -> List[str]:
+    """Shard document IDs of the generation a stats document points at"""
+    generation = stats.get('generation')
+    shard_count = stats.get('shard_count', _LEGACY_SHARD_COUNT) if generation else _LEGACY_SHARD_COUNT
+    return [_shard_doc_id(generation, shard) for shard in range(shard_count)]
+
+
+def _encode_entries(entries: Dict[str, Dict]) -> bytes:
+    return zlib.compress(json.dumps(entries, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def _decode_entries(payload) -> Dict[str, Dict]:
+    if not payload:
+        return {}
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+def _empty_stats() -> Dict:
+    return {
+        'index_version': NOTE_INDEX_VERSION,
+        'total_notes': 0,
+        'favorites': 0,
+        'shared': 0,
+        'total_length': 0,
+        'tag_counts': {}
+    }
+
+
+def _apply_entry(stats: Dict, entry: Optional[Dict], sign: int):
+    """Add (sign=1) or remove (sign=-1) a note's entry from the stats counters"""
+    if not entry:
+        return
+    stats['total_notes'] += sign
+    stats['favorites'] += sign * int(entry['f'])
+    stats['shared'] += sign * int(entry['s'])
+    stats['total_length'] += sign * entry['cl']
+
+    tag_counts = stats['tag_counts']
+    for tag in entry['g']:
+        count = tag_counts.get(tag, 0) + sign
+        if count > 0:
+            tag_counts[tag] = count
+        else:
+            tag_counts.pop(tag, None)
+
+
+def _stats_to_doc(stats: Dict) -> Dict:
+    # Tags are stored as a list: arbitrary tag text isn't safe as a map key
+    doc = dict(stats)
+    doc['tag_counts'] = [{'tag': tag, 'count': count} for tag, count in sorted(stats['tag_counts'].items())]
+    doc['version'] = uuid.uuid4().hex
+    return doc
+
+
+def _stats_from_doc(doc_data: Dict) -> Dict:
+    stats = dict(doc_data)
+    stats['tag_counts'] = {item['tag']: item['count'] for item in doc_data.get('tag_counts', [])}
+    return stats
+
+
+def _index_ref(db, user_id: str):
+    return db.collection('users').document(user_id).collection(NOTE_INDEX_COLLECTION)
+
+
+class _InvertedIndex:
+    """In-memory inverted index built from a user's index entries"""
+
+    def __init__(self, entries: Dict[str, Dict], version: str):
+        self.version = version
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths = {}
+        self.updated_at = {}
+
+        for note_id, entry in entries.items():
+            self.doc_lengths[note_id] = entry['dl']
+            self.updated_at[note_id] = entry['u']
+            for term, frequency in entry['t'].items():
+                self.postings[term][note_id] = frequency
+
+        self.vocabulary = sorted(self.postings)
+        self.note_count = len(entries)
+        self.average_length = (sum(self.doc_lengths.values()) / self.note_count) if self.note_count else 0
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        terms = []
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            terms.append(self.vocabulary[i])
+            i += 1
+        return terms
+
+    def search(self, query: str) -> List[str]:
+        """
+        Note IDs matching every query word (as a word prefix), best BM25 score first
+
+        Ties are broken by most recently updated.
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens or not self.note_count:
+            return []
+
+        scores = None
+        for token in query_tokens:
+            token_scores = defaultdict(float)
+            for term in self._prefix_terms(token):
+                postings = self.postings[term]
+                idf = math.log(1 + (self.note_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for note_id, frequency in postings.items():
+                    length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[note_id] / (self.average_length or 1)
+                    token_scores[note_id] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {note_id: score + token_scores[note_id] for note_id, score in scores.items() if note_id in token_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda note_id: self.updated_at.get(note_id, ''), reverse=True)
+        ranked.sort(key=lambda note_id: scores[note_id], reverse=True)
+        return ranked
+
+
+def _collect_entries(db, user_id: str) -> Tuple[Dict[str, Dict], Dict]:
+    """Index entries and stats counters for all of a user's notes"""
+    notes_ref = db.collection('users').document(user_id).collection('brain_dump')
+    entries = {}
+    stats = _empty_stats()
+
+    for doc in notes_ref.stream():
+        entry = build_entry(doc.to_dict())
+        entries[doc.id] = entry
+        _apply_entry(stats, entry, 1)
+
+    return entries, stats
+
+
+def _encode_shards(entries: Dict[str, Dict]) -> List[Dict]:
+    """
+    Split entries into shard documents whose compressed payloads each fit in a document
+
+    Raises:
+        ValueError: If a single note's entry is too large for a shard
+    """
+    shard_count = max(NOTE_INDEX_MIN_SHARDS, math.ceil(len(entries) / NOTE_INDEX_NOTES_PER_SHARD))
+    while True:
+        shards = [dict() for _ in range(shard_count)]
+        for note_id, entry in entries.items():
+            shards[_shard_of(note_id, shard_count)][note_id] = entry
+
+        shard_docs = [{'payload': _encode_entries(shard), 'count': len(shard)} for shard in shards]
+        if max(len(doc['payload']) for doc in shard_docs) <= NOTE_INDEX_MAX_SHARD_BYTES:
+            return shard_docs
+        if shard_count >= max(len(entries), 1):
+            raise ValueError("Note index entry exceeds the shard size limit")
+        shard_count *= 2
+
+
+def _commit_in_chunks(db, writes: List[Tuple[str, object, Optional[Dict]]]):
+    """Apply ('set', ref, data) / ('delete', ref, None) writes in size-bounded batches"""
+    batch = db.batch()
+    pending = 0
+    pending_bytes = 0
+
+    for operation, ref, data in writes:
+        size = len(data['payload']) if data and 'payload' in data else 0
+        if pending and (pending >= 500 or pending_bytes + size > NOTE_INDEX_WRITE_BATCH_BYTES):
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+            pending_bytes = 0
+
+        if operation == 'set':
+            batch.set(ref, data)
+        else:
+            batch.delete(ref)
+        pending += 1
+        pending_bytes += size
+
+    if pending:
+        batch.commit()
+
+
+@firestore.transactional
+def _claim_rebuild(transaction, index_ref, lease_id: str) -> bool:
+    """Take (or renew) the user's rebuild lease and reset its change counter"""
+    rebuild_ref = index_ref.document(NOTE_INDEX_REBUILD_DOC)
+    rebuild_doc = rebuild_ref.get(transaction=transaction)
+    now = datetime.now(timezone.utc)
+
+    if rebuild_doc.exists:
+        rebuild = rebuild_doc.to_dict()
+        expires_at = rebuild.get('expires_at')
+        if rebuild.get('lease_id') not in (None, lease_id) and expires_at and expires_at > now:
+            return False
+
+    transaction.set(rebuild_ref, {
+        'lease_id': lease_id,
+        'expires_at': now + NOTE_INDEX_REBUILD_LEASE,
+        'changes': 0
+    })
+    return True
+
+
+@firestore.transactional
+def _publish_rebuild(transaction, index_ref, lease_id: str, stats_doc: Dict) -> Tuple[bool, Optional[Dict]]:
+    """
+    Point the stats document at a rebuilt generation
+
+    Only succeeds if this rebuild still holds the lease and no note was written
+    since it was claimed.
+
+    Returns:
+        (published, previous stats document data)
+    """
+    rebuild_ref = index_ref.document(NOTE_INDEX_REBUILD_DOC)
+    stats_ref = index_ref.document(NOTE_INDEX_STATS_DOC)
+    rebuild_doc = rebuild_ref.get(transaction=transaction)
+    previous_doc = stats_ref.get(transaction=transaction)
+
+    rebuild = rebuild_doc.to_dict() if rebuild_doc.exists else {}
+    if rebuild.get('lease_id') != lease_id or rebuild.get('changes', 0):
+        return False, None
+
+    transaction.set(stats_ref, stats_doc)
+    transaction.delete(rebuild_ref)
+    return True, previous_doc.to_dict() if previous_doc.exists else None
+
+
+def _rebuild(db, user_id: str) -> Tuple[Dict, Dict[str, Dict], bool]:
+    """
+    Build a user's index from all their notes and publish it if possible
+
+    Returns:
+        (stats, entries, published) - when another worker holds the rebuild
+        lease, or notes kept changing, the index is built but not stored
+    """
+    index_ref = _index_ref(db, user_id)
+    lease_id = uuid.uuid4().hex
+    entries, stats = {}, _empty_stats()
+
+    for attempt in range(1, NOTE_INDEX_REBUILD_ATTEMPTS + 1):
+        if not _claim_rebuild(db.transaction(), index_ref, lease_id):
+            logger.info(f"Brain Dump index rebuild for user {user_id} already in progress")
+            entries, stats = _collect_entries(db, user_id)
+            return stats, entries, False
+
+        entries, stats = _collect_entries(db, user_id)
+        shard_docs = _encode_shards(entries)
+        generation = uuid.uuid4().hex[:8]
+        shard_ids = [_shard_doc_id(generation, shard) for shard in range(len(shard_docs))]
+
+        # The new generation stays invisible until the stats document points at it
+        _commit_in_chunks(db, [
+            ('set', index_ref.document(shard_id), shard_doc)
+            for shard_id, shard_doc in zip(shard_ids, shard_docs)
+        ])
+
+        stats['generation'] = generation
+        stats['shard_count'] = len(shard_docs)
+        stats_doc = _stats_to_doc(stats)
+        published, previous = _publish_rebuild(db.transaction(), index_ref, lease_id, stats_doc)
+
+        stale_ids = shard_ids
+        if published:
+            stale_ids = _shard_doc_ids(previous) if previous else []
+        try:
+            _commit_in_chunks(db, [('delete', index_ref.document(shard_id), None) for shard_id in stale_ids])
+        except Exception as e:
+            logger.warning(f"Could not delete stale Brain Dump index shards for user {user_id}: {e}")
+
+        if published:
+            logger.info(f"Rebuilt Brain Dump index for user {user_id}: {stats['total_notes']} notes "
+                        f"in {len(shard_docs)} shards")
+            stats['version'] = stats_doc['version']
+            return stats, entries, True
+
+        logger.info(f"Notes changed during Brain Dump index rebuild for user {user_id} (attempt {attempt})")
+
+    return stats, entries, False
+
+
+def rebuild_note_index(db, user_id: str) -> Dict:
+    """
+    Build a user's index from all their notes
+
+    Only needed once per user (or after NOTE_INDEX_VERSION changes); afterwards
+    index_note_changes keeps it current.
+
+    Returns:
+        The stats counters
+    """
+    stats, _, _ = _rebuild(db, user_id)
+    return stats
+
+
+def _load_stats(db, user_id: str) -> Optional[Dict]:
+    stats_doc = _index_ref(db, user_id).document(NOTE_INDEX_STATS_DOC).get()
+    if stats_doc.exists and stats_doc.to_dict().get('index_version') == NOTE_INDEX_VERSION:
+        return _stats_from_doc(stats_doc.to_dict())
+    return None
+
+
+def get_note_index_stats(db, user_id: str) -> Dict:
+    """Precomputed note counters (total, favorites, shared, total_length, tag_counts)"""
+    return _load_stats(db, user_id) or rebuild_note_index(db, user_id)
+
+
+def _cache_index(user_id: str, index: '_InvertedIndex'):
+    with _indexes_lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > NOTE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+
+def _get_inverted_index(db, user_id: str) -> _InvertedIndex:
+    # A rebuild can replace the generation between reading stats and its shards
+    for _ in range(2):
+        stats = _load_stats(db, user_id)
+        if stats is None:
+            break
+
+        with _indexes_lock:
+            index = _indexes.get(user_id)
+            if index is not None and index.version == stats['version']:
+                _indexes.move_to_end(user_id)
+                return index
+
+        index_ref = _index_ref(db, user_id)
+        entries = {}
+        missing = False
+        for doc in db.get_all([index_ref.document(shard_id) for shard_id in _shard_doc_ids(stats)]):
+            if not doc.exists:
+                missing = True
+                break
+            entries.update(_decode_entries(doc.to_dict().get('payload')))
+        if missing:
+            continue
+
+        index = _InvertedIndex(entries, stats['version'])
+        _cache_index(user_id, index)
+        return index
+
+    stats, entries, published = _rebuild(db, user_id)
+    index = _InvertedIndex(entries, stats.get('version'))
+    if published:
+        _cache_index(user_id, index)
+    return index
+
+
+def search_note_index(db, user_id: str, query: str) -> List[str]:
+    """
+    Search a user's notes by title, content and tags
+
+    Every word in the query must match the start of a word in the note; results
+    are ranked with BM25.
+
+    Returns:
+        Matching note IDs, best match first
+    """
+    return _get_inverted_index(db, user_id).search(query)
+
+
+@firestore.transactional
+def _apply_note_changes(transaction, index_ref, changes: Dict[str, Optional[Dict]]):
+    stats_ref = index_ref.document(NOTE_INDEX_STATS_DOC)
+    stats_doc = stats_ref.get(transaction=transaction)
+    if not stats_doc.exists or stats_doc.to_dict().get('index_version') != NOTE_INDEX_VERSION:
+        # No index yet: the first search builds it from every note. A rebuild in
+        # progress may have read these notes already, so make it start over.
+        rebuild_ref = index_ref.document(NOTE_INDEX_REBUILD_DOC)
+        if rebuild_ref.get(transaction=transaction).exists:
+            transaction.update(rebuild_ref, {'changes': firestore.Increment(1)})
+        return
+
+    stats = _stats_from_doc(stats_doc.to_dict())
+    generation = stats.get('generation')
+    shard_count = stats.get('shard_count', _LEGACY_SHARD_COUNT)
+
+    by_shard = defaultdict(dict)
+    for note_id, note in changes.items():
+        by_shard[_shard_doc_id(generation, _shard_of(note_id, shard_count))][note_id] = note
+
+    shard_docs = {
+        shard_id: index_ref.document(shard_id).get(transaction=transaction)
+        for shard_id in by_shard
+    }
+
+    for shard_id, shard_changes in by_shard.items():
+        shard_doc = shard_docs[shard_id]
+        entries = _decode_entries(shard_doc.to_dict().get('payload')) if shard_doc.exists else {}
+        for note_id, note in shard_changes.items():
+            _apply_entry(stats, entries.pop(note_id, None), -1)
+            if note is not None:
+                entry = build_entry(note)
+                entries[note_id] = entry
+                _apply_entry(stats, entry, 1)
+
+        payload = _encode_entries(entries)
+        if len(payload) > NOTE_INDEX_MAX_SHARD_BYTES:
+            # Caller drops the index; the rebuild picks a larger shard count
+            raise ValueError(f"Note index {shard_id} outgrew {NOTE_INDEX_MAX_SHARD_BYTES} bytes")
+        transaction.set(index_ref.document(shard_id), {'payload': payload, 'count': len(entries)})
+
+    transaction.set(stats_ref, _stats_to_doc(stats))
+
+
+def index_note_changes(db, user_id: str, changes: Dict[str, Optional[Dict]]):
+    """
+    Update a user's index after notes were written
+
+    Args:
+        db: Firestore client
+        user_id: Note owner
+        changes: Note ID -> the note as now stored, or None if it was deleted
+    """
+    if not changes:
+        return
+    index_ref = _index_ref(db, user_id)
+    try:
+        _apply_note_changes(db.transaction(), index_ref, changes)
+    except Exception as e:
+        # Rebuilt from scratch on next use rather than left out of date
+        logger.error(f"Error updating Brain Dump index for user {user_id}: {e}")
+        try:
+            # Kept (not deleted) so the rebuild can find and remove the old shards
+            index_ref.document(NOTE_INDEX_STATS_DOC).update({'index_version': None})
+        except Exception:
+            pass
+        try:
+            index_ref.document(NOTE_INDEX_REBUILD_DOC).update({'changes': firestore.Increment(1)})
+        except Exception:
+            pass
@@ -4,6 +4,7 @@ Analyzes competitor channels and generates insights
 """
 import logging
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 import re
 from typing import List, Dict, Optional
 from datetime import datetime
@@ -15,14 +16,8 @@ from app.system.ai_provider.ai_provider import get_ai_provider
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
 logger = logging.getLogger(__name__)
 
 class CompetitorAnalyzer:
@@ -7,6 +7,7 @@ import re
 import requests
 import logging
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 from typing import Dict, Any
 from datetime import datetime
 from app.system.ai_provider.ai_provider import get_ai_provider
@@ -17,14 +18,8 @@ from app.system.credits.credits_manager import CreditsManager
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
 logger = logging.getLogger(__name__)
 
 class VideoDeepDiveAnalyzer:
@@ -4,6 +4,7 @@ Analyzes user's last 25 X posts and generates personalized content suggestions
 """
 import logging
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 from typing import Dict, List, Optional
 from datetime import datetime
 from app.system.ai_provider.ai_provider import get_ai_provider
@@ -16,57 +17,8 @@ logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str, section: str = None) -> str:
-    """Load a prompt from text file, optionally extracting a specific section"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        logger.info(f"Loading prompt from: {prompt_path}")
-
-        if not prompt_path.exists():
-            logger.error(f"Prompt file not found: {prompt_path}")
-            raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
-
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        logger.info(f"Loaded prompt file, length: {len(content)} chars")
-
-        # If no section specified, return full content
-        if not section:
-            return content.strip()
-
-        # Extract specific section
-        section_marker = f"############# {section} #############"
-        if section_marker not in content:
-            logger.error(f"Section '{section}' not found in {filename}")
-            logger.error(f"Available content preview: {content[:200]}")
-            raise ValueError(f"Section '{section}' not found")
-
-        # Split content by the section marker pattern
-        # The content after "############# SECTION_NAME #############" is in the NEXT part
-        parts = content.split("#############")
-        logger.info(f"Split into {len(parts)} parts")
-
-        for i, part in enumerate(parts):
-            part_preview = part.strip()[:50] if part.strip() else "(empty)"
-            logger.info(f"Part {i}: {part_preview}")
-
-            if section in part:
-                logger.info(f"Found section '{section}' in part {i}")
-
-                # The actual content is in the NEXT part
-                if i + 1 < len(parts):
-                    next_part = parts[i + 1].strip()
-                    logger.info(f"Getting content from next part (part {i+1}), length: {len(next_part)} chars")
-                    logger.info(f"Content preview: {next_part[:100]}")
-                    return next_part
-                else:
-                    logger.error(f"Section '{section}' found but no content part after it")
-                    return ""
-
-        raise ValueError(f"Section '{section}' not found")
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}, section {section}: {e}")
-        raise
+    """Load a prompt from the prompt registry, optionally extracting a specific section"""
+    return get_prompt(PROMPTS_DIR, filename, section)
 
 
 class XContentSuggestions:
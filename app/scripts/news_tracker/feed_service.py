@@ -1,11 +1,15 @@
 """
 News Radar Feed Service - Personalized news feeds and category management
 """
+import os
+import re
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 from app.system.services.firebase_service import db
+from app.utils.cursor import encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +51,47 @@ CATEGORY_CONFIG = {
 # List of category names
 NEWS_CATEGORIES = list(CATEGORY_CONFIG.keys())
 
+# Feed score = feed_score_bucket (importance * 10, stored at ingest) + recency bonus (0-50)
+FEED_SCORE_BUCKET_MULTIPLIER = 10
+MAX_RECENCY_BONUS = 50
+
+# Documents read per query round trip when ranking the personalized feed
+FEED_SCAN_BATCH_SIZE = 50
+
+# Articles are kept for 72 hours after publication
+ARTICLE_RETENTION_HOURS = 72
+
+# Cleanup deletes in WriteBatch-sized pages; the per-run budget keeps a large
+# backlog from stalling the cron (the next run's query resumes where this stopped)
+CLEANUP_BATCH_SIZE = 500
+CLEANUP_MAX_BATCHES = 20
+
+# Set when a Firestore TTL policy on news_articles.expires_at handles expiry
+TTL_POLICY_ENABLED = os.environ.get('NEWS_ARTICLES_TTL_POLICY', '').lower() in ('1', 'true', 'yes')
+
+# Materialized per-category feeds, rebuilt by the ingestion cron
+SNAPSHOT_COLLECTION = 'news_feed_snapshots'
+SNAPSHOT_SIZE = 100  # Top articles kept per category, both by score and by recency
+SNAPSHOT_MAX_AGE = timedelta(hours=3)  # Older snapshots fall back to live queries
+
+# Article fields kept in snapshots (what the feed UI and scoring need)
+SNAPSHOT_FIELDS = [
+    'id', 'title', 'link', 'published', 'published_at', 'source', 'image_url',
+    'category', 'importance_score', 'summary', 'created_at', 'feed_score_bucket'
+]
+
+def parse_published_at(published_str: str) -> Optional[datetime]:
+    """Parse an article's ISO published string into an aware datetime (None if unparseable)"""
+    if not published_str:
+        return None
+    try:
+        published = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
 class FeedService:
     """Handles personalized news feeds and user preferences"""
 
@@ -144,91 +189,329 @@ class FeedService:
             logger.error(f"Error calculating feed score: {e}")
             return 50  # Return default score on error
 
-    def get_personalized_feed(self, user_id: str, limit: int = 50) -> List[Dict]:
+    def calculate_feed_score_bucket(self, importance_score) -> float:
         """
-        Get personalized 'For You' feed based on user's category subscriptions
+        Static part of the feed score, stored on each article at ingest time
+
+        Indexed queries order by this bucket; the recency bonus added on top
+        is bounded by MAX_RECENCY_BONUS, which lets ranking stop early.
+        """
+        try:
+            importance = float(importance_score) if importance_score is not None else 5
+        except (TypeError, ValueError):
+            importance = 5
+        bucket = importance * FEED_SCORE_BUCKET_MULTIPLIER
+        return int(bucket) if float(bucket).is_integer() else bucket
+
+    def _article_from_doc(self, doc) -> Dict:
+        """Convert a news_articles snapshot into the API article dict"""
+        article = doc.to_dict()
+        article['id'] = doc.id
+        article['feed_score'] = self.calculate_feed_score(article)
+
+        published_at = article.get('published_at')
+        if isinstance(published_at, datetime):
+            article['published_at'] = published_at.isoformat()
+
+        return article
+
+    def _rank_key(self, article: Dict) -> Tuple[float, float, str]:
+        """Total order for the personalized feed: score, then newest, then id"""
+        published = parse_published_at(article.get('published_at') or article.get('published', ''))
+        published_ts = published.timestamp() if published else 0.0
+        return (article['feed_score'], published_ts, article['id'])
+
+    def _category_query(self, categories: Optional[List[str]]):
+        """Base news_articles query, restricted to the given categories when needed"""
+        query = self.db.collection('news_articles')
+
+        if categories is not None and set(categories) != set(NEWS_CATEGORIES):
+            if len(categories) == 1:
+                query = query.where(filter=FieldFilter('category', '==', categories[0]))
+            else:
+                query = query.where(filter=FieldFilter('category', 'in', list(categories)[:30]))
+
+        return query
+
+    def _ranked_page(self, categories: Optional[List[str]], limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Rank articles by feed score straight from Firestore
+
+        Scans articles ordered by (feed_score_bucket DESC, published_at DESC) and
+        stops as soon as no unread article can outrank the current page, so reads
+        scale with the page size rather than the collection size.
+
+        Requires composite indexes (see firestore.indexes.json):
+        category ASC + feed_score_bucket DESC + published_at DESC, and
+        feed_score_bucket DESC + published_at DESC.
+        """
+        after = decode_cursor(cursor)
+        after_key = None
+        query = self._category_query(categories)
+
+        if after:
+            after_key = (after.get('s', 0), after.get('p', 0.0), after.get('id', ''))
+            # Articles in buckets above the cursor score always rank before it
+            query = query.where(filter=FieldFilter('feed_score_bucket', '<=', after_key[0]))
+
+        query = query.order_by('feed_score_bucket', direction=firestore.Query.DESCENDING) \
+            .order_by('published_at', direction=firestore.Query.DESCENDING)
+
+        ranked = []
+        last_doc = None
+        exhausted = False
+        docs_read = 0
+
+        while True:
+            batch_query = query.limit(FEED_SCAN_BATCH_SIZE)
+            if last_doc is not None:
+                batch_query = batch_query.start_after(last_doc)
+
+            docs = list(batch_query.stream())
+            docs_read += len(docs)
+
+            for doc in docs:
+                article = self._article_from_doc(doc)
+                key = self._rank_key(article)
+                if after_key is not None and key >= after_key:
+                    continue
+                ranked.append((key, article))
+
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            del ranked[limit + 1:]
+
+            if len(docs) < FEED_SCAN_BATCH_SIZE:
+                exhausted = True
+                break
+
+            last_doc = docs[-1]
+            # Every unread article scores at most its bucket + MAX_RECENCY_BONUS
+            best_remaining = (last_doc.get('feed_score_bucket') or 0) + MAX_RECENCY_BONUS
+            if len(ranked) > limit and ranked[limit][0][0] > best_remaining:
+                break
+
+        page = [article for _, article in ranked[:limit]]
+        next_cursor = None
+        if page and (len(ranked) > limit or not exhausted):
+            last_key = ranked[len(page) - 1][0]
+            next_cursor = encode_cursor({'s': last_key[0], 'p': last_key[1], 'id': last_key[2]})
+
+        logger.debug(f"Ranked feed: read {docs_read} articles for {len(page)} results")
+        return {'articles': page, 'next_cursor': next_cursor}
+
+    def get_personalized_feed_page(self, user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of the personalized 'For You' feed
         Sorted by feed score (importance + recency)
 
-        Note: Fetches ALL articles and filters in-memory (no Firestore indexes needed)
+        First pages are served from the per-category snapshots built by the
+        ingestion cron; later pages (or missing/stale snapshots) fall back to
+        the indexed ranking query.
+
+        Returns:
+            Dict with 'articles' and 'next_cursor' (None on the last page)
         """
         try:
-            # Get user's subscribed categories
             subscriptions = self.get_user_subscriptions(user_id)
+            if not subscriptions:
+                return {'articles': [], 'next_cursor': None}
 
-            # Fetch ALL articles from Firestore (no indexes needed)
-            articles_ref = self.db.collection('news_articles')
-            all_docs = articles_ref.stream()
+            if not cursor and limit <= SNAPSHOT_SIZE:
+                # Only known categories have snapshots
+                known = [category for category in subscriptions if category in CATEGORY_CONFIG]
+                snapshots = self._load_feed_snapshots(known) if known else None
+                if snapshots is not None:
+                    return self._personalized_page_from_snapshots(snapshots, limit)
 
-            all_articles = []
-            for doc in all_docs:
-                article = doc.to_dict()
+            return self._ranked_page(subscriptions, limit, cursor)
 
-                # Filter by subscribed categories in-memory
-                if article.get('category') in subscriptions:
-                    article['id'] = doc.id
-                    article['feed_score'] = self.calculate_feed_score(article)
-                    all_articles.append(article)
+        except Exception as e:
+            logger.error(f"Error getting personalized feed: {e}", exc_info=True)
+            return {'articles': [], 'next_cursor': None}
+
+    def get_personalized_feed(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """
+        Get personalized 'For You' feed based on user's category subscriptions
+        Sorted by feed score (importance + recency)
+        """
+        return self.get_personalized_feed_page(user_id, limit)['articles']
+
+    def _recent_page(self, category: str, limit: int, cursor: Optional[str] = None) -> Dict:
+        """
+        Newest-first page of a category straight from Firestore
+
+        Requires composite index: category ASC + published_at DESC
+        """
+        query = self.db.collection('news_articles') \
+            .where(filter=FieldFilter('category', '==', category)) \
+            .order_by('published_at', direction=firestore.Query.DESCENDING)
 
-            # Sort by feed score (highest first) in-memory
-            all_articles.sort(key=lambda x: x['feed_score'], reverse=True)
+        after = decode_cursor(cursor)
+        if after and after.get('id'):
+            last_doc = self.db.collection('news_articles').document(after['id']).get()
+            if last_doc.exists:
+                query = query.start_after(last_doc)
 
-            # Return top articles
-            return all_articles[:limit]
+        # Read one extra document to know whether another page exists
+        docs = list(query.limit(limit + 1).stream())
+        articles = [self._article_from_doc(doc) for doc in docs[:limit]]
+
+        next_cursor = None
+        if len(docs) > limit and articles:
+            next_cursor = encode_cursor({'id': articles[-1]['id']})
+
+        logger.info(f"Category feed for '{category}': read {len(docs)} articles, returning {len(articles)}")
+        return {'articles': articles, 'next_cursor': next_cursor}
+
+    def get_category_feed_page(self, category: str, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of articles for a specific category
+        Sorted by published date (newest first)
+
+        The first page comes from the category snapshot when it is fresh;
+        later pages use the indexed query.
+
+        Returns:
+            Dict with 'articles' and 'next_cursor' (None on the last page)
+        """
+        try:
+            if not cursor and limit <= SNAPSHOT_SIZE and category in CATEGORY_CONFIG:
+                snapshots = self._load_feed_snapshots([category])
+                if snapshots is not None:
+                    return self._category_page_from_snapshot(snapshots[category], limit)
+
+            return self._recent_page(category, limit, cursor)
 
         except Exception as e:
-            logger.error(f"Error getting personalized feed: {e}", exc_info=True)
-            return []
+            logger.error(f"Error getting category feed: {e}", exc_info=True)
+            return {'articles': [], 'next_cursor': None}
 
     def get_category_feed(self, category: str, limit: int = 50) -> List[Dict]:
         """
         Get articles for a specific category
         Sorted by published date (newest first)
+        """
+        return self.get_category_feed_page(category, limit)['articles']
+
+    def _snapshot_doc_id(self, category: str) -> str:
+        """Firestore-safe document ID for a category snapshot"""
+        return re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-')
 
-        Note: Fetches ALL articles and filters in-memory (no Firestore indexes needed)
+    def _load_feed_snapshots(self, categories: List[str]) -> Optional[Dict[str, Dict]]:
+        """
+        Load snapshots for the given categories in a single batched read
+
+        Returns None if any snapshot is missing or older than SNAPSHOT_MAX_AGE,
+        so callers fall back to live queries.
         """
         try:
-            articles_ref = self.db.collection('news_articles')
-            all_docs = articles_ref.stream()
+            refs = [
+                self.db.collection(SNAPSHOT_COLLECTION).document(self._snapshot_doc_id(category))
+                for category in categories
+            ]
+            docs = {doc.id: doc for doc in self.db.get_all(refs)}
+
+            cutoff = datetime.now(timezone.utc) - SNAPSHOT_MAX_AGE
+            snapshots = {}
+            for category in categories:
+                doc = docs.get(self._snapshot_doc_id(category))
+                if doc is None or not doc.exists:
+                    return None
+
+                snapshot = doc.to_dict()
+                built_at = parse_published_at(snapshot.get('built_at', ''))
+                if not built_at or built_at < cutoff:
+                    return None
+
+                snapshots[category] = snapshot
+
+            return snapshots
+
+        except Exception as e:
+            logger.warning(f"Could not load feed snapshots, using live queries: {e}")
+            return None
 
-            articles = []
-            total_checked = 0
-            category_counts = {}
+    def _personalized_page_from_snapshots(self, snapshots: Dict[str, Dict], limit: int) -> Dict:
+        """Merge subscribed category snapshots and rank them by current feed score"""
+        ranked = []
+        truncated = False
 
-            for doc in all_docs:
-                article = doc.to_dict()
-                total_checked += 1
+        for snapshot in snapshots.values():
+            truncated = truncated or snapshot.get('truncated', False)
+            for article in snapshot.get('articles', []):
+                article = dict(article)
+                article['feed_score'] = self.calculate_feed_score(article)
+                ranked.append((self._rank_key(article), article))
 
-                # Track all categories seen
-                article_category = article.get('category', 'Unknown')
-                category_counts[article_category] = category_counts.get(article_category, 0) + 1
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        page = [article for _, article in ranked[:limit]]
 
-                # Filter by category in-memory
-                if article_category == category:
-                    article['id'] = doc.id
-                    article['feed_score'] = self.calculate_feed_score(article)
-                    articles.append(article)
+        next_cursor = None
+        if page and (len(ranked) > limit or truncated):
+            last_key = ranked[len(page) - 1][0]
+            next_cursor = encode_cursor({'s': last_key[0], 'p': last_key[1], 'id': last_key[2]})
 
-            logger.info(f"Category feed for '{category}': Checked {total_checked} articles, found {len(articles)} matches")
-            logger.info(f"Category distribution: {category_counts}")
+        return {'articles': page, 'next_cursor': next_cursor}
 
-            # Sort by published date (newest first)
-            def get_published_timestamp(article):
-                published_str = article.get('published', '') or article.get('created_at', '')
-                if not published_str:
-                    return 0
-                try:
-                    dt = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
-                    return dt.timestamp()
-                except:
-                    return 0
+    def _category_page_from_snapshot(self, snapshot: Dict, limit: int) -> Dict:
+        """Newest-first page of a single category snapshot"""
+        articles = []
+        for article in snapshot.get('articles', []):
+            article = dict(article)
+            article['feed_score'] = self.calculate_feed_score(article)
+            articles.append(article)
 
-            articles.sort(key=get_published_timestamp, reverse=True)
+        articles.sort(key=lambda a: self._rank_key(a)[1], reverse=True)
+        page = articles[:limit]
 
-            return articles[:limit]
+        next_cursor = None
+        if page and (len(articles) > limit or snapshot.get('truncated', False)):
+            next_cursor = encode_cursor({'id': page[-1]['id']})
+
+        return {'articles': page, 'next_cursor': next_cursor}
+
+    def build_feed_snapshots(self) -> Dict:
+        """
+        Rebuild the compact ranked snapshot of every category
+
+        Each snapshot holds the category's top SNAPSHOT_SIZE articles by feed
+        score plus its SNAPSHOT_SIZE newest, which covers the first page of both
+        the personalized and the category feed.
+        Called by the ingestion cron at the end of each run.
+        """
+        try:
+            built_at = datetime.now(timezone.utc).isoformat()
+            batch = self.db.batch()
+            stats = {'categories': 0, 'articles': 0}
+
+            for category in NEWS_CATEGORIES:
+                by_score = self._ranked_page([category], SNAPSHOT_SIZE)
+                by_recency = self._recent_page(category, SNAPSHOT_SIZE)
+
+                articles = {}
+                for article in by_score['articles'] + by_recency['articles']:
+                    articles[article['id']] = {
+                        field: article.get(field) for field in SNAPSHOT_FIELDS if field in article
+                    }
+
+                doc_ref = self.db.collection(SNAPSHOT_COLLECTION).document(self._snapshot_doc_id(category))
+                batch.set(doc_ref, {
+                    'category': category,
+                    'articles': list(articles.values()),
+                    'truncated': bool(by_score['next_cursor'] or by_recency['next_cursor']),
+                    'built_at': built_at,
+                })
+
+                stats['categories'] += 1
+                stats['articles'] += len(articles)
+
+            batch.commit()
+            logger.info(f"Built feed snapshots: {stats}")
+            return stats
 
         except Exception as e:
-            logger.error(f"Error getting category feed: {e}", exc_info=True)
-            return []
+            logger.error(f"Error building feed snapshots: {e}", exc_info=True)
+            return {'error': str(e)}
 
     def get_all_categories(self) -> List[str]:
         """Get list of all available categories"""
@@ -256,57 +539,98 @@ class FeedService:
                 })
         return feeds
 
-    def cleanup_old_articles(self, hours: int = 72) -> Dict:
+    def _delete_matching(self, query, budget: int) -> Tuple[int, int, bool]:
+        """
+        Delete documents matched by `query` in batches of CLEANUP_BATCH_SIZE
+
+        Returns:
+            (deleted, batches used, has_more) - has_more is True when the
+            batch budget ran out before the query was exhausted
+        """
+        deleted = 0
+        batches = 0
+
+        while batches < budget:
+            docs = list(query.select(['article_hash']).limit(CLEANUP_BATCH_SIZE).stream())
+            if not docs:
+                return deleted, batches, False
+
+            batch = self.db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            batch.commit()
+
+            deleted += len(docs)
+            batches += 1
+
+            if len(docs) < CLEANUP_BATCH_SIZE:
+                return deleted, batches, False
+
+        return deleted, batches, True
+
+    def cleanup_old_articles(self, hours: int = ARTICLE_RETENTION_HOURS, max_batches: int = CLEANUP_MAX_BATCHES) -> Dict:
         """
         Delete articles older than specified hours (default 72 hours)
         Returns stats about deletion
-        """
-        try:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-            logger.info(f"Cleaning up articles older than {hours} hours (cutoff: {cutoff_time})")
 
-            articles_ref = self.db.collection('news_articles')
-            all_docs = articles_ref.stream()
+        Driven by indexed range queries, so cost tracks the number of expired
+        articles rather than the collection size:
+        - published_at < cutoff (articles are expired by publication date)
+        - created_at < cutoff (legacy articles without published_at; ingest
+          time is never before publication, so this is equally safe)
 
-            deleted_count = 0
-            kept_count = 0
+        Work is capped at max_batches deletes of CLEANUP_BATCH_SIZE per run.
+        Progress lives in the data itself - the next run's query simply picks
+        up the remaining expired articles - and a summary is recorded in
+        news_ingestion_state/cleanup.
 
-            for doc in all_docs:
-                article = doc.to_dict()
-                # Use published date (when article was actually published) not created_at (when we ingested it)
-                published_str = article.get('published', '') or article.get('created_at', '')
+        When NEWS_ARTICLES_TTL_POLICY is set, expiry is left to the Firestore
+        TTL policy on expires_at and this is a no-op.
+        """
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-                if not published_str:
-                    # Keep articles without timestamp (shouldn't happen)
-                    kept_count += 1
-                    continue
+        if TTL_POLICY_ENABLED:
+            logger.info("Skipping manual cleanup: Firestore TTL policy on expires_at is enabled")
+            return {'deleted': 0, 'mode': 'ttl', 'cutoff_hours': hours, 'cutoff_time': cutoff_time.isoformat()}
 
-                try:
-                    published_date = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
+        try:
+            logger.info(f"Cleaning up articles older than {hours} hours (cutoff: {cutoff_time})")
 
-                    if published_date < cutoff_time:
-                        # Delete old article
-                        doc.reference.delete()
-                        deleted_count += 1
-                        logger.debug(f"Deleted old article: {article.get('title', 'Unknown')[:50]}")
-                    else:
-                        kept_count += 1
+            articles_ref = self.db.collection('news_articles')
 
-                except Exception as e:
-                    logger.error(f"Error parsing date for article {doc.id}: {e}")
-                    kept_count += 1
-                    continue
+            deleted, batches, has_more = self._delete_matching(
+                articles_ref.where(filter=FieldFilter('published_at', '<', cutoff_time)),
+                max_batches
+            )
+
+            if not has_more:
+                legacy_deleted, legacy_batches, has_more = self._delete_matching(
+                    articles_ref.where(filter=FieldFilter('created_at', '<', cutoff_time.isoformat())),
+                    max_batches - batches
+                )
+                deleted += legacy_deleted
+                batches += legacy_batches
 
             stats = {
-                'deleted': deleted_count,
-                'kept': kept_count,
+                'deleted': deleted,
+                'batches': batches,
+                'has_more': has_more,
+                'mode': 'query',
                 'cutoff_hours': hours,
                 'cutoff_time': cutoff_time.isoformat()
             }
 
+            self.db.collection('news_ingestion_state').document('cleanup').set({
+                **stats,
+                'last_run_at': datetime.now(timezone.utc).isoformat()
+            })
+
+            if has_more:
+                logger.info(f"Cleanup budget reached after {deleted} deletes; the next run continues")
+
             logger.info(f"Cleanup complete: {stats}")
             return stats
 
         except Exception as e:
             logger.error(f"Error cleaning up old articles: {e}", exc_info=True)
-            return {'error': str(e), 'deleted': 0, 'kept': 0}
+            return {'error': str(e), 'deleted': 0}
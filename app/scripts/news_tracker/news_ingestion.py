@@ -7,15 +7,19 @@ import hashlib
 import logging
 import feedparser
 import time
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional
+from app.utils.prompt_registry import get_prompt, get_prompt_template
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from bs4 import BeautifulSoup
 from firebase_admin import firestore
 from app.system.services.firebase_service import db
 from app.system.ai_provider.ai_provider import get_ai_provider
 from app.scripts.news_tracker.news_service import NewsService
-from app.scripts.news_tracker.feed_service import FeedService
+from app.scripts.news_tracker.feed_service import FeedService, parse_published_at, ARTICLE_RETENTION_HOURS
+from app.utils.rate_limiter import get_rate_limiter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
@@ -85,15 +89,76 @@ NEWS_FEEDS = [
     "https://www.popsci.com/feed/",
 ]
 
+# Google News search feeds: requests overlap across workers, but start at most
+# GOOGLE_NEWS_RATE_PER_SECOND per second (shared token bucket for the host)
+GOOGLE_NEWS_HOST = 'news.google.com'
+GOOGLE_NEWS_MAX_WORKERS = 4
+GOOGLE_NEWS_RATE_PER_SECOND = 1.0
+
+# AI categorization: batches run on a bounded pool; calls are additionally capped
+# per AI provider so a slow provider is not flooded by parallel batches
+CATEGORIZE_BATCH_SIZE = 30
+CATEGORIZE_MAX_WORKERS = 4
+CATEGORIZE_MAX_ATTEMPTS = 3
+PROVIDER_CONCURRENCY = {
+    'claude': 2,
+    'openai': 4,
+    'google': 4,
+    'deepseek': 3,
+}
+DEFAULT_PROVIDER_CONCURRENCY = 2
+_provider_semaphores = {}
+_provider_semaphores_lock = threading.Lock()
+
+# Firestore WriteBatch limit
+WRITE_BATCH_SIZE = 500
+
+# Ingestion bookkeeping (ETag/Last-Modified per feed, etc.)
+INGESTION_STATE_COLLECTION = 'news_ingestion_state'
+
+# Firestore get_all chunk size for bulk duplicate checks
+EXISTS_CHECK_CHUNK_SIZE = 100
+
+# In-process LRU of article hashes known to be stored, so repeated cron runs
+# in the same instance skip Firestore lookups for articles seen before
+SEEN_HASH_CACHE_SIZE = 20000
+_seen_hashes = OrderedDict()
+_seen_hashes_lock = threading.Lock()
+
+def _remember_article_hashes(article_hashes) -> None:
+    """Mark article hashes as stored in the seen-hash LRU"""
+    with _seen_hashes_lock:
+        for article_hash in article_hashes:
+            _seen_hashes[article_hash] = True
+            _seen_hashes.move_to_end(article_hash)
+        while len(_seen_hashes) > SEEN_HASH_CACHE_SIZE:
+            _seen_hashes.popitem(last=False)
+
+def _split_seen_hashes(article_hashes) -> tuple:
+    """Split hashes into (known stored, unknown) using the seen-hash LRU"""
+    seen, unknown = set(), []
+    with _seen_hashes_lock:
+        for article_hash in article_hashes:
+            if article_hash in _seen_hashes:
+                _seen_hashes.move_to_end(article_hash)
+                seen.add(article_hash)
+            else:
+                unknown.append(article_hash)
+    return seen, unknown
+
+def _provider_semaphore(provider_name: str) -> threading.Semaphore:
+    """Process-wide concurrency cap for AI calls to one provider"""
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(provider_name)
+        if semaphore is None:
+            limit = PROVIDER_CONCURRENCY.get(provider_name, DEFAULT_PROVIDER_CONCURRENCY)
+            semaphore = threading.BoundedSemaphore(limit)
+            _provider_semaphores[provider_name] = semaphore
+        return semaphore
+
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
 
 def generate_article_hash(title: str, link: str) -> str:
     """Generate unique hash for article to prevent duplicates"""
@@ -124,8 +189,16 @@ class NewsRadarService:
             logger.error(f"Error fetching from {feed_url}: {e}")
             return []
 
-    def fetch_all_news(self) -> List[Dict]:
-        """Fetch news from all RSS feeds including Google News searches"""
+    def fetch_all_news(self) -> Tuple[List[Dict], Dict[str, Dict]]:
+        """
+        Fetch news from all RSS feeds including Google News searches
+
+        Returns:
+            (articles, validators): validators are the new ETag/Last-Modified values
+            per Google News feed. They are not saved here - the caller saves them once
+            the feed's articles are stored, so a failed run refetches instead of
+            getting a 304 for articles it never saved.
+        """
         all_news = []
 
         # Fetch traditional RSS feeds in PARALLEL (max 10 workers to avoid overwhelming servers)
@@ -147,32 +220,89 @@ class NewsRadarService:
 
         logger.info(f"Fetched {len(all_news)} articles from traditional RSS feeds")
 
-        # Fetch Google News search queries SEQUENTIALLY (with rate limiting)
+        # Fetch Google News search queries concurrently (rate limited per host)
         google_feeds = self.feed_service.get_all_google_news_feeds()
-        logger.info(f"Fetching from {len(google_feeds)} Google News search queries sequentially...")
-
-        for feed_info in google_feeds:
-            try:
-                feed_url = feed_info['url']
-                logger.info(f"Fetching Google News: {feed_info['query']} ({feed_info['category']})")
+        logger.info(f"Fetching from {len(google_feeds)} Google News search queries ({GOOGLE_NEWS_MAX_WORKERS} workers)...")
 
-                news_items = self.news_service.fetch_news(feed_url, limit=5)
+        validators = self._load_feed_validators()
+        new_validators = {}
+        not_modified = 0
 
-                for item in news_items:
-                    item['article_hash'] = generate_article_hash(item['title'], item['link'])
-                    item['feed_url'] = feed_url
-                    item['search_query'] = feed_info['query']
-                    all_news.append(item)
+        with ThreadPoolExecutor(max_workers=GOOGLE_NEWS_MAX_WORKERS) as executor:
+            future_to_feed = {
+                executor.submit(self.fetch_google_news_feed, feed_info, validators.get(self._feed_key(feed_info['url']))): feed_info
+                for feed_info in google_feeds
+            }
 
-                # 1 second delay between Google News requests (rate limiting)
-                time.sleep(1)
+            for future in as_completed(future_to_feed):
+                feed_info = future_to_feed[future]
+                try:
+                    result = future.result()
+                    if result['not_modified']:
+                        not_modified += 1
+                    all_news.extend(result['items'])
+                    if result['etag'] or result['modified']:
+                        new_validators[self._feed_key(feed_info['url'])] = {
+                            'url': feed_info['url'],
+                            'etag': result['etag'],
+                            'modified': result['modified']
+                        }
+                except Exception as e:
+                    logger.error(f"Error fetching from Google News ({feed_info['query']}): {e}")
 
-            except Exception as e:
-                logger.error(f"Error fetching from Google News ({feed_info['query']}): {e}")
-                continue
+        logger.info(f"Google News: {not_modified}/{len(google_feeds)} feeds unchanged since last run")
 
         logger.info(f"Total: {len(all_news)} articles from {len(NEWS_FEEDS)} traditional feeds + {len(google_feeds)} Google News queries")
-        return all_news
+        return all_news, new_validators
+
+    def _feed_key(self, feed_url: str) -> str:
+        """Firestore-safe map key for a feed URL"""
+        return hashlib.md5(feed_url.encode()).hexdigest()
+
+    def _load_feed_validators(self) -> Dict[str, Dict]:
+        """Load stored ETag/Last-Modified validators keyed by feed"""
+        try:
+            doc = self.db.collection(INGESTION_STATE_COLLECTION).document('feed_validators').get()
+            return doc.to_dict().get('feeds', {}) if doc.exists else {}
+        except Exception as e:
+            logger.warning(f"Could not load feed validators: {e}")
+            return {}
+
+    def _save_feed_validators(self, validators: Dict[str, Dict]) -> None:
+        """Persist ETag/Last-Modified validators for the next run (merged into the stored ones)"""
+        try:
+            self.db.collection(INGESTION_STATE_COLLECTION).document('feed_validators').set({
+                'feeds': validators,
+                'updated_at': firestore.SERVER_TIMESTAMP
+            }, merge=True)
+        except Exception as e:
+            logger.warning(f"Could not save feed validators: {e}")
+
+    def fetch_google_news_feed(self, feed_info: Dict, validator: Optional[Dict] = None) -> Dict:
+        """
+        Fetch one Google News search feed with a conditional GET
+
+        Waits on the shared news.google.com token bucket before the request.
+        Unchanged feeds (HTTP 304) return no items and skip parsing.
+        """
+        get_rate_limiter(GOOGLE_NEWS_HOST, GOOGLE_NEWS_RATE_PER_SECOND).acquire()
+
+        feed_url = feed_info['url']
+        logger.info(f"Fetching Google News: {feed_info['query']} ({feed_info['category']})")
+
+        result = self.news_service.fetch_news_conditional(
+            feed_url,
+            limit=5,
+            etag=(validator or {}).get('etag'),
+            modified=(validator or {}).get('modified')
+        )
+
+        for item in result['items']:
+            item['article_hash'] = generate_article_hash(item['title'], item['link'])
+            item['feed_url'] = feed_url
+            item['search_query'] = feed_info['query']
+
+        return result
 
     def check_article_exists(self, article_hash: str) -> bool:
         """Check if article already processed in Firestore"""
@@ -184,6 +314,34 @@ class NewsRadarService:
             logger.error(f"Error checking article existence: {e}")
             return False
 
+    def find_existing_articles(self, article_hashes: List[str]) -> set:
+        """
+        Bulk existence check for article hashes
+
+        Hashes found in the seen-hash LRU skip Firestore entirely; the rest are
+        looked up with db.get_all in chunks of EXISTS_CHECK_CHUNK_SIZE, fetching
+        only the article_hash field.
+
+        Returns:
+            Set of hashes already stored in news_articles
+        """
+        existing, unknown = _split_seen_hashes(article_hashes)
+        collection = self.db.collection('news_articles')
+
+        for chunk_start in range(0, len(unknown), EXISTS_CHECK_CHUNK_SIZE):
+            chunk = unknown[chunk_start:chunk_start + EXISTS_CHECK_CHUNK_SIZE]
+            try:
+                refs = [collection.document(article_hash) for article_hash in chunk]
+                found = [doc.id for doc in self.db.get_all(refs, field_paths=['article_hash']) if doc.exists]
+                existing.update(found)
+                _remember_article_hashes(found)
+            except Exception as e:
+                # Same fallback as check_article_exists: treat as new
+                logger.error(f"Error checking article existence for {len(chunk)} articles: {e}")
+
+        logger.info(f"Duplicate check: {len(article_hashes) - len(unknown)} cached, {len(unknown)} looked up, {len(existing)} existing")
+        return existing
+
     def filter_repetitive_content(self, articles: List[Dict]) -> List[Dict]:
         """Filter out repetitive daily puzzle content"""
 
@@ -222,7 +380,7 @@ class NewsRadarService:
                 articles_text += f"Source: {article['source']}\n"
 
             # Load batch prompt template
-            batch_prompt = load_prompt('categorize_batch.txt')
+            batch_prompt = get_prompt_template(PROMPTS_DIR, 'categorize_batch.txt')
             prompt = batch_prompt.format(articles=articles_text)
 
             ai_provider = get_ai_provider(
@@ -247,12 +405,14 @@ class NewsRadarService:
                 )
 
             # Run async call - thread is freed via run_in_executor internally
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                response = loop.run_until_complete(_call_ai_async())
-            finally:
-                loop.close()
+            # Parallel batches share a per-provider concurrency cap
+            with _provider_semaphore(ai_provider.provider.value):
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    response = loop.run_until_complete(_call_ai_async())
+                finally:
+                    loop.close()
 
             content = response.get('content', '').strip()
 
@@ -287,39 +447,80 @@ class NewsRadarService:
             logger.error(f"Error in batch categorization: {e}", exc_info=True)
             return {}
 
-    def save_article(self, article: Dict, categorization: Dict) -> bool:
-        """Save processed article to Firestore"""
-        try:
-            article_hash = article['article_hash']
-
-            doc_data = {
-                'article_hash': article_hash,
-                'title': article['title'],
-                'link': article['link'],
-                'published': article.get('published', ''),
-                'source': article['source'],
-                'feed_url': article['feed_url'],
-                'image_url': article.get('image_url', ''),  # Thumbnail from RSS feed
-
-                # AI-generated content (our original content)
-                'category': categorization['category'],
-                'importance_score': categorization['importance_score'],
-                'reasoning': categorization.get('reasoning', ''),
-                'summary': categorization.get('summary', ''),
-
-                # Metadata
-                'processed_at': firestore.SERVER_TIMESTAMP,
-                'created_at': datetime.now(timezone.utc).isoformat(),
-            }
+    def categorize_batch_with_retry(self, articles: List[Dict]) -> Dict[int, Dict]:
+        """Categorize a batch, retrying with backoff when the AI call yields nothing"""
+        for attempt in range(1, CATEGORIZE_MAX_ATTEMPTS + 1):
+            categorizations = self.categorize_and_score_batch(articles)
+            if categorizations:
+                return categorizations
+
+            if attempt < CATEGORIZE_MAX_ATTEMPTS:
+                delay = 2 ** attempt
+                logger.warning(f"Batch categorization attempt {attempt} failed, retrying in {delay}s...")
+                time.sleep(delay)
+
+        logger.error(f"Batch categorization failed after {CATEGORIZE_MAX_ATTEMPTS} attempts ({len(articles)} articles)")
+        return {}
+
+    def build_article_doc(self, article: Dict, categorization: Dict) -> Dict:
+        """Build the news_articles document for a categorized article"""
+        now = datetime.now(timezone.utc)
+
+        # Typed timestamp + static score bucket back the indexed feed queries
+        published_at = parse_published_at(article.get('published', '')) or now
+
+        return {
+            'article_hash': article['article_hash'],
+            'title': article['title'],
+            'link': article['link'],
+            'published': article.get('published', ''),
+            'source': article['source'],
+            'feed_url': article['feed_url'],
+            'image_url': article.get('image_url', ''),  # Thumbnail from RSS feed
+
+            # AI-generated content (our original content)
+            'category': categorization['category'],
+            'importance_score': categorization['importance_score'],
+            'reasoning': categorization.get('reasoning', ''),
+            'summary': categorization.get('summary', ''),
+
+            # Feed indexing
+            'published_at': published_at,
+            'expires_at': published_at + timedelta(hours=ARTICLE_RETENTION_HOURS),  # Optional TTL policy field
+            'feed_score_bucket': self.feed_service.calculate_feed_score_bucket(categorization['importance_score']),
+
+            # Metadata
+            'processed_at': firestore.SERVER_TIMESTAMP,
+            'created_at': now.isoformat(),
+        }
 
-            # Save to Firestore
-            self.db.collection('news_articles').document(article_hash).set(doc_data)
-            logger.info(f"Saved article: {article['title'][:50]}... | Category: {categorization['category']} | Score: {categorization['importance_score']}")
-            return True
+    def save_articles(self, items: List[tuple]) -> int:
+        """
+        Save (article, categorization) pairs with Firestore WriteBatch commits
 
-        except Exception as e:
-            logger.error(f"Error saving article: {e}", exc_info=True)
-            return False
+        Returns:
+            int: Number of articles saved
+        """
+        saved = 0
+        collection = self.db.collection('news_articles')
+
+        for chunk_start in range(0, len(items), WRITE_BATCH_SIZE):
+            chunk = items[chunk_start:chunk_start + WRITE_BATCH_SIZE]
+            try:
+                batch = self.db.batch()
+                for article, categorization in chunk:
+                    batch.set(collection.document(article['article_hash']), self.build_article_doc(article, categorization))
+                batch.commit()
+
+                _remember_article_hashes([article['article_hash'] for article, _ in chunk])
+                saved += len(chunk)
+                for article, categorization in chunk:
+                    logger.info(f"Saved article: {article['title'][:50]}... | Category: {categorization['category']} | Score: {categorization['importance_score']}")
+
+            except Exception as e:
+                logger.error(f"Error committing batch of {len(chunk)} articles: {e}", exc_info=True)
+
+        return saved
 
     def process_news_batch(self) -> Dict:
         """Main process: fetch, categorize, score, and save new articles"""
@@ -336,8 +537,10 @@ class NewsRadarService:
         }
 
         # Fetch all news
-        all_news = self.fetch_all_news()
+        all_news, feed_validators = self.fetch_all_news()
         stats['fetched'] = len(all_news)
+        # Feeds with an article that wasn't saved keep their old validators, so they are refetched
+        failed_feeds = set()
 
         # Filter out old articles BEFORE checking duplicates (save DB lookups)
         cutoff_time = datetime.now(timezone.utc) - timedelta(hours=72)
@@ -373,11 +576,17 @@ class NewsRadarService:
         logger.info(f"Filtered out {stats['filtered_repetitive']} repetitive articles, {len(filtered_articles)} remain")
 
         # Filter out duplicates (batch processing only new articles)
+        existing_hashes = self.find_existing_articles(
+            list({article['article_hash'] for article in filtered_articles})
+        )
+
         new_articles = []
         for article in filtered_articles:
-            if self.check_article_exists(article['article_hash']):
+            if article['article_hash'] in existing_hashes:
                 stats['duplicate'] += 1
             else:
+                # Same article from several feeds in this run only needs processing once
+                existing_hashes.add(article['article_hash'])
                 new_articles.append(article)
                 stats['new'] += 1
 
@@ -385,58 +594,89 @@ class NewsRadarService:
 
         if not new_articles:
             logger.info("No new articles to process")
+            self._save_feed_validators(feed_validators)
             return stats
 
-        # Process in batches of 30 articles (AI can handle this better)
-        BATCH_SIZE = 30
-
-        for batch_start in range(0, len(new_articles), BATCH_SIZE):
-            batch_end = min(batch_start + BATCH_SIZE, len(new_articles))
-            batch = new_articles[batch_start:batch_end]
+        # Categorize batches of 30 articles in parallel (AI can handle this better)
+        batches = [
+            new_articles[batch_start:batch_start + CATEGORIZE_BATCH_SIZE]
+            for batch_start in range(0, len(new_articles), CATEGORIZE_BATCH_SIZE)
+        ]
+        logger.info(f"Categorizing {len(batches)} batches with up to {CATEGORIZE_MAX_WORKERS} in parallel...")
 
-            logger.info(f"Processing batch {batch_start}-{batch_end} ({len(batch)} articles)...")
-            categorizations = self.categorize_and_score_batch(batch)
+        with ThreadPoolExecutor(max_workers=CATEGORIZE_MAX_WORKERS) as executor:
+            futures = [executor.submit(self.categorize_batch_with_retry, batch) for batch in batches]
 
-            logger.info(f"Successfully categorized {len(categorizations)}/{len(batch)} articles")
+            # Merge results in batch order, saving each batch as soon as it is ready
+            for batch_index, future in enumerate(futures):
+                batch = batches[batch_index]
+                batch_start = batch_index * CATEGORIZE_BATCH_SIZE
 
-            # Save articles IMMEDIATELY after categorization
-            for idx, cat in categorizations.items():
                 try:
-                    article = batch[idx]
+                    categorizations = future.result()
+                except Exception as e:
+                    logger.error(f"Error categorizing batch {batch_start}-{batch_start + len(batch)}: {e}")
+                    categorizations = {}
 
-                    if not cat:
-                        logger.warning(f"No categorization for article {batch_start + idx}: {article['title'][:50]}")
-                        stats['failed'] += 1
-                        continue
+                logger.info(f"Batch {batch_start}-{batch_start + len(batch)}: categorized {len(categorizations)}/{len(batch)} articles")
 
-                    stats['categorized'] += 1
+                for idx, article in enumerate(batch):
+                    if not categorizations.get(idx):
+                        failed_feeds.add(article.get('feed_url'))
 
-                    # Skip low importance articles (score 1-3)
-                    importance = cat.get('importance_score', 0)
-                    if importance <= 3:
-                        logger.debug(f"Skipping low importance article (score {importance}): {article['title'][:60]}")
-                        stats['low_importance'] = stats.get('low_importance', 0) + 1
-                        continue
+                to_save = []
+                for idx, cat in categorizations.items():
+                    try:
+                        article = batch[idx]
+
+                        if not cat:
+                            logger.warning(f"No categorization for article {batch_start + idx}: {article['title'][:50]}")
+                            stats['failed'] += 1
+                            continue
 
-                    # Save to database
-                    if self.save_article(article, cat):
-                        stats['saved'] += 1
-                    else:
+                        stats['categorized'] += 1
+
+                        # Skip low importance articles (score 1-3)
+                        importance = cat.get('importance_score', 0)
+                        if importance <= 3:
+                            logger.debug(f"Skipping low importance article (score {importance}): {article['title'][:60]}")
+                            stats['low_importance'] = stats.get('low_importance', 0) + 1
+                            continue
+
+                        to_save.append((article, cat))
+
+                    except Exception as e:
+                        logger.error(f"Error preparing article {batch_start + idx}: {e}")
                         stats['failed'] += 1
+                        failed_feeds.update(batch_article.get('feed_url') for batch_article in batch)
+                        continue
 
-                except Exception as e:
-                    logger.error(f"Error saving article {batch_start + idx}: {e}")
-                    stats['failed'] += 1
-                    continue
+                saved = self.save_articles(to_save)
+                stats['saved'] += saved
+                stats['failed'] += len(to_save) - saved
+                if saved < len(to_save):
+                    failed_feeds.update(article.get('feed_url') for article, _ in to_save)
+
+                logger.info(f"Saved {stats['saved']}/{stats['categorized']} articles so far")
 
-            logger.info(f"Saved {stats['saved']}/{stats['categorized']} articles so far")
+        # Only now that the articles are stored can unchanged feeds be skipped next run
+        self._save_feed_validators({
+            key: validator for key, validator in feed_validators.items()
+            if validator['url'] not in failed_feeds
+        })
+        if failed_feeds:
+            logger.info(f"Keeping previous validators for {len(failed_feeds)} feeds with unsaved articles")
 
         # Cleanup old articles (older than 72 hours)
         logger.info("Cleaning up old articles...")
         feed_service = FeedService()
-        cleanup_stats = feed_service.cleanup_old_articles(hours=72)
+        cleanup_stats = feed_service.cleanup_old_articles(hours=ARTICLE_RETENTION_HOURS)
         stats['cleanup'] = cleanup_stats
 
+        # Rebuild per-category feed snapshots served to users
+        logger.info("Building feed snapshots...")
+        stats['snapshots'] = feed_service.build_feed_snapshots()
+
         logger.info(f"News ingestion complete: {stats}")
         return stats
 
@@ -7,6 +7,7 @@ import feedparser
 import logging
 import html
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
 from time import mktime
@@ -20,14 +21,8 @@ logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
 
 def clean_url(url: str) -> str:
     """
@@ -99,6 +94,96 @@ Create a compelling X post that:
 Return ONLY the post content, nothing else."""
 
 
+    def _parse_entries(self, feed, limit: int) -> List[Dict]:
+        """Convert parsed feed entries into news item dicts"""
+        news_items = []
+        for entry in feed.entries[:limit]:
+            # Clean title: strip HTML tags and decode entities
+            raw_title = entry.get('title', 'No title')
+            # Remove HTML tags like <em>, <strong>, etc.
+            soup_title = BeautifulSoup(raw_title, 'html.parser')
+            clean_title = soup_title.get_text()
+            # Decode HTML entities (&#8216; → ')
+            title = html.unescape(clean_title)
+
+            # Parse published date - feedparser normalizes to published_parsed (time tuple)
+            published_date = ''
+            if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                try:
+                    # Convert time tuple to ISO format datetime string
+                    dt = datetime.fromtimestamp(mktime(entry.published_parsed), tz=timezone.utc)
+                    published_date = dt.isoformat()
+                except Exception as e:
+                    logger.debug(f"Error parsing published_parsed: {e}")
+                    published_date = entry.get('published', entry.get('pubDate', ''))
+            else:
+                # Fallback to raw string if parsed version not available
+                published_date = entry.get('published', entry.get('pubDate', ''))
+
+            # Extract source - for Google News, use the actual publisher from <source> tag
+            source = feed.feed.get('title', 'Unknown')
+            if hasattr(entry, 'source') and entry.source:
+                # Google News includes actual publisher in <source> tag
+                if hasattr(entry.source, 'title'):
+                    source = entry.source.title
+                elif isinstance(entry.source, dict) and 'title' in entry.source:
+                    source = entry.source['title']
+
+            # Extract description for AI processing (not stored/displayed)
+            # Clean HTML from description and truncate to 200 chars
+            description = entry.get('description', entry.get('summary', ''))
+            if description:
+                soup = BeautifulSoup(description, 'html.parser')
+                clean_text = soup.get_text().strip()
+                # Decode HTML entities in description too
+                clean_text = html.unescape(clean_text)
+                description = clean_text[:200] + '...' if len(clean_text) > 200 else clean_text
+
+            # Extract image/thumbnail from RSS feed
+            image_url = None
+
+            # Method 1: Check for media:content or media:thumbnail (common in RSS 2.0)
+            if hasattr(entry, 'media_content') and entry.media_content:
+                image_url = entry.media_content[0].get('url', '')
+            elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
+                image_url = entry.media_thumbnail[0].get('url', '')
+
+            # Method 2: Check for enclosure tag (podcasts/media)
+            elif hasattr(entry, 'enclosures') and entry.enclosures:
+                for enclosure in entry.enclosures:
+                    if enclosure.get('type', '').startswith('image/'):
+                        image_url = enclosure.get('href', '')
+                        break
+
+            # Method 3: Parse content field HTML for img tags (used by The Verge, etc.)
+            if not image_url and hasattr(entry, 'content') and entry.content:
+                content_html = entry.content[0].get('value', '')
+                if content_html:
+                    content_soup = BeautifulSoup(content_html, 'html.parser')
+                    img_tag = content_soup.find('img')
+                    if img_tag and img_tag.get('src'):
+                        image_url = img_tag.get('src')
+
+            # Method 4: Parse description HTML for img tags (fallback)
+            if not image_url and description:
+                desc_soup = BeautifulSoup(entry.get('description', entry.get('summary', '')), 'html.parser')
+                img_tag = desc_soup.find('img')
+                if img_tag and img_tag.get('src'):
+                    image_url = img_tag.get('src')
+
+            item = {
+                'title': title,
+                'link': entry.get('link', ''),
+                'description': description,  # Only for AI processing, not stored
+                'published': published_date,
+                'source': source,
+                'image_url': image_url,  # Thumbnail from RSS feed
+            }
+
+            news_items.append(item)
+
+        return news_items
+
     def fetch_news(self, feed_url: str, limit: int = 20) -> List[Dict]:
         """
         Fetch news from RSS feed
@@ -119,94 +204,51 @@ Return ONLY the post content, nothing else."""
             if feed.bozo:
                 logger.warning(f"Feed parsing warning: {feed.bozo_exception}")
 
-            news_items = []
-            for entry in feed.entries[:limit]:
-                # Clean title: strip HTML tags and decode entities
-                raw_title = entry.get('title', 'No title')
-                # Remove HTML tags like <em>, <strong>, etc.
-                soup_title = BeautifulSoup(raw_title, 'html.parser')
-                clean_title = soup_title.get_text()
-                # Decode HTML entities (&#8216; → ')
-                title = html.unescape(clean_title)
-
-                # Parse published date - feedparser normalizes to published_parsed (time tuple)
-                published_date = ''
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    try:
-                        # Convert time tuple to ISO format datetime string
-                        dt = datetime.fromtimestamp(mktime(entry.published_parsed), tz=timezone.utc)
-                        published_date = dt.isoformat()
-                    except Exception as e:
-                        logger.debug(f"Error parsing published_parsed: {e}")
-                        published_date = entry.get('published', entry.get('pubDate', ''))
-                else:
-                    # Fallback to raw string if parsed version not available
-                    published_date = entry.get('published', entry.get('pubDate', ''))
+            news_items = self._parse_entries(feed, limit)
 
-                # Extract source - for Google News, use the actual publisher from <source> tag
-                source = feed.feed.get('title', 'Unknown')
-                if hasattr(entry, 'source') and entry.source:
-                    # Google News includes actual publisher in <source> tag
-                    if hasattr(entry.source, 'title'):
-                        source = entry.source.title
-                    elif isinstance(entry.source, dict) and 'title' in entry.source:
-                        source = entry.source['title']
-
-                # Extract description for AI processing (not stored/displayed)
-                # Clean HTML from description and truncate to 200 chars
-                description = entry.get('description', entry.get('summary', ''))
-                if description:
-                    soup = BeautifulSoup(description, 'html.parser')
-                    clean_text = soup.get_text().strip()
-                    # Decode HTML entities in description too
-                    clean_text = html.unescape(clean_text)
-                    description = clean_text[:200] + '...' if len(clean_text) > 200 else clean_text
-
-                # Extract image/thumbnail from RSS feed
-                image_url = None
-
-                # Method 1: Check for media:content or media:thumbnail (common in RSS 2.0)
-                if hasattr(entry, 'media_content') and entry.media_content:
-                    image_url = entry.media_content[0].get('url', '')
-                elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                    image_url = entry.media_thumbnail[0].get('url', '')
-
-                # Method 2: Check for enclosure tag (podcasts/media)
-                elif hasattr(entry, 'enclosures') and entry.enclosures:
-                    for enclosure in entry.enclosures:
-                        if enclosure.get('type', '').startswith('image/'):
-                            image_url = enclosure.get('href', '')
-                            break
-
-                # Method 3: Parse content field HTML for img tags (used by The Verge, etc.)
-                if not image_url and hasattr(entry, 'content') and entry.content:
-                    content_html = entry.content[0].get('value', '')
-                    if content_html:
-                        content_soup = BeautifulSoup(content_html, 'html.parser')
-                        img_tag = content_soup.find('img')
-                        if img_tag and img_tag.get('src'):
-                            image_url = img_tag.get('src')
-
-                # Method 4: Parse description HTML for img tags (fallback)
-                if not image_url and description:
-                    desc_soup = BeautifulSoup(entry.get('description', entry.get('summary', '')), 'html.parser')
-                    img_tag = desc_soup.find('img')
-                    if img_tag and img_tag.get('src'):
-                        image_url = img_tag.get('src')
+            logger.info(f"Fetched {len(news_items)} news items")
+            return news_items
+
+        except Exception as e:
+            logger.error(f"Error fetching news: {e}", exc_info=True)
+            raise
+
+    def fetch_news_conditional(self, feed_url: str, limit: int = 20,
+                               etag: Optional[str] = None, modified: Optional[str] = None) -> Dict:
+        """
+        Fetch news from RSS feed with a conditional GET
+
+        Args:
+            feed_url: RSS feed URL
+            limit: Maximum number of items to return
+            etag: ETag returned by the previous fetch of this feed
+            modified: Last-Modified returned by the previous fetch of this feed
+
+        Returns:
+            Dict with 'items', 'not_modified' (True on HTTP 304, items empty and
+            nothing parsed) and the 'etag'/'modified' validators for the next fetch
+        """
+        try:
+            logger.info(f"Fetching news from: {feed_url} (conditional)")
+
+            feed = feedparser.parse(feed_url, etag=etag, modified=modified)
 
-                item = {
-                    'title': title,
-                    'link': entry.get('link', ''),
-                    'description': description,  # Only for AI processing, not stored
-                    'published': published_date,
-                    'source': source,
-                    'image_url': image_url,  # Thumbnail from RSS feed
-                }
+            if getattr(feed, 'status', None) == 304:
+                logger.info(f"Feed not modified since last fetch: {feed_url}")
+                return {'items': [], 'not_modified': True, 'etag': etag, 'modified': modified}
 
-                news_items.append(item)
+            if feed.bozo:
+                logger.warning(f"Feed parsing warning: {feed.bozo_exception}")
+
+            news_items = self._parse_entries(feed, limit)
 
             logger.info(f"Fetched {len(news_items)} news items")
-            return news_items
+            return {
+                'items': news_items,
+                'not_modified': False,
+                'etag': feed.get('etag'),
+                'modified': feed.get('modified')
+            }
 
         except Exception as e:
             logger.error(f"Error fetching news: {e}", exc_info=True)
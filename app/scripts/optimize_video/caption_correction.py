@@ -2,15 +2,19 @@
 Caption Correction Module
 Handles downloading, correcting, and re-uploading YouTube captions with AI
 """
+import os
 import logging
 import re
 import io
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Callable, Dict, Any, List, Tuple, Optional
 from app.system.ai_provider.ai_provider import get_ai_provider
 from app.scripts.optimize_video.prompts import load_prompt
 
 logger = logging.getLogger(__name__)
 
+# How many caption batches may be in flight with the AI provider at once
+CAPTION_BATCH_MAX_CONCURRENCY = int(os.environ.get('CAPTION_BATCH_MAX_CONCURRENCY', '4'))
+
 
 class CaptionCorrector:
     """Corrects YouTube captions with AI-powered grammar and punctuation improvements"""
@@ -452,46 +456,12 @@ class CaptionCorrector:
         are<00:00:00.160><c> you</c><00:00:00.280><c> looking</c><00:00:00.520><c> for</c>
 
         First word "are" has NO <c> tag, rest have <timestamp><c> word</c> format
+        Uses the shared single-pass VTTParser so both paths agree on word order and timing
         """
-        import re
-
-        words_with_timestamps = []
+        from app.scripts.optimize_video.vtt_parser import VTTParser
 
         try:
-            lines = vtt_content.split('\n')
-
-            for line in lines:
-                # Only process lines with word-level timing tags <c>
-                if '<c>' not in line:
-                    continue
-
-                # Pattern 1: Find all tagged words: <00:00:00.160><c> you</c>
-                tagged_pattern = r'<(\d{2}):(\d{2}):(\d{2})\.(\d{3})><c>\s*([^<]+)</c>'
-                tagged_matches = re.findall(tagged_pattern, line)
-
-                for match in tagged_matches:
-                    h, m, s, ms, word = match
-                    timestamp_seconds = (int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0)
-                    words_with_timestamps.append({
-                        'word': word.strip(),
-                        'start': timestamp_seconds
-                    })
-
-                # Pattern 2: Handle first word (no <c> tag): are<00:00:00.160>
-                # Extract word before first <
-                first_word_match = re.match(r'^([a-zA-Z\'\-]+)<\d{2}:\d{2}:\d{2}\.\d{3}>', line)
-                if first_word_match:
-                    first_word = first_word_match.group(1).strip()
-                    # Get timestamp from first tagged word (they appear in order)
-                    first_timestamp_match = re.search(r'<(\d{2}):(\d{2}):(\d{2})\.(\d{3})>', line)
-                    if first_timestamp_match:
-                        h, m, s, ms = first_timestamp_match.groups()
-                        # Estimate first word is ~100-200ms before first timestamp
-                        timestamp_seconds = (int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0) - 0.12
-                        words_with_timestamps.insert(0 if not words_with_timestamps else len([w for w in words_with_timestamps if w['start'] < timestamp_seconds]), {
-                            'word': first_word,
-                            'start': max(0, timestamp_seconds)  # Don't go negative
-                        })
+            words_with_timestamps = VTTParser.parse_vtt(vtt_content)['per_word']
 
             logger.info(f"Extracted {len(words_with_timestamps)} words with PRECISE timestamps from VTT")
 
@@ -681,8 +651,6 @@ Return ONLY the SRT file:"""
                 logger.error(f"User {user_id} not found")
                 return None, None
 
-            ai_provider_manager = AIProviderManager(user_subscription=user_subscription)
-
             # Split words into batches of ~800 words (~19K chars each with inline timestamps)
             # DeepSeek supports 32K tokens input, ~8K tokens output
             # 800 words with inline format = ~19K chars + prompts = safe within limits
@@ -754,10 +722,7 @@ Check out this.
 
 OUTPUT: Return ONLY the SRT file. NO explanations."""
 
-            all_segments = []
-            total_input_tokens = 0
-            total_output_tokens = 0
-            model_name = 'unknown'
+            corrected_batches = []
 
             # Helper function to format timestamps
             def format_timestamp(seconds):
@@ -775,7 +740,8 @@ OUTPUT: Return ONLY the SRT file. NO explanations."""
                 logger.info(system_prompt)
                 logger.info(f"================================================================================")
 
-            # Track global word index across batches
+            # Build every batch prompt up front (word numbers stay global across batches)
+            message_batches = []
             word_offset = 0
 
             for batch_num, batch_words in enumerate(batches, 1):
@@ -788,38 +754,29 @@ NUMBERED WORD LIST:
 
 Return ONLY the SRT file:"""
 
-                logger.info(f"Processing batch {batch_num}/{len(batches)} ({len(batch_words)} words, {len(word_list_text)} chars)")
+                logger.info(f"Prepared batch {batch_num}/{len(batches)} ({len(batch_words)} words, {len(word_list_text)} chars)")
                 logger.info(f"BATCH {batch_num} - First 300 chars sent to AI:\n{word_list_text[:300]}")
 
-                # ASYNC AI call - thread is freed during AI generation!
-                import asyncio
+                message_batches.append([
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ])
 
-                async def _call_ai_async():
-                    """Wrapper to call async AI in thread pool - frees main thread!"""
-                    return await ai_provider_manager.create_completion_async(
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=7000
-                    )
+                # Update word offset for next batch
+                word_offset += len(batch_words)
+
+            # Dispatch all batches concurrently - total time is the slowest batch, not the sum
+            responses = self._run_completions_concurrently(
+                lambda: AIProviderManager(user_subscription=user_subscription),
+                message_batches,
+                max_tokens=7000
+            )
 
-                # Run async call - thread is freed via run_in_executor internally
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    response = loop.run_until_complete(_call_ai_async())
-                finally:
-                    loop.close()
+            for batch_num, response in enumerate(responses, 1):
+                if isinstance(response, Exception):
+                    raise RuntimeError(f"Batch {batch_num}/{len(batches)} failed: {response}")
 
                 batch_srt = response['content'].strip()
-                usage = response.get('usage', {})
-
-                # Track token usage
-                total_input_tokens += usage.get('prompt_tokens', 0)
-                total_output_tokens += usage.get('completion_tokens', 0)
-                model_name = usage.get('model', model_name)
 
                 # Clean up AI response (remove any text before first SRT block)
                 if '\n\n' in batch_srt:
@@ -832,29 +789,19 @@ Return ONLY the SRT file:"""
                             break
                     batch_srt = '\n\n'.join(blocks[first_valid_block_idx:])
 
-                # Parse segments from this batch
-                segments = self._parse_srt(batch_srt)
-                all_segments.extend(segments)
+                corrected_batches.append(batch_srt)
 
-                logger.info(f"Batch {batch_num} complete: {len(segments)} segments generated")
+                logger.info(f"Batch {batch_num} complete")
                 logger.info(f"BATCH {batch_num} - AI returned first 800 chars:\n{batch_srt[:800]}")
-                if segments:
-                    logger.info(f"BATCH {batch_num} - First parsed segment: {segments[0]}")
 
-                # Update word offset for next batch
-                word_offset += len(batch_words)
+            # Stitch batches back together in order and renumber
+            final_srt = self._combine_and_renumber_srt_batches(corrected_batches)
+            segment_count = len(final_srt.split('\n\n')) if final_srt else 0
 
-            # Combine all segments into final SRT
-            final_srt = self._segments_to_srt(all_segments)
-
-            combined_usage = {
-                'prompt_tokens': total_input_tokens,
-                'completion_tokens': total_output_tokens,
-                'total_tokens': total_input_tokens + total_output_tokens,
-                'model': model_name
-            }
+            # Billed per response: batches that fell back ran on another provider
+            combined_usage = self._combine_batch_usages(responses)
 
-            logger.info(f"Batched processing complete: {len(all_segments)} total segments")
+            logger.info(f"Batched processing complete: {segment_count} total segments")
             logger.info(f"Combined token usage: {combined_usage}")
 
             return final_srt, combined_usage
@@ -885,44 +832,6 @@ Return ONLY the SRT file:"""
             srt_lines.append('')  # Empty line between segments
         return '\n'.join(srt_lines)
 
-    def _parse_srt(self, srt_content: str) -> List[Dict[str, str]]:
-        """Parse SRT format into segments with timestamps"""
-        segments = []
-
-        blocks = srt_content.strip().split('\n\n')
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) < 2:
-                continue
-
-            try:
-                # Find the timestamp line (contains " --> ")
-                timestamp_line = None
-                text_lines = []
-
-                for i, line in enumerate(lines):
-                    if ' --> ' in line:
-                        timestamp_line = line
-                        # Everything after this line is text
-                        text_lines = lines[i+1:]
-                        break
-
-                if not timestamp_line or not text_lines:
-                    logger.warning(f"Skipping malformed SRT block: {block[:100]}")
-                    continue
-
-                text = ' '.join(text_lines)
-
-                segments.append({
-                    'timestamp': timestamp_line.strip(),
-                    'text': text.strip()
-                })
-            except Exception as e:
-                logger.warning(f"Failed to parse SRT block: {e}")
-                continue
-
-        return segments
-
     def _correct_srt_with_ai(self, srt_content: str, user_id: str, user_subscription: str = None) -> Tuple[Optional[str], Optional[Dict]]:
         """Send raw SRT to AI for correction. Returns (corrected_srt, token_usage)"""
         try:
@@ -940,7 +849,7 @@ Return ONLY the SRT file:"""
             # Check if we need to batch for DeepSeek (limit ~7500 tokens = ~30k chars)
             if 'deepseek' in provider_name.lower() and len(srt_content) > 25000:
                 logger.info(f"Large SRT ({len(srt_content)} chars) - using batching for DeepSeek")
-                return self._correct_srt_batched(srt_content, user_id, user_subscription, ai_provider)
+                return self._correct_srt_batched(srt_content, user_id, user_subscription)
 
             system_prompt = """You are a caption correction expert. You receive SRT subtitle files and fix them.
 
@@ -1136,7 +1045,7 @@ Return the corrected SRT file with NO overlapping timestamps:"""
             logger.error(f"Error correcting caption text: {e}")
             return None, None
 
-    def _correct_srt_batched(self, srt_content: str, user_id: str, user_subscription: str, ai_provider) -> Tuple[Optional[str], Optional[Dict]]:
+    def _correct_srt_batched(self, srt_content: str, user_id: str, user_subscription: str) -> Tuple[Optional[str], Optional[Dict]]:
         """
         Correct large SRT files by splitting into batches for DeepSeek
         Returns (corrected_srt, combined_token_usage)
@@ -1171,9 +1080,6 @@ Return the corrected SRT file with NO overlapping timestamps:"""
 
             # Process each batch
             corrected_batches = []
-            total_input_tokens = 0
-            total_output_tokens = 0
-            model_name = 'unknown'
 
             system_prompt = """You are a caption correction expert. You receive SRT subtitle files and fix them.
 
@@ -1195,8 +1101,9 @@ RULES:
 
 OUTPUT: Return the complete corrected SRT with NO overlapping timestamps and clean sentence breaks."""
 
+            message_batches = []
             for i, batch in enumerate(batches, 1):
-                logger.info(f"Processing batch {i}/{len(batches)} ({len(batch)} chars)")
+                logger.info(f"Prepared batch {i}/{len(batches)} ({len(batch)} chars)")
 
                 user_prompt = f"""Correct this SRT subtitle file segment. Fix word errors, add punctuation, capitalize, remove fillers, and FIX OVERLAPPING TIMESTAMPS.
 
@@ -1207,76 +1114,140 @@ SRT SEGMENT:
 
 Return the corrected SRT segment with NO overlapping timestamps:"""
 
-                # ASYNC AI call - thread is freed during AI generation!
-                import asyncio
-
-                async def _call_ai_async():
-                    """Wrapper to call async AI in thread pool - frees main thread!"""
-                    return await ai_provider.create_completion_async(
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=7000  # Increased to 20000 for all providers
-                    )
+                message_batches.append([
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ])
+
+            # Dispatch all batches concurrently - total time is the slowest batch, not the sum
+            responses = self._run_completions_concurrently(
+                lambda: get_ai_provider(
+                    script_name='optimize_video/caption_correction',
+                    user_subscription=user_subscription
+                ),
+                message_batches,
+                max_tokens=7000
+            )
 
-                # Run async call - thread is freed via run_in_executor internally
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    response = loop.run_until_complete(_call_ai_async())
-                finally:
-                    loop.close()
+            for i, response in enumerate(responses, 1):
+                if isinstance(response, Exception):
+                    raise RuntimeError(f"Batch {i}/{len(batches)} failed: {response}")
 
                 corrected_batch = response.get('content', '') if isinstance(response, dict) else str(response)
                 corrected_batches.append(corrected_batch.strip())
 
-                # Accumulate token usage
-                usage = response.get('usage', {})
-                total_input_tokens += usage.get('input_tokens', 0)
-                total_output_tokens += usage.get('output_tokens', 0)
-                model_name = response.get('model', model_name)
-
             # Combine batches - need to renumber SRT entries
             logger.info(f"Combining {len(corrected_batches)} batches and renumbering")
             combined_srt = self._combine_and_renumber_srt_batches(corrected_batches)
 
-            # Prepare combined token usage
-            provider_enum = ai_provider.provider if hasattr(ai_provider, 'provider') else None
-            token_usage = {
-                'input_tokens': total_input_tokens,
-                'output_tokens': total_output_tokens,
-                'model': model_name,
-                'provider_enum': provider_enum.value if provider_enum else None
-            }
+            # Billed per response: batches that fell back ran on another provider
+            token_usage = self._combine_batch_usages(responses)
 
-            logger.info(f"Batched correction complete: {total_input_tokens} input + {total_output_tokens} output tokens")
+            logger.info(f"Batched correction complete: {token_usage['input_tokens']} input + {token_usage['output_tokens']} output tokens")
             return combined_srt, token_usage
 
         except Exception as e:
             logger.error(f"Error in batched SRT correction: {e}")
             return None, None
 
+    def _run_completions_concurrently(self, provider_factory: Callable[[], Any],
+                                      message_batches: List[List[Dict[str, str]]],
+                                      max_tokens: int) -> List[Any]:
+        """
+        Run one AI completion per message batch, at most CAPTION_BATCH_MAX_CONCURRENCY at a time
+        Each batch gets its own provider manager from provider_factory: a manager switches
+        provider/model/client in place when it falls back, so one shared across batches
+        would change under the batches still in flight.
+        Returns responses in the same order as message_batches (an Exception in place of a failed batch)
+        """
+        import asyncio
+
+        async def _call_all_async():
+            semaphore = asyncio.Semaphore(max(1, CAPTION_BATCH_MAX_CONCURRENCY))
+
+            async def _call_one(messages):
+                async with semaphore:
+                    ai_provider = provider_factory()
+                    if not ai_provider:
+                        raise RuntimeError("AI provider not available for caption correction")
+                    return await ai_provider.create_completion_async(
+                        messages=messages,
+                        temperature=0.3,
+                        max_tokens=max_tokens
+                    )
+
+            return await asyncio.gather(*[_call_one(m) for m in message_batches], return_exceptions=True)
+
+        logger.info(f"Dispatching {len(message_batches)} caption batches (max {CAPTION_BATCH_MAX_CONCURRENCY} concurrent)")
+
+        # One event loop for all batches - threads are freed via run_in_executor internally
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(_call_all_async())
+        finally:
+            loop.close()
+
+    @staticmethod
+    def _combine_batch_usages(responses: List[Dict]) -> Dict:
+        """
+        Sum token usage over batch responses, keeping a per model/provider breakdown
+
+        Batches can fall back to different providers, so 'usages' holds one entry per
+        (model, provider) for credit deduction; the top-level totals, model and
+        provider_enum (of the first batch) are kept for logging and older callers.
+        """
+        usages = {}
+        for response in responses:
+            usage = response.get('usage', {}) if isinstance(response, dict) else {}
+            provider_enum = response.get('provider_enum') if isinstance(response, dict) else None
+            provider_key = provider_enum.value if hasattr(provider_enum, 'value') else provider_enum
+            model_name = response.get('model', 'unknown') if isinstance(response, dict) else 'unknown'
+
+            key = (model_name, provider_key)
+            if key not in usages:
+                usages[key] = {'input_tokens': 0, 'output_tokens': 0, 'model': model_name, 'provider_enum': provider_key}
+            usages[key]['input_tokens'] += usage.get('input_tokens', 0)
+            usages[key]['output_tokens'] += usage.get('output_tokens', 0)
+
+        usage_list = list(usages.values())
+        for entry in usage_list:
+            entry['total_tokens'] = entry['input_tokens'] + entry['output_tokens']
+
+        total_input_tokens = sum(entry['input_tokens'] for entry in usage_list)
+        total_output_tokens = sum(entry['output_tokens'] for entry in usage_list)
+        first = usage_list[0] if usage_list else {'model': 'unknown', 'provider_enum': None}
+        return {
+            'input_tokens': total_input_tokens,
+            'output_tokens': total_output_tokens,
+            'total_tokens': total_input_tokens + total_output_tokens,
+            'model': first['model'],
+            'provider_enum': first['provider_enum'],
+            'usages': usage_list
+        }
+
     def _combine_and_renumber_srt_batches(self, batches: List[str]) -> str:
-        """Combine SRT batches and renumber entries sequentially"""
-        all_entries = []
+        """
+        Combine SRT batches and renumber entries sequentially
+
+        Each block is rebuilt from its timestamp line (the one containing ' --> ')
+        and the text lines after it, so blocks the AI returned without an index keep
+        their timestamp. Blocks without a timestamp or text are dropped and don't
+        use up a number.
+        """
+        renumbered = []
 
         for batch in batches:
-            # Split batch into individual entries
-            entries = batch.strip().split('\n\n')
-            for entry in entries:
-                if entry.strip():
-                    all_entries.append(entry.strip())
+            for block in batch.strip().split('\n\n'):
+                lines = [line for line in block.strip().split('\n') if line.strip()]
+                timestamp_index = next((i for i, line in enumerate(lines) if ' --> ' in line), None)
+                if timestamp_index is None or timestamp_index == len(lines) - 1:
+                    if block.strip():
+                        logger.warning(f"Skipping malformed SRT block: {block[:100]}")
+                    continue
 
-        # Renumber all entries
-        renumbered = []
-        for i, entry in enumerate(all_entries, 1):
-            lines = entry.split('\n')
-            if len(lines) >= 3:
-                # Replace first line (sequence number) with correct number
-                lines[0] = str(i)
-                renumbered.append('\n'.join(lines))
+                entry = [str(len(renumbered) + 1), lines[timestamp_index].strip()] + lines[timestamp_index + 1:]
+                renumbered.append('\n'.join(entry))
 
         return '\n\n'.join(renumbered)
 
@@ -3,6 +3,7 @@ Prompt loading utilities for optimize_video
 """
 import logging
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -10,11 +11,5 @@ logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).parent
 
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
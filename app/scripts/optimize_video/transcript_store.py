@@ -0,0 +1,288 @@
+"""
+Transcript Store
+Shared, content-addressed cache of parsed VTT transcripts (one document per video, not per user)
+
+Each document stores a compact columnar encoding of the parsed VTT:
+parallel word/start arrays and segment start/end/text arrays, delta-encoded and
+zlib-compressed into a single blob. The per_word, segments_with_time and plain_text
+views are rebuilt lazily on read, so callers only pay for the formats they use.
+"""
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_COLLECTION = 'video_transcripts'
+TRANSCRIPT_TTL = timedelta(days=7)
+TRANSCRIPT_ENCODING_VERSION = 1
+TRANSCRIPT_MEMORY_CACHE_SIZE = 64
+
+# Process-wide LRU of the last record seen per video (fresh or stale)
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def transcript_revision(vtt_content: str) -> str:
+    """Content address of a caption track - changes whenever YouTube regenerates the VTT"""
+    return hashlib.sha256(vtt_content.encode('utf-8')).hexdigest()[:20]
+
+
+def _timestamp_to_ms(timestamp: str) -> int:
+    """'00:01:02.345' -> 62345"""
+    h, m, rest = timestamp.split(':')
+    s, ms = rest.split('.')
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + int(ms)
+
+
+def _ms_to_timestamp(ms: int) -> str:
+    """62345 -> '00:01:02.345'"""
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def _delta_encode(values: List[int]) -> List[int]:
+    previous = 0
+    deltas = []
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def _delta_decode(deltas: List[int]) -> List[int]:
+    total = 0
+    values = []
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def encode_transcript(parsed: Dict[str, Any]) -> bytes:
+    """Encode VTTParser.parse_vtt() output as a compressed columnar blob"""
+    per_word = parsed.get('per_word', [])
+    segments = parsed.get('segments_with_time', [])
+
+    columns = {
+        'v': TRANSCRIPT_ENCODING_VERSION,
+        'words': [w['word'] for w in per_word],
+        'word_start_ms': _delta_encode([int(round(w['start'] * 1000)) for w in per_word]),
+        'seg_start_ms': _delta_encode([_timestamp_to_ms(seg['start']) for seg in segments]),
+        'seg_end_ms': _delta_encode([_timestamp_to_ms(seg['end']) for seg in segments]),
+        'seg_text': [seg['text'] for seg in segments]
+    }
+    return zlib.compress(json.dumps(columns, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decode_transcript(blob: bytes) -> Dict[str, Any]:
+    """Decode a blob from encode_transcript() back into its (un-delta'd) columns"""
+    columns = json.loads(zlib.decompress(bytes(blob)).decode('utf-8'))
+    if columns.get('v') != TRANSCRIPT_ENCODING_VERSION:
+        raise ValueError(f"Unsupported transcript encoding version: {columns.get('v')}")
+
+    return {
+        'words': columns['words'],
+        'word_start_ms': _delta_decode(columns['word_start_ms']),
+        'seg_start_ms': _delta_decode(columns['seg_start_ms']),
+        'seg_end_ms': _delta_decode(columns['seg_end_ms']),
+        'seg_text': columns['seg_text']
+    }
+
+
+class TranscriptData(Mapping):
+    """
+    Read-only dict-like view over a cached transcript
+
+    Supports the same keys as VTTParser.parse_vtt() ('per_word', 'segments_with_time',
+    'plain_text', 'has_per_word_timestamps'); each view is built on first access.
+    """
+
+    KEYS = ('per_word', 'segments_with_time', 'plain_text', 'has_per_word_timestamps')
+
+    def __init__(self, columns: Dict[str, Any] = None, views: Dict[str, Any] = None):
+        self._columns = columns
+        self._views = dict(views) if views else {}
+
+    @classmethod
+    def from_parsed(cls, parsed: Dict[str, Any]) -> 'TranscriptData':
+        """Wrap a freshly parsed transcript (all views already built)"""
+        return cls(views={key: parsed[key] for key in cls.KEYS})
+
+    def _build(self, key: str):
+        columns = self._columns
+        if key == 'per_word':
+            return [
+                {'word': word, 'start': start_ms / 1000.0}
+                for word, start_ms in zip(columns['words'], columns['word_start_ms'])
+            ]
+        if key == 'segments_with_time':
+            return [
+                {'start': _ms_to_timestamp(start_ms), 'end': _ms_to_timestamp(end_ms), 'text': text}
+                for start_ms, end_ms, text in zip(columns['seg_start_ms'], columns['seg_end_ms'], columns['seg_text'])
+            ]
+        if key == 'plain_text':
+            return ' '.join(text for text in columns['seg_text'] if text)
+        if key == 'has_per_word_timestamps':
+            return len(columns['words']) > 0
+        raise KeyError(key)
+
+    def __getitem__(self, key: str):
+        if key not in self._views:
+            if self._columns is None or key not in self.KEYS:
+                raise KeyError(key)
+            self._views[key] = self._build(key)
+        return self._views[key]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+
+class TranscriptStore:
+    """Global transcript cache shared by every user, keyed by video ID and caption revision"""
+
+    @staticmethod
+    def _remember(video_id: str, record: Dict[str, Any]):
+        with _memory_cache_lock:
+            _memory_cache[video_id] = record
+            _memory_cache.move_to_end(video_id)
+            while len(_memory_cache) > TRANSCRIPT_MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+
+    @staticmethod
+    def _recall(video_id: str) -> Optional[Dict[str, Any]]:
+        with _memory_cache_lock:
+            record = _memory_cache.get(video_id)
+            if record is not None:
+                _memory_cache.move_to_end(video_id)
+            return record
+
+    @staticmethod
+    def _is_visible(record: Dict[str, Any], user_id: str) -> bool:
+        """Public transcripts are shared; ones fetched with a user's own YouTube credentials are not"""
+        owner_id = record.get('owner_id')
+        return owner_id is None or owner_id == user_id
+
+    @staticmethod
+    def _load_record(video_id: str) -> Optional[Dict[str, Any]]:
+        """Read the cached record for a video (memory first, then Firestore)"""
+        record = TranscriptStore._recall(video_id)
+        if record is not None:
+            return record
+
+        from app.system.services.firebase_service import db
+
+        doc = db.collection(TRANSCRIPT_COLLECTION).document(video_id).get()
+        if not doc.exists:
+            return None
+
+        doc_data = doc.to_dict()
+        expires_at = doc_data.get('expires_at')
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+        record = {
+            'revision': doc_data.get('revision'),
+            'owner_id': doc_data.get('owner_id'),
+            'expires_at': expires_at,
+            'data': TranscriptData(columns=decode_transcript(doc_data['payload']))
+        }
+        TranscriptStore._remember(video_id, record)
+        return record
+
+    @staticmethod
+    def get(video_id: str, user_id: str = None) -> Optional[TranscriptData]:
+        """
+        Get a fresh cached transcript for a video
+
+        Returns:
+            TranscriptData, or None if missing, expired or private to another user
+        """
+        try:
+            record = TranscriptStore._load_record(video_id)
+            if not record or not TranscriptStore._is_visible(record, user_id):
+                return None
+
+            expires_at = record.get('expires_at')
+            if not expires_at or expires_at <= datetime.now(timezone.utc):
+                logger.info(f"Transcript cache expired for video {video_id}")
+                return None
+
+            return record['data']
+
+        except Exception as e:
+            logger.warning(f"Could not read transcript cache for video {video_id}: {e}")
+            return None
+
+    @staticmethod
+    def put(video_id: str, vtt_content: str, owner_id: str = None) -> TranscriptData:
+        """
+        Cache a downloaded VTT and return its parsed views
+
+        If the stored revision matches the downloaded content, the existing encoding is
+        reused and only its expiry is extended - the VTT is not parsed again.
+
+        Args:
+            video_id: YouTube video ID
+            vtt_content: Raw VTT string
+            owner_id: Set for private/unlisted videos fetched with a user's YouTube credentials,
+                      so the transcript is only served back to that user
+        """
+        from app.system.services.firebase_service import db
+        from app.scripts.optimize_video.vtt_parser import VTTParser
+
+        revision = transcript_revision(vtt_content)
+        now_utc = datetime.now(timezone.utc)
+        expires_at = now_utc + TRANSCRIPT_TTL
+        doc_ref = db.collection(TRANSCRIPT_COLLECTION).document(video_id)
+
+        try:
+            record = TranscriptStore._load_record(video_id)
+            if record and record.get('revision') == revision and record.get('owner_id') == owner_id:
+                doc_ref.update({'expires_at': expires_at})
+                TranscriptStore._remember(video_id, {**record, 'expires_at': expires_at})
+                logger.info(f"✓ Transcript revision {revision} unchanged for video {video_id}, extended cache")
+                return record['data']
+        except Exception as e:
+            logger.warning(f"Could not reuse cached transcript for video {video_id}: {e}")
+
+        parsed = VTTParser.parse_vtt(vtt_content)
+        data = TranscriptData.from_parsed(parsed)
+
+        try:
+            payload = encode_transcript(parsed)
+            doc_ref.set({
+                'video_id': video_id,
+                'revision': revision,
+                'encoding_version': TRANSCRIPT_ENCODING_VERSION,
+                'payload': payload,
+                'word_count': len(parsed['per_word']),
+                'segment_count': len(parsed['segments_with_time']),
+                'has_per_word_timestamps': parsed['has_per_word_timestamps'],
+                'owner_id': owner_id,
+                'created_at': now_utc,
+                'expires_at': expires_at
+            })
+            TranscriptStore._remember(video_id, {
+                'revision': revision,
+                'owner_id': owner_id,
+                'expires_at': expires_at,
+                'data': data
+            })
+            logger.info(f"✓ Cached transcript revision {revision} for video {video_id} "
+                        f"({len(payload)} bytes compressed, expires in {TRANSCRIPT_TTL.days} days)")
+        except Exception as e:
+            logger.warning(f"Could not cache transcript for video {video_id}: {e}")
+
+        return data
@@ -3,12 +3,14 @@ Video Optimizer
 Optimizes user's own YouTube videos with AI recommendations
 """
 import os
+import time
 import logging
 from pathlib import Path
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, Any, Callable, Optional, Tuple
 from datetime import datetime
-from app.system.ai_provider.ai_provider import get_ai_provider
+from app.system.ai_provider.ai_provider import get_ai_provider, AIProvider
 from app.system.credits.credits_manager import CreditsManager
 from app.scripts.video_title.video_title import VideoTitleGenerator
 from app.scripts.video_title.video_description import VideoDescriptionGenerator
@@ -19,6 +21,24 @@ from app.scripts.optimize_video.prompts import load_prompt
 
 logger = logging.getLogger(__name__)
 
+# Per-optimization timeouts (seconds) when running concurrently; None waits indefinitely.
+# Captions and pinned comments post to YouTube, so they are never abandoned mid-flight.
+DEFAULT_OPTIMIZATION_TASK_TIMEOUT = int(os.getenv('OPTIMIZATION_TASK_TIMEOUT', '120'))
+OPTIMIZATION_TASK_TIMEOUTS = {
+    'title': DEFAULT_OPTIMIZATION_TASK_TIMEOUT,
+    'description': DEFAULT_OPTIMIZATION_TASK_TIMEOUT,
+    'tags': DEFAULT_OPTIMIZATION_TASK_TIMEOUT,
+    'captions': None,
+    'pinned_comment': None
+}
+
+# Credit transaction operation names of the generators that can time out
+OPTIMIZATION_OPERATION_NAMES = {
+    'title': 'Title Generation',
+    'description': 'Description Generation',
+    'tags': 'Tags Generation'
+}
+
 class VideoOptimizer:
     """Optimizes user's videos with AI recommendations"""
 
@@ -214,8 +234,8 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
             tags_result = {}
             optimized_tags = current_tags
 
-            # Generate optimized title suggestions (1 AI call generates 10 titles)
-            if 'title' in selected_optimizations:
+            # Each generator only needs the shared VTT-derived context, so they run concurrently
+            def _run_title():
                 logger.info("=" * 80)
                 logger.info("TITLE GENERATION - AI INPUT:")
                 logger.info("=" * 80)
@@ -223,24 +243,14 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
                 logger.info(f"Context sent to AI (first 1000 chars):\n{title_tags_context[:1000]}")
                 logger.info("=" * 80)
 
-                title_result = self.title_generator.generate_titles(
+                # 1 AI call generates 10 titles
+                return self.title_generator.generate_titles(
                     title_tags_context,
                     video_type=video_type,  # 'short' or 'long_form'
                     user_id=user_id
                 )
 
-                # Get all 10 titles from the result
-                all_titles = title_result.get('titles', [])
-                if len(all_titles) >= 10:
-                    title_suggestions = all_titles[:10]
-                else:
-                    # Fallback if not enough titles generated
-                    title_suggestions = all_titles + [current_title] * (10 - len(all_titles))
-
-                optimized_titles = title_suggestions[0] if title_suggestions else current_title  # Keep first for backward compatibility
-
-            # Generate optimized description (with full transcript if short video)
-            if 'description' in selected_optimizations:
+            def _run_description():
                 logger.info("=" * 80)
                 logger.info("DESCRIPTION GENERATION - AI INPUT:")
                 logger.info("=" * 80)
@@ -253,23 +263,15 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
 
                 # Use 'short' or 'long' for description generator
                 desc_type = 'short' if is_short else 'long'
-                description_result = self.description_generator.generate_description(
+                return self.description_generator.generate_description(
                     description_context,
                     video_type=desc_type,  # 'short' or 'long'
                     reference_description=current_description,
                     user_id=user_id
                 )
-                optimized_description = description_result.get('description', current_description)
-
-            # Generate optimized tags with channel keywords
-            if 'tags' in selected_optimizations:
-                logger.info("=" * 80)
-                logger.info("TAGS GENERATION - AI INPUT:")
-                logger.info("=" * 80)
 
+            def _run_tags():
                 # Get channel keywords from user document
-                from app.system.services.firebase_service import db
-
                 user_ref = db.collection('users').document(user_id)
                 user_doc = user_ref.get()
                 channel_keywords = []
@@ -280,14 +282,72 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
                 else:
                     logger.warning(f"User document not found for {user_id}")
 
+                logger.info("=" * 80)
+                logger.info("TAGS GENERATION - AI INPUT:")
+                logger.info("=" * 80)
                 logger.info(f"Context sent to AI (first 1000 chars):\n{title_tags_context[:1000]}")
                 logger.info("=" * 80)
 
-                tags_result = self.tags_generator.generate_tags(
+                return self.tags_generator.generate_tags(
                     title_tags_context,
                     user_id=user_id,
                     channel_keywords=channel_keywords
                 )
+
+            def _run_captions():
+                logger.info("Running caption correction...")
+                return self.caption_corrector.correct_english_captions(
+                    video_id=video_id,
+                    user_id=user_id,
+                    user_subscription=user_subscription
+                )
+
+            def _run_pinned_comment():
+                logger.info("Generating and posting pinned comment...")
+                return self.pinned_comment_generator.generate_and_post_pinned_comment(
+                    video_id=video_id,
+                    user_id=user_id,
+                    video_title=current_title,
+                    target_keyword=None,  # Could extract from optimization context if needed
+                    user_subscription=user_subscription
+                )
+
+            task_runners = {
+                'title': _run_title,
+                'description': _run_description,
+                'tags': _run_tags,
+                'captions': _run_captions,
+                'pinned_comment': _run_pinned_comment
+            }
+            tasks = {name: runner for name, runner in task_runners.items() if name in selected_optimizations}
+            # A timed-out generator keeps running and spending tokens, so bill it when it finishes
+            task_results, failed_optimizations = self._run_optimization_tasks(
+                tasks,
+                on_late_result=lambda name, result: self._deduct_late_token_usage(user_id, video_id, name, result)
+            )
+
+            # Generate optimized title suggestions
+            if 'title' in task_results:
+                title_result = task_results['title'] or {}
+
+                # Get all 10 titles from the result
+                all_titles = title_result.get('titles', [])
+                if len(all_titles) >= 10:
+                    title_suggestions = all_titles[:10]
+                else:
+                    # Fallback if not enough titles generated
+                    title_suggestions = all_titles + [current_title] * (10 - len(all_titles))
+
+                optimized_titles = title_suggestions[0] if title_suggestions else current_title  # Keep first for backward compatibility
+
+            # Generate optimized description (with full transcript if short video)
+            if 'description' in task_results:
+                description_result = task_results['description'] or {}
+                optimized_description = description_result.get('description', current_description)
+
+            # Generate optimized tags with channel keywords
+            if 'tags' in task_results:
+                tags_result = task_results['tags'] or {}
                 optimized_tags = tags_result.get('tags', current_tags)
 
             # Skip recommendations generation - not displayed in UI and wastes credits
@@ -295,29 +355,13 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
             recommendations = {}
             recommendations_token_usage = {}
 
-            # Collect all token usage for credit deduction
-            all_token_usages = []
-
-            # Add title generation tokens
-            if title_result.get('token_usage', {}).get('input_tokens', 0) > 0:
-                all_token_usages.append({
-                    'operation': 'Title Generation',
-                    **title_result.get('token_usage', {})
-                })
-
-            # Add description generation tokens
-            if description_result.get('token_usage', {}).get('input_tokens', 0) > 0:
-                all_token_usages.append({
-                    'operation': 'Description Generation',
-                    **description_result.get('token_usage', {})
-                })
-
-            # Add tags generation tokens
-            if tags_result.get('token_usage', {}).get('input_tokens', 0) > 0:
-                all_token_usages.append({
-                    'operation': 'Tags Generation',
-                    **tags_result.get('token_usage', {})
-                })
+            # Collect all token usage for credit deduction - generators that ran on the
+            # same model are merged so they cost a single deduction
+            all_token_usages = self._merge_token_usages([
+                (OPTIMIZATION_OPERATION_NAMES['title'], title_result.get('token_usage', {})),
+                (OPTIMIZATION_OPERATION_NAMES['description'], description_result.get('token_usage', {})),
+                (OPTIMIZATION_OPERATION_NAMES['tags'], tags_result.get('token_usage', {}))
+            ])
 
             # Skip recommendations tokens (disabled above)
             # if recommendations_token_usage.get('input_tokens', 0) > 0:
@@ -329,60 +373,45 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
             # Handle captions - correct and upload
             corrected_captions_result = None
             if 'captions' in selected_optimizations:
-                logger.info("Running caption correction...")
-                try:
-                    caption_result = self.caption_corrector.correct_english_captions(
-                        video_id=video_id,
-                        user_id=user_id,
-                        user_subscription=user_subscription
-                    )
-
-                    if caption_result.get('success'):
-                        logger.info(f"Caption correction successful: {caption_result.get('message')}")
-                        corrected_captions_result = caption_result
-
-                        # Add token usage for credit deduction
-                        if caption_result.get('token_usage'):
+                caption_result = task_results.get('captions')
+                if caption_result is None:
+                    corrected_captions_result = {'success': False, 'error': failed_optimizations.get('captions', 'Caption correction failed')}
+                elif caption_result.get('success'):
+                    logger.info(f"Caption correction successful: {caption_result.get('message')}")
+                    corrected_captions_result = caption_result
+
+                    # Add token usage for credit deduction
+                    # Batched corrections report one usage per model/provider they ran on
+                    caption_usage = caption_result.get('token_usage')
+                    if caption_usage:
+                        for usage in caption_usage.get('usages') or [caption_usage]:
                             all_token_usages.append({
                                 'operation': 'Caption Correction',
-                                **caption_result['token_usage']
+                                **usage
                             })
-                    else:
-                        logger.warning(f"Caption correction failed: {caption_result.get('error')}")
-                        corrected_captions_result = caption_result
-                except Exception as e:
-                    logger.error(f"Error running caption correction: {e}")
-                    corrected_captions_result = {'success': False, 'error': str(e)}
+                else:
+                    logger.warning(f"Caption correction failed: {caption_result.get('error')}")
+                    corrected_captions_result = caption_result
 
             # Handle pinned comment - generate and post
             pinned_comment_result = None
             if 'pinned_comment' in selected_optimizations:
-                logger.info("Generating and posting pinned comment...")
-                try:
-                    pinned_result = self.pinned_comment_generator.generate_and_post_pinned_comment(
-                        video_id=video_id,
-                        user_id=user_id,
-                        video_title=current_title,
-                        target_keyword=None,  # Could extract from optimization context if needed
-                        user_subscription=user_subscription
-                    )
-
-                    if pinned_result.get('success'):
-                        logger.info(f"Pinned comment posted successfully")
-                        pinned_comment_result = pinned_result
-
-                        # Add token usage for credit deduction
-                        if pinned_result.get('token_usage'):
-                            all_token_usages.append({
-                                'operation': 'Pinned Comment',
-                                **pinned_result['token_usage']
-                            })
-                    else:
-                        logger.warning(f"Pinned comment failed: {pinned_result.get('error')}")
-                        pinned_comment_result = pinned_result
-                except Exception as e:
-                    logger.error(f"Error generating pinned comment: {e}")
-                    pinned_comment_result = {'success': False, 'error': str(e)}
+                pinned_result = task_results.get('pinned_comment')
+                if pinned_result is None:
+                    pinned_comment_result = {'success': False, 'error': failed_optimizations.get('pinned_comment', 'Pinned comment failed')}
+                elif pinned_result.get('success'):
+                    logger.info(f"Pinned comment posted successfully")
+                    pinned_comment_result = pinned_result
+
+                    # Add token usage for credit deduction
+                    if pinned_result.get('token_usage'):
+                        all_token_usages.append({
+                            'operation': 'Pinned Comment',
+                            **pinned_result['token_usage']
+                        })
+                else:
+                    logger.warning(f"Pinned comment failed: {pinned_result.get('error')}")
+                    pinned_comment_result = pinned_result
 
             # Prepare response
             return {
@@ -406,7 +435,8 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
                 'recommendations': recommendations,
                 'all_token_usages': all_token_usages,  # Return all token usages for credit deduction
                 'corrected_captions_result': corrected_captions_result,  # Caption correction result
-                'pinned_comment_result': pinned_comment_result  # Pinned comment result
+                'pinned_comment_result': pinned_comment_result,  # Pinned comment result
+                'failed_optimizations': failed_optimizations  # Optimizations that errored or timed out
             }
 
         except Exception as e:
@@ -423,6 +453,126 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
 
             return {'success': False, 'error': str(e)}
 
+    def _run_optimization_tasks(self, tasks: Dict[str, Callable[[], Dict]],
+                                on_late_result: Optional[Callable[[str, Dict], None]] = None) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Run optimization tasks concurrently, each bounded by its own timeout
+
+        Args:
+            tasks: Map of optimization name -> zero-arg callable returning that optimization's result
+            on_late_result: Called with (name, result) when a timed-out task still completes
+
+        Returns:
+            Tuple of (results by name, error message by name for tasks that failed or timed out)
+        """
+        results = {}
+        failed = {}
+        if not tasks:
+            return results, failed
+
+        started = time.monotonic()
+        # Not used as a context manager: a timed-out task must not hold up the response
+        executor = ThreadPoolExecutor(max_workers=len(tasks))
+        try:
+            futures = {name: executor.submit(runner) for name, runner in tasks.items()}
+
+            for name, future in futures.items():
+                timeout = OPTIMIZATION_TASK_TIMEOUTS.get(name, DEFAULT_OPTIMIZATION_TASK_TIMEOUT)
+                remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+                try:
+                    results[name] = future.result(timeout=remaining)
+                except FuturesTimeoutError:
+                    logger.error(f"Optimization '{name}' timed out after {timeout}s")
+                    failed[name] = f'Timed out after {timeout}s'
+                    if on_late_result:
+                        future.add_done_callback(
+                            lambda done, name=name: self._deliver_late_result(name, done, on_late_result)
+                        )
+                except Exception as e:
+                    logger.error(f"Optimization '{name}' failed: {e}")
+                    failed[name] = str(e)
+        finally:
+            executor.shutdown(wait=False)
+
+        logger.info(f"Ran {len(tasks)} optimizations concurrently in {time.monotonic() - started:.1f}s "
+                    f"({len(failed)} failed)")
+        return results, failed
+
+    @staticmethod
+    def _deliver_late_result(name: str, future, on_late_result: Callable[[str, Dict], None]):
+        """Hand a timed-out task's result to on_late_result once its thread finishes"""
+        try:
+            if future.cancelled() or future.exception() is not None:
+                return
+            on_late_result(name, future.result())
+        except Exception as e:
+            logger.error(f"Error handling late result of optimization '{name}': {e}")
+
+    def _deduct_late_token_usage(self, user_id: str, video_id: str, name: str, result: Dict):
+        """
+        Deduct credits for a generator that finished after its timeout
+
+        Its output was dropped from the response, but the tokens were still spent, so they
+        are billed separately instead of through all_token_usages.
+        """
+        token_usage = (result or {}).get('token_usage') or {}
+        operation = OPTIMIZATION_OPERATION_NAMES.get(name, name)
+
+        for usage in token_usage.get('usages') or [token_usage]:
+            input_tokens = usage.get('input_tokens', 0)
+            output_tokens = usage.get('output_tokens', 0)
+            if input_tokens <= 0 and output_tokens <= 0:
+                continue
+
+            provider_enum = usage.get('provider_enum')
+            if provider_enum and not isinstance(provider_enum, AIProvider):
+                try:
+                    provider_enum = AIProvider(provider_enum)
+                except (ValueError, KeyError):
+                    logger.warning(f"Invalid provider enum value: {provider_enum}")
+                    provider_enum = None
+
+            logger.info(f"Deducting credits for timed-out {operation}: {input_tokens} input, {output_tokens} output tokens")
+            deduction_result = CreditsManager().deduct_llm_credits(
+                user_id=user_id,
+                model_name=usage.get('model'),
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                description=f"Video Optimization - {operation} (timed out) - {video_id}",
+                provider_enum=provider_enum
+            )
+            if not deduction_result.get('success'):
+                logger.error(f"Failed to deduct credits for timed-out {operation}: {deduction_result.get('message')}")
+
+    @staticmethod
+    def _merge_token_usages(usages: list) -> list:
+        """
+        Merge (operation, token_usage) pairs that ran on the same model/provider into one entry
+
+        Returns:
+            List of token usage dicts (with 'operation') ready for credit deduction
+        """
+        merged = {}
+        for operation, usage in usages:
+            if not usage or (usage.get('input_tokens', 0) <= 0 and usage.get('output_tokens', 0) <= 0):
+                continue
+
+            provider_enum = usage.get('provider_enum')
+            provider_key = provider_enum.value if hasattr(provider_enum, 'value') else provider_enum
+            key = (usage.get('model'), provider_key)
+
+            if key not in merged:
+                merged[key] = {**usage, 'operation': operation, 'input_tokens': 0, 'output_tokens': 0}
+            else:
+                merged[key]['operation'] = f"{merged[key]['operation']} + {operation}"
+
+            entry = merged[key]
+            entry['input_tokens'] += usage.get('input_tokens', 0)
+            entry['output_tokens'] += usage.get('output_tokens', 0)
+            entry['total_tokens'] = entry['input_tokens'] + entry['output_tokens']
+
+        return list(merged.values())
+
     def _fetch_video_info(self, video_id: str) -> Dict:
         """Fetch video information from RapidAPI"""
         try:
@@ -601,14 +751,14 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
     def _fetch_and_cache_vtt(self, video_id: str, user_id: str = None) -> Dict[str, Any]:
         """
         Fetch VTT captions with smart caching and fallback:
-        1. Check Firestore cache first (7-day TTL)
+        1. Check the shared transcript store first (7-day TTL, shared across users)
         2. Try RapidAPI (free, works for public videos)
         3. Fallback to YouTube API (costs 250 quota units, for private videos)
         4. Parse VTT into 3 formats (per_word, segments_with_time, plain_text)
-        5. Cache in Firestore for future use
+           and cache a compact encoding keyed by video ID + caption revision
 
         Returns:
-            Dict with parsed VTT data:
+            Dict-like TranscriptData with parsed VTT data (views are built lazily):
             {
                 'per_word': [...],  # For captions
                 'segments_with_time': [...],  # For description/chapters
@@ -616,40 +766,13 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
                 'has_per_word_timestamps': True/False
             }
         """
-        from app.system.services.firebase_service import db
-        from datetime import datetime, timedelta, timezone
-        from app.scripts.optimize_video.vtt_parser import VTTParser
+        from app.scripts.optimize_video.transcript_store import TranscriptStore
 
         # Step 1: Check cache
-        try:
-            cache_ref = db.collection('users').document(user_id).collection('video_transcripts').document(video_id)
-            cache_doc = cache_ref.get()
-
-            if cache_doc.exists:
-                cache_data = cache_doc.to_dict()
-                expires_at = cache_data.get('expires_at')
-
-                # Check if cache is still valid (handle timezone-aware datetime from Firestore)
-                if expires_at:
-                    # Make current time timezone-aware (UTC) to match Firestore timestamp
-                    now_utc = datetime.now(timezone.utc)
-
-                    # If expires_at is naive, make it UTC-aware
-                    if expires_at.tzinfo is None:
-                        expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-                    if expires_at > now_utc:
-                        logger.info(f"✓ Using cached VTT for video {video_id}")
-                        return {
-                            'per_word': cache_data.get('per_word', []),
-                            'segments_with_time': cache_data.get('segments_with_time', []),
-                            'plain_text': cache_data.get('plain_text', ''),
-                            'has_per_word_timestamps': cache_data.get('has_per_word_timestamps', False)
-                        }
-                    else:
-                        logger.info(f"Cache expired for video {video_id}, re-fetching")
-        except Exception as e:
-            logger.warning(f"Could not check cache for video {video_id}: {e}")
+        cached = TranscriptStore.get(video_id, user_id)
+        if cached is not None:
+            logger.info(f"✓ Using cached VTT for video {video_id}")
+            return cached
 
         # Step 2: Fetch VTT from RapidAPI (free, public videos only)
         vtt_content = None
@@ -685,9 +808,12 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
             logger.warning(f"RapidAPI VTT fetch failed for {video_id}: {e}")
 
         # Step 3: Fallback to YouTube API (private/unlisted videos)
+        # Transcripts fetched with the user's own credentials are cached privately for them
+        owner_id = None
         if not vtt_content and user_id:
             logger.info(f"Attempting YouTube API VTT fetch for video {video_id} (250 quota units)")
             vtt_content = self._fetch_vtt_youtube_api(video_id, user_id)
+            owner_id = user_id
 
         if not vtt_content:
             logger.error(f"Failed to fetch VTT for {video_id} from both RapidAPI and YouTube API")
@@ -706,7 +832,8 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
         logger.info(f"First 500 chars of VTT:\n{vtt_content[:500]}")
         logger.info("=" * 80)
 
-        parsed_data = VTTParser.parse_vtt(vtt_content)
+        # Parses (or reuses the stored revision) and caches for every user of this video
+        parsed_data = TranscriptStore.put(video_id, vtt_content, owner_id=owner_id)
 
         logger.info("=" * 80)
         logger.info("PARSED VTT RESULTS:")
@@ -725,26 +852,6 @@ Video Length: {'Short' if is_short else 'Long'}{target_keyword_context}
         logger.info(f"Plain text preview (first 200 chars): {parsed_data['plain_text'][:200]}")
         logger.info("=" * 80)
 
-        # Step 5: Cache parsed data in Firestore (7-day TTL)
-        try:
-            now_utc = datetime.now(timezone.utc)
-            cache_data = {
-                'video_id': video_id,
-                'per_word': parsed_data['per_word'],
-                'segments_with_time': parsed_data['segments_with_time'],
-                'plain_text': parsed_data['plain_text'],
-                'has_per_word_timestamps': parsed_data['has_per_word_timestamps'],
-                'created_at': now_utc,
-                'expires_at': now_utc + timedelta(days=7)
-            }
-
-            cache_ref = db.collection('users').document(user_id).collection('video_transcripts').document(video_id)
-            cache_ref.set(cache_data)
-            logger.info(f"✓ Cached VTT data for video {video_id} (expires in 7 days)")
-
-        except Exception as e:
-            logger.warning(f"Could not cache VTT data for {video_id}: {e}")
-
         return parsed_data
 
     def _generate_recommendations(
@@ -4,11 +4,104 @@ Unified parser that extracts per-word timestamps, segment timestamps, and plain
 """
 import re
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable
 
 logger = logging.getLogger(__name__)
 
 
+# Precompiled patterns shared by every parse
+_CUE_TIMING_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s+-->\s+(\d{2}:\d{2}:\d{2}\.\d{3})')
+# Word spoken before the first inline timestamp, e.g. "new<00:00:07.040>" or " I<00:00:00.280>"
+_PREFIX_WORD_PATTERN = re.compile(r'^\s*([a-zA-Z\']+)<\d{2}:')
+_TIMESTAMP_TAG_PATTERN = re.compile(r'<(\d{2}):(\d{2}):(\d{2})\.(\d{3})>')
+# <c> word with its optional inline timestamp: <00:00:00.280><c> hired</c>
+_C_TAG_PATTERN = re.compile(r'(?:<(\d{2}):(\d{2}):(\d{2})\.(\d{3})>)?<c>\s*([^<]+)</c>')
+
+
+def _tag_seconds(h: str, m: str, s: str, ms: str) -> float:
+    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
+
+
+class _VTTScanner:
+    """
+    Incremental single-pass VTT tokenizer
+
+    Feed lines one at a time (from a string, file or HTTP stream); per-word
+    timestamps and cue segments are collected in the same scan.
+    """
+
+    def __init__(self):
+        self.per_word = []
+        self.segments = []
+        self._cue_start = None
+        self._cue_end = None
+        self._cue_text = []
+        self._cue_has_new_content = False
+
+    def _close_cue(self):
+        # Only keep cues that have NEW content (lines with <c> tags)
+        if self._cue_has_new_content and self._cue_text:
+            self.segments.append({
+                'start': self._cue_start,
+                'end': self._cue_end,
+                'text': ' '.join(self._cue_text)
+            })
+        self._cue_start = None
+        self._cue_text = []
+        self._cue_has_new_content = False
+
+    def feed_line(self, raw_line: str):
+        line = raw_line.strip()
+        in_cue = self._cue_start is not None
+
+        # A blank line or the next timing line ends the current cue
+        if in_cue and (not line or ' --> ' in line):
+            self._close_cue()
+            in_cue = False
+
+        if ' --> ' in line and not in_cue:
+            timing_match = _CUE_TIMING_PATTERN.match(line)
+            if timing_match:
+                self._cue_start, self._cue_end = timing_match.groups()
+
+        if '<c>' not in line:
+            return
+
+        # YouTube VTT shows progressive text building: lines WITH <c> tags are the NEW words
+        # (lines without them repeat the accumulated display text and are skipped)
+        if in_cue:
+            self._cue_has_new_content = True
+
+        prefix_match = _PREFIX_WORD_PATTERN.match(line)
+        if prefix_match:
+            prefix_word = prefix_match.group(1).strip()
+            first_timestamp_match = _TIMESTAMP_TAG_PATTERN.search(line, prefix_match.end(1))
+            if first_timestamp_match:
+                # Use the same timestamp as the following word (slightly earlier)
+                timestamp_seconds = _tag_seconds(*first_timestamp_match.groups()) - 0.1
+                self.per_word.append({
+                    'word': prefix_word,
+                    'start': max(0, timestamp_seconds)  # Don't go negative
+                })
+            if in_cue and prefix_word:
+                self._cue_text.append(prefix_word)
+
+        for match in _C_TAG_PATTERN.finditer(line):
+            h, m, s, ms, raw_word = match.groups()
+            word = raw_word.strip()
+            if h is not None:
+                self.per_word.append({
+                    'word': word,
+                    'start': _tag_seconds(h, m, s, ms)
+                })
+            if in_cue and word:
+                self._cue_text.append(word)
+
+    def finish(self):
+        if self._cue_start is not None:
+            self._close_cue()
+
+
 class VTTParser:
     """Unified VTT parser for all optimization features"""
 
@@ -26,14 +119,25 @@ class VTTParser:
         Returns:
             Dict with all 3 parsed formats
         """
-        try:
-            # Parse per-word timestamps (for captions)
-            per_word = VTTParser._parse_per_word_timestamps(vtt_content)
+        return VTTParser.parse_vtt_lines(vtt_content.split('\n'))
 
-            # Parse segment timestamps (for description/chapters)
-            segments_with_time = VTTParser._parse_segment_timestamps(vtt_content)
+    @staticmethod
+    def parse_vtt_lines(lines: Iterable[str]) -> Dict[str, Any]:
+        """
+        Parse VTT from any iterable of lines in a single pass (e.g. an open file or
+        response.iter_lines(decode_unicode=True)) without holding the raw text in memory
+
+        Returns:
+            Dict with all 3 parsed formats (same shape as parse_vtt)
+        """
+        try:
+            scanner = _VTTScanner()
+            for line in lines:
+                scanner.feed_line(line)
+            scanner.finish()
 
-            # Extract plain text (for title/tags)
+            per_word = scanner.per_word
+            segments_with_time = scanner.segments
             plain_text = VTTParser._extract_plain_text(segments_with_time)
 
             logger.info(f"VTT parsed: {len(per_word)} words, {len(segments_with_time)} segments, {len(plain_text)} chars plain text")
@@ -54,130 +158,6 @@ class VTTParser:
                 'has_per_word_timestamps': False
             }
 
-    @staticmethod
-    def _parse_per_word_timestamps(vtt_content: str) -> List[Dict[str, Any]]:
-        """
-        Extract per-word timestamps from <c> tags
-        Example: <00:00:00.280><c> hired</c> -> {'word': 'hired', 'start': 0.280}
-        Also handles: new<00:00:07.040><c> player</c> (word before timestamp)
-        """
-        words_with_timestamps = []
-
-        lines = vtt_content.split('\n')
-        for line in lines:
-            # Skip if no <c> tags
-            if '<c>' not in line:
-                continue
-
-            # First, check for words BEFORE the first timestamp (e.g., "new<00:00:07.040><c> player</c>" or " I<00:00:00.280><c> hired</c>")
-            # Extract any word that appears before the first < character (including single letters like "I")
-            # Pattern allows optional leading whitespace
-            prefix_word_match = re.search(r'^\s*([a-zA-Z\']+)<\d{2}:', line)
-            if prefix_word_match:
-                prefix_word = prefix_word_match.group(1).strip()
-
-                # Get the timestamp of the FIRST tagged word that follows
-                first_timestamp_match = re.search(r'<(\d{2}):(\d{2}):(\d{2})\.(\d{3})>', line)
-                if first_timestamp_match:
-                    h, m, s, ms = first_timestamp_match.groups()
-                    # Use the same timestamp as the following word (or slightly earlier)
-                    timestamp_seconds = int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0 - 0.1
-                    words_with_timestamps.append({
-                        'word': prefix_word,
-                        'start': max(0, timestamp_seconds)  # Don't go negative
-                    })
-
-            # Then extract all timestamped words: <00:00:00.280><c> hired</c>
-            tagged_pattern = r'<(\d{2}):(\d{2}):(\d{2})\.(\d{3})><c>\s*([^<]+)</c>'
-            tagged_matches = re.findall(tagged_pattern, line)
-
-            for match in tagged_matches:
-                h, m, s, ms, word = match
-                timestamp_seconds = int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
-                words_with_timestamps.append({
-                    'word': word.strip(),
-                    'start': timestamp_seconds
-                })
-
-        return words_with_timestamps
-
-    @staticmethod
-    def _parse_segment_timestamps(vtt_content: str) -> List[Dict[str, Any]]:
-        """
-        Extract segment timestamps and text (for description/chapters)
-
-        YouTube VTT shows progressive text building:
-        - Lines WITH <c> tags = NEW words being added (extract these)
-        - Lines WITHOUT <c> tags = accumulated display text (skip to avoid duplicates)
-
-        Example VTT:
-        00:00:02.000 --> 00:00:03.310
-        I hired the coach in Clash Royale and
-        he's<00:00:02.159><c> going</c><00:00:02.320><c> to</c>
-
-        We extract: "he's going to" (only NEW content with <c> tags)
-        """
-        segments = []
-        lines = vtt_content.split('\n')
-
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-
-            # Look for timestamp line (contains " --> ")
-            if ' --> ' in line:
-                # Parse timestamp
-                timestamp_match = re.match(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s+-->\s+(\d{2}:\d{2}:\d{2}\.\d{3})', line)
-
-                if timestamp_match:
-                    start_time = timestamp_match.group(1)
-                    end_time = timestamp_match.group(2)
-
-                    # Get text from next lines (until blank line or next timestamp)
-                    text_parts = []
-                    has_new_content = False
-                    i += 1
-
-                    while i < len(lines):
-                        next_line = lines[i].strip()
-
-                        # Stop at blank line or next timestamp
-                        if not next_line or ' --> ' in next_line:
-                            break
-
-                        # ONLY process lines that have <c> tags (new content being added)
-                        if '<c>' in next_line:
-                            has_new_content = True
-
-                            # Extract text before first timestamp tag (if any) - e.g., "new<00:00:07.040>" or " I<00:00:00.280>"
-                            # This handles prefix words that appear before the first timestamp
-                            prefix_match = re.search(r'^\s*([a-zA-Z\']+)<\d{2}:', next_line)
-                            if prefix_match:
-                                prefix_text = prefix_match.group(1).strip()
-                                if prefix_text:
-                                    text_parts.append(prefix_text)
-
-                            # Extract all words inside <c> tags
-                            c_tag_words = re.findall(r'<c>\s*([^<]+)</c>', next_line)
-                            text_parts.extend([w.strip() for w in c_tag_words if w.strip()])
-
-                        i += 1
-
-                    # Only add segments that have NEW content (lines with <c> tags)
-                    if has_new_content and text_parts:
-                        text = ' '.join(text_parts)
-                        segments.append({
-                            'start': start_time,
-                            'end': end_time,
-                            'text': text
-                        })
-
-                    continue
-
-            i += 1
-
-        return segments
-
     @staticmethod
     def _extract_plain_text(segments_with_time: List[Dict[str, Any]]) -> str:
         """
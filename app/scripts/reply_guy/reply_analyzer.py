@@ -4,13 +4,24 @@ Analyzes accounts and finds reply opportunities
 """
 import os
 import requests
-import time
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Any
+from app.utils.rate_limiter import get_rate_limiter
+from .timeline_cache import TimelineCache
 
 logger = logging.getLogger(__name__)
 
+# Shared request budget for the X RapidAPI host (all analyzers in the process)
+X_RAPID_API_RATE_PER_SECOND = float(os.environ.get('X_RAPID_API_RATE_PER_SECOND', '1'))
+X_RAPID_API_BURST = float(os.environ.get('X_RAPID_API_BURST', '3'))
+# Concurrent timeline fetches per analysis; the token bucket sets the actual pace
+ACCOUNT_FETCH_MAX_WORKERS = 8
+# 429 responses are retried after backing off and don't count as failed attempts
+MAX_THROTTLED_RETRIES = 4
+X_RAPID_API_TIMEOUT = 20
+
 class ReplyAnalyzer:
     """Analyzes accounts and finds reply opportunities"""
     
@@ -34,10 +45,12 @@ class ReplyAnalyzer:
             # Store profile pictures by account to ensure consistency
             account_profiles = {}
 
-            for account in accounts:
-                logger.info(f"Fetching tweets for @{account}")
-                tweets = self.get_tweets(account)
+            # Fetch all timelines concurrently (paced by the shared rate limiter), then process in list order
+            max_workers = max(1, min(ACCOUNT_FETCH_MAX_WORKERS, len(accounts)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched_timelines = list(executor.map(self.get_tweets, accounts))
 
+            for account, tweets in zip(accounts, fetched_timelines):
                 if tweets:
                     # Filter out RTs and limit to 10 most recent tweets for faster processing
                     filtered_tweets = [
@@ -96,9 +109,6 @@ class ReplyAnalyzer:
                         logger.info(f"Found {len(processed_tweets)} tweets for @{account}")
                         all_tweets.extend(processed_tweets)
 
-                # Rate limiting - increased to avoid 429 errors
-                time.sleep(2)
-            
             logger.info(f"Total tweets collected: {len(all_tweets)}")
             
             # Score and rank tweets
@@ -120,8 +130,23 @@ class ReplyAnalyzer:
             return None
     
     def get_tweets(self, screen_name: str) -> List[Dict]:
-        """Fetch tweets using RapidAPI"""
+        """
+        Get an account's recent tweets, reusing timelines fetched for other lists
+
+        Served from the shared TimelineCache when fresh; otherwise fetched once
+        even if several analyses ask for the same account at the same time.
+        """
+        return TimelineCache.get_or_fetch(screen_name, self._fetch_tweets)
+
+    def _fetch_tweets(self, screen_name: str) -> List[Dict]:
+        """
+        Fetch tweets using RapidAPI
+
+        Every request waits on the process-wide token bucket for the X RapidAPI host;
+        a 429 response slows that bucket down for all concurrent fetches.
+        """
         url = f"https://{self.x_api_host}/timeline.php"
+        limiter = get_rate_limiter(self.x_api_host, X_RAPID_API_RATE_PER_SECOND, X_RAPID_API_BURST)
         
         # Remove @ symbol if present
         if screen_name.startswith('@'):
@@ -136,11 +161,26 @@ class ReplyAnalyzer:
         
         # Try up to 2 times
         max_attempts = 2
-        for attempt in range(max_attempts):
+        attempt = 0
+        throttled_retries = 0
+        while attempt < max_attempts:
             try:
                 logger.debug(f"Fetching tweets for @{screen_name} (attempt {attempt+1}/{max_attempts})")
-                response = requests.get(url, headers=headers, params=params)
+                limiter.acquire()
+                response = requests.get(url, headers=headers, params=params, timeout=X_RAPID_API_TIMEOUT)
+
+                if response.status_code == 429:
+                    if throttled_retries >= MAX_THROTTLED_RETRIES:
+                        logger.error(f"Rate limited fetching tweets for @{screen_name}, giving up")
+                        break
+                    throttled_retries += 1
+                    new_rate = limiter.throttled(self._parse_retry_after(response.headers.get('Retry-After')))
+                    logger.warning(f"Rate limited fetching tweets for @{screen_name}, "
+                                   f"backing off to {new_rate:.2f} requests/s")
+                    continue
+
                 response.raise_for_status()
+                limiter.succeeded()
                 data = response.json()
                 tweets = data.get('timeline', [])
                 
@@ -165,20 +205,24 @@ class ReplyAnalyzer:
                     logger.debug(f"Successfully fetched {len(tweets)} tweets for @{screen_name}")
                     return tweets
                 
-                # If no tweets but we have attempts left, wait and retry
+                # If no tweets but we have attempts left, retry (the limiter paces the retry)
                 if attempt < max_attempts - 1:
                     logger.debug(f"No tweets found for @{screen_name}, retrying...")
-                    time.sleep(0.5)
                 
             except Exception as e:
                 logger.error(f"Error fetching tweets for @{screen_name} (attempt {attempt+1}): {str(e)}")
-                
-                # If we have attempts left, wait and retry
-                if attempt < max_attempts - 1:
-                    time.sleep(0.5)
+
+            attempt += 1
         
         logger.warning(f"All attempts to fetch tweets for @{screen_name} failed")
         return []
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """Seconds from a Retry-After header (HTTP dates are ignored)"""
+        try:
+            return float(value) if value else None
+        except (TypeError, ValueError):
+            return None
     
     def process_tweet(self, tweet: Dict, account_profile: Dict = None) -> Dict:
         """Process a tweet to extract and format necessary data with proper newline handling"""
@@ -6,6 +6,7 @@ import os
 import logging
 from typing import Optional, Dict, List
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt, get_prompt_template
 
 from firebase_admin import firestore
 from app.system.ai_provider.ai_provider import get_ai_provider
@@ -15,46 +16,8 @@ from app.system.ai_provider.ai_provider import get_ai_provider
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str, section: str = None) -> str:
-    """Load a prompt from text file, optionally extracting a specific section"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # If no section specified, return full content
-        if not section:
-            return content.strip()
-
-        # Extract specific section
-        section_marker = f"############# {section} #############"
-        if section_marker not in content:
-            logger.error(f"Section '{section}' not found in {filename}")
-            raise ValueError(f"Section '{section}' not found")
-
-        # Find the start of this section
-        start_idx = content.find(section_marker)
-        if start_idx == -1:
-            raise ValueError(f"Section '{section}' not found")
-
-        # Skip past the section marker and newline
-        content_start = start_idx + len(section_marker)
-        if content_start < len(content) and content[content_start] == '\n':
-            content_start += 1
-
-        # Find the next section marker (if any)
-        next_section = content.find("\n#############", content_start)
-
-        if next_section == -1:
-            # This is the last section
-            section_content = content[content_start:]
-        else:
-            # Extract until next section
-            section_content = content[content_start:next_section]
-
-        return section_content.strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}, section {section}: {e}")
-        raise
+    """Load a prompt from the prompt registry, optionally extracting a specific section"""
+    return get_prompt(PROMPTS_DIR, filename, section)
 logger = logging.getLogger(__name__)
 
 class ReplyGenerator:
@@ -437,7 +400,7 @@ class ReplyGenerator:
         try:
             # Create a prompt for multiple GIF query generation
             system_prompt = load_prompt('prompts.txt', 'GIF_QUERY_SYSTEM')
-            user_prompt_template = load_prompt('prompts.txt', 'GIF_QUERY_USER')
+            user_prompt_template = get_prompt_template(PROMPTS_DIR, 'prompts.txt', 'GIF_QUERY_USER')
             prompt = user_prompt_template.format(
                 tweet_text=tweet_text[:200],
                 reply_text=reply_text,
@@ -616,7 +579,7 @@ class ReplyGenerator:
                 reply_examples_text += f"{i}. {reply}\n"
 
             # Load brand voice context template
-            brand_voice_template = load_prompt('prompts.txt', 'BRAND_VOICE_CONTEXT')
+            brand_voice_template = get_prompt_template(PROMPTS_DIR, 'prompts.txt', 'BRAND_VOICE_CONTEXT')
             brand_voice_context = brand_voice_template.format(
                 screen_name=screen_name,
                 reply_examples=reply_examples_text
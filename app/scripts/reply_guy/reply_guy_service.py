@@ -2,8 +2,9 @@
 Reply Guy Service - Complete version with original functionality + mention filtering and improvements
 """
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
 import uuid
 
 from firebase_admin import firestore
@@ -13,6 +14,12 @@ from .reply_generator import ReplyGenerator
 
 logger = logging.getLogger(__name__)
 
+# Analyses are stored as a display-ready, score-ordered list split across page documents
+OPPORTUNITY_INDEX_VERSION = 1
+OPPORTUNITY_PAGE_SIZE = 50
+OPPORTUNITY_RECENCY_HOURS = 24
+FIRESTORE_BATCH_LIMIT = 500
+
 class ReplyGuyService:
     """Main service for Reply Guy functionality"""
     
@@ -234,6 +241,7 @@ class ReplyGuyService:
             
             # Also delete any analysis for this list
             analysis_ref = self.db.collection('users').document(str(user_id)).collection('reply_guy').document('current_analysis').collection('analyses').document(list_id)
+            self._delete_opportunity_pages(analysis_ref)
             analysis_ref.delete()
             
             return True
@@ -297,7 +305,10 @@ class ReplyGuyService:
             return False
     
     def get_current_analysis(self, user_id: str, list_id: str, list_type: str, limit: Optional[int] = None, offset: int = 0) -> Optional[Dict]:
-        """Get current analysis for a list with proper newline conversion and mention filtering
+        """Get current analysis for a list, reading only the opportunity pages the slice needs
+
+        Mention filtering and newline conversion are done when the analysis is saved;
+        here only tweets that have aged past the recency window are skipped.
 
         Args:
             user_id: User ID
@@ -314,37 +325,11 @@ class ReplyGuyService:
                 
                 if doc.exists:
                     data = doc.to_dict()
-                    
-                    # Filter tweets by recency (last 24h by default)
-                    tweets = data.get('tweet_opportunities', [])
-                    filtered_tweets = self._filter_recent_tweets(tweets, hours=24)
-                    
-                    # APPLY MENTION FILTERING - exclude tweets starting with @
-                    mention_filtered_tweets = []
-                    for tweet in filtered_tweets:
-                        tweet_text = tweet.get('text', '').strip()
-                        # Convert _new_line_ back to actual newlines for filtering check
-                        tweet_text_for_check = tweet_text.replace('_new_line_', '\n').strip()
-                        
-                        # Skip tweets that start with @ (mentions)
-                        if not tweet_text_for_check.startswith('@'):
-                            mention_filtered_tweets.append(tweet)
-                        else:
-                            logger.debug(f"Filtered out mention tweet from default list: {tweet_text_for_check[:50]}...")
-                    
-                    # Proper newline conversion for display - convert _new_line_ to actual <br> tags
-                    for tweet in mention_filtered_tweets:
-                        if 'text' in tweet:
-                            # Convert our standard marker to <br> tags for HTML display
-                            tweet['text'] = tweet['text'].replace('_new_line_', '<br>')
-
-                    # PAGINATION: Apply limit and offset if specified
-                    total_count = len(mention_filtered_tweets)
+                    paginated_tweets, total_count = self._read_opportunities(doc_ref, data, limit, offset)
+
                     if limit is not None:
-                        paginated_tweets = mention_filtered_tweets[offset:offset + limit]
                         logger.info(f"Returning {len(paginated_tweets)} of {total_count} opportunities (offset={offset}, limit={limit}) for default list {list_id}")
                     else:
-                        paginated_tweets = mention_filtered_tweets
                         logger.info(f"Found {total_count} valid recent opportunities for default list {list_id}")
 
                     return {
@@ -394,36 +379,11 @@ class ReplyGuyService:
                             doc_ref.update({'timestamp': datetime.now()})
                             data['timestamp'] = datetime.now()
 
-                    # Filter tweets by recency (last 24h by default)
-                    tweets = data.get('tweet_opportunities', [])
-                    filtered_tweets = self._filter_recent_tweets(tweets, hours=24)
-                    
-                    # APPLY MENTION FILTERING - exclude tweets starting with @
-                    mention_filtered_tweets = []
-                    for tweet in filtered_tweets:
-                        tweet_text = tweet.get('text', '').strip()
-                        # Convert _new_line_ back to actual newlines for filtering check
-                        tweet_text_for_check = tweet_text.replace('_new_line_', '\n').strip()
-                        
-                        # Skip tweets that start with @ (mentions)
-                        if not tweet_text_for_check.startswith('@'):
-                            mention_filtered_tweets.append(tweet)
-                        else:
-                            logger.debug(f"Filtered out mention tweet from custom list: {tweet_text_for_check[:50]}...")
-                    
-                    # Proper newline conversion for display - convert _new_line_ to actual <br> tags
-                    for tweet in mention_filtered_tweets:
-                        if 'text' in tweet:
-                            # Convert our standard marker to <br> tags for HTML display
-                            tweet['text'] = tweet['text'].replace('_new_line_', '<br>')
-
-                    # PAGINATION: Apply limit and offset if specified
-                    total_count = len(mention_filtered_tweets)
+                    paginated_tweets, total_count = self._read_opportunities(doc_ref, data, limit, offset)
+
                     if limit is not None:
-                        paginated_tweets = mention_filtered_tweets[offset:offset + limit]
                         logger.info(f"Returning {len(paginated_tweets)} of {total_count} opportunities (offset={offset}, limit={limit}) for custom list {list_id}")
                     else:
-                        paginated_tweets = mention_filtered_tweets
                         logger.info(f"Found {total_count} valid recent opportunities for custom list {list_id}")
 
                     return {
@@ -477,32 +437,30 @@ class ReplyGuyService:
                 if list_type == 'default':
                     # Save default list analysis to global collection for all users to access
                     analysis_ref = self.db.collection('default_list_analyses').document(list_id)
-                    analysis_ref.set({
+                    saved_count = self._save_opportunity_index(analysis_ref, {
                         'list_id': list_id,
                         'list_name': list_name,
-                        'tweet_opportunities': analysis_data['tweet_opportunities'],
                         'last_updated': datetime.now(),
                         'analyzed_accounts': len(accounts),
                         'parameters': {
                             'time_range': time_range,
                             'account_count': len(accounts)
                         }
-                    })
-                    logger.info(f"Saved default list analysis for {list_id} with {len(analysis_data['tweet_opportunities'])} opportunities")
+                    }, analysis_data['tweet_opportunities'])
+                    logger.info(f"Saved default list analysis for {list_id} with {saved_count} opportunities")
                 else:
                     # Save custom list analysis to user's collection
                     analysis_ref = self.db.collection('users').document(str(user_id)).collection('reply_guy').document('current_analysis').collection('analyses').document(list_id)
-                    analysis_ref.set({
+                    self._save_opportunity_index(analysis_ref, {
                         'list_id': list_id,
                         'list_type': list_type,
                         'list_name': list_name,
-                        'tweet_opportunities': analysis_data['tweet_opportunities'],
                         'timestamp': datetime.now(),
                         'parameters': {
                             'time_range': time_range,
                             'account_count': len(accounts)
                         }
-                    })
+                    }, analysis_data['tweet_opportunities'])
 
                 return list_id
             
@@ -641,28 +599,177 @@ class ReplyGuyService:
     
     # UTILITY METHODS
     
-    def _filter_recent_tweets(self, tweets: List[Dict], hours: int = 24) -> List[Dict]:
-        """Filter tweets to show only recent ones"""
-        if not tweets:
-            return []
-        
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        filtered_tweets = []
-        
-        for tweet in tweets:
-            try:
-                created_at = tweet.get('created_at')
-                if created_at:
-                    # Parse Twitter date format
-                    tweet_date = datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").replace(tzinfo=None)
-                    if tweet_date > cutoff_time:
-                        filtered_tweets.append(tweet)
-                else:
-                    # Include tweets without dates
-                    filtered_tweets.append(tweet)
-            except Exception as e:
-                logger.error(f"Error parsing tweet date: {str(e)}")
-                # Include tweets with unparseable dates
-                filtered_tweets.append(tweet)
-        
-        return filtered_tweets
\ No newline at end of file
+    def _tweet_timestamp(self, tweet: Dict) -> Optional[float]:
+        """Epoch seconds of a tweet's created_at (None if missing or unparseable)"""
+        created_at = tweet.get('created_at')
+        if not created_at:
+            return None
+        try:
+            # Parse Twitter date format
+            return datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").timestamp()
+        except Exception as e:
+            logger.error(f"Error parsing tweet date: {str(e)}")
+            return None
+
+    def _prepare_opportunities(self, tweets: List[Dict], hours: int = OPPORTUNITY_RECENCY_HOURS) -> Tuple[List[Dict], List[Optional[float]]]:
+        """
+        Turn scored tweets into the display-ready list (done once, when an analysis is saved)
+
+        Drops tweets older than `hours` and mentions (tweets starting with @), and converts
+        _new_line_ markers to <br> tags. Tweets without a parseable date are kept.
+
+        Returns:
+            (display tweets in score order, matching list of created_at epoch seconds)
+        """
+        cutoff_ts = time.time() - hours * 3600
+        display_tweets = []
+        created_timestamps = []
+
+        for tweet in tweets or []:
+            created_ts = self._tweet_timestamp(tweet)
+            if created_ts is not None and created_ts <= cutoff_ts:
+                continue
+
+            tweet_text = tweet.get('text', '').strip()
+            # Convert _new_line_ back to actual newlines for filtering check
+            if tweet_text.replace('_new_line_', '\n').strip().startswith('@'):
+                logger.debug(f"Filtered out mention tweet: {tweet_text[:50]}...")
+                continue
+
+            display_tweet = dict(tweet)
+            if 'text' in display_tweet:
+                # Convert our standard marker to <br> tags for HTML display
+                display_tweet['text'] = display_tweet['text'].replace('_new_line_', '<br>')
+
+            display_tweets.append(display_tweet)
+            created_timestamps.append(created_ts)
+
+        return display_tweets, created_timestamps
+
+    def _page_doc_id(self, revision: str, page_number: int) -> str:
+        return f"{revision}_{page_number:04d}"
+
+    def _delete_opportunity_pages(self, analysis_ref, keep_revisions: Tuple[Optional[str], ...] = ()):
+        """Delete an analysis' page documents (except those of `keep_revisions`)"""
+        keep_prefixes = tuple(f"{revision}_" for revision in keep_revisions if revision)
+        batch = self.db.batch()
+        pending = 0
+        for page_doc in analysis_ref.collection('pages').select([]).stream():
+            if keep_prefixes and page_doc.id.startswith(keep_prefixes):
+                continue
+            batch.delete(page_doc.reference)
+            pending += 1
+            if pending >= FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+
+    def _save_opportunity_index(self, analysis_ref, fields: Dict, tweet_opportunities: List[Dict]) -> int:
+        """
+        Save an analysis as paged, display-ready opportunities
+
+        Pages are written under a new revision first, then the analysis document is
+        switched to it, so readers never see a mix of old and new pages. The
+        previous revision's pages are kept for readers that loaded the analysis
+        document before the switch; the next save deletes them.
+
+        Returns:
+            Number of opportunities saved
+        """
+        display_tweets, created_timestamps = self._prepare_opportunities(tweet_opportunities)
+        revision = uuid.uuid4().hex[:12]
+        pages_ref = analysis_ref.collection('pages')
+
+        # Without the previous revision, cleanup waits for the next save
+        previous_revision = None
+        cleanup_pages = True
+        try:
+            previous_doc = analysis_ref.get(['revision'])
+            if previous_doc.exists:
+                previous_revision = previous_doc.to_dict().get('revision')
+        except Exception as e:
+            logger.warning(f"Could not read previous opportunity revision: {str(e)}")
+            cleanup_pages = False
+
+        batch = self.db.batch()
+        pending = 0
+        for page_number, page_start in enumerate(range(0, len(display_tweets), OPPORTUNITY_PAGE_SIZE)):
+            batch.set(pages_ref.document(self._page_doc_id(revision, page_number)), {
+                'revision': revision,
+                'page': page_number,
+                'tweets': display_tweets[page_start:page_start + OPPORTUNITY_PAGE_SIZE]
+            })
+            pending += 1
+            if pending >= FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+
+        analysis_ref.set({
+            **fields,
+            'index_version': OPPORTUNITY_INDEX_VERSION,
+            'revision': revision,
+            'page_size': OPPORTUNITY_PAGE_SIZE,
+            'total_count': len(display_tweets),
+            # Per-opportunity created_at (score order) so reads can skip aged tweets without loading pages
+            'created_ts': created_timestamps
+        })
+
+        try:
+            if cleanup_pages:
+                self._delete_opportunity_pages(analysis_ref, keep_revisions=(revision, previous_revision))
+        except Exception as e:
+            logger.warning(f"Could not delete old opportunity pages: {str(e)}")
+
+        return len(display_tweets)
+
+    def _read_opportunities(self, analysis_ref, data: Dict, limit: Optional[int], offset: int) -> Tuple[List[Dict], int]:
+        """
+        Read one slice of a saved analysis
+
+        Returns:
+            (opportunities in the slice, total opportunities still within the recency window)
+        """
+        if data.get('index_version') != OPPORTUNITY_INDEX_VERSION:
+            # Analysis saved before the paged index - prepare it on the fly
+            display_tweets, _ = self._prepare_opportunities(data.get('tweet_opportunities', []))
+            total_count = len(display_tweets)
+            if limit is not None:
+                return display_tweets[offset:offset + limit], total_count
+            return display_tweets, total_count
+
+        cutoff_ts = time.time() - OPPORTUNITY_RECENCY_HOURS * 3600
+        live_positions = [
+            position for position, created_ts in enumerate(data.get('created_ts', []))
+            if created_ts is None or created_ts > cutoff_ts
+        ]
+        total_count = len(live_positions)
+        selected = live_positions[offset:offset + limit] if limit is not None else live_positions
+        if not selected:
+            return [], total_count
+
+        revision = data['revision']
+        page_size = data.get('page_size', OPPORTUNITY_PAGE_SIZE)
+        pages_ref = analysis_ref.collection('pages')
+        page_refs = [
+            pages_ref.document(self._page_doc_id(revision, page_number))
+            for page_number in sorted({position // page_size for position in selected})
+        ]
+
+        pages = {}
+        for page_doc in self.db.get_all(page_refs):
+            if page_doc.exists:
+                pages[page_doc.id] = page_doc.to_dict().get('tweets', [])
+
+        tweets = []
+        for position in selected:
+            page = pages.get(self._page_doc_id(revision, position // page_size), [])
+            index_in_page = position % page_size
+            if index_in_page < len(page):
+                tweets.append(page[index_in_page])
+
+        return tweets, total_count
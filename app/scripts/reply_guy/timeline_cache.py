@@ -0,0 +1,179 @@
+"""
+Timeline Cache
+Shared cache of raw X timelines, keyed by screen name, so overlapping Reply Guy
+lists (custom lists of different users and the default lists) reuse one fetch
+
+Timelines are kept in a process-wide LRU and in Firestore for a short TTL.
+Concurrent requests for the same account are collapsed into a single API call.
+"""
+import json
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_COLLECTION = 'reply_guy_timelines'
+TIMELINE_CACHE_TTL = timedelta(minutes=10)
+TIMELINE_MEMORY_CACHE_SIZE = 256
+# How long a concurrent caller waits for another thread's fetch of the same account
+TIMELINE_FETCH_WAIT_SECONDS = 60
+
+# Process-wide LRU: screen name -> {'payload': bytes, 'expires_at': datetime}
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+# Fetches currently in progress: screen name -> _Flight
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _Flight:
+    """A timeline fetch other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload = None
+
+
+def _encode_timeline(tweets: List[Dict]) -> bytes:
+    # Stored as a blob: raw API tweets can contain nested arrays Firestore can't hold
+    return zlib.compress(json.dumps(tweets, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def _decode_timeline(payload: bytes) -> List[Dict]:
+    # Decoded per caller so no two analyses share (and mutate) the same tweet dicts
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+class TimelineCache:
+    """Process-wide and Firestore-backed cache of account timelines"""
+
+    @staticmethod
+    def _cache_key(screen_name: str) -> str:
+        return screen_name.lstrip('@').lower()
+
+    @staticmethod
+    def _remember(key: str, record: Dict):
+        with _memory_cache_lock:
+            _memory_cache[key] = record
+            _memory_cache.move_to_end(key)
+            while len(_memory_cache) > TIMELINE_MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+
+    @staticmethod
+    def _recall_payload(key: str) -> Optional[bytes]:
+        """Fresh payload from the process-wide LRU"""
+        now = datetime.now(timezone.utc)
+        with _memory_cache_lock:
+            record = _memory_cache.get(key)
+            if record is None:
+                return None
+            if record['expires_at'] > now:
+                _memory_cache.move_to_end(key)
+                return record['payload']
+            del _memory_cache[key]
+            return None
+
+    @staticmethod
+    def _load_payload(key: str) -> Optional[bytes]:
+        """Fresh cached payload for an account (memory first, then Firestore)"""
+        payload = TimelineCache._recall_payload(key)
+        if payload is not None:
+            return payload
+
+        now = datetime.now(timezone.utc)
+        try:
+            from app.system.services.firebase_service import db
+
+            doc = db.collection(TIMELINE_COLLECTION).document(key).get()
+            if not doc.exists:
+                return None
+
+            doc_data = doc.to_dict()
+            expires_at = doc_data.get('expires_at')
+            if expires_at is not None and expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if not expires_at or expires_at <= now:
+                return None
+
+            TimelineCache._remember(key, {'payload': doc_data['payload'], 'expires_at': expires_at})
+            return doc_data['payload']
+
+        except Exception as e:
+            logger.warning(f"Could not read timeline cache for @{key}: {e}")
+            return None
+
+    @staticmethod
+    def _store_payload(key: str, payload: bytes, tweet_count: int):
+        now = datetime.now(timezone.utc)
+        expires_at = now + TIMELINE_CACHE_TTL
+        TimelineCache._remember(key, {'payload': payload, 'expires_at': expires_at})
+
+        try:
+            from app.system.services.firebase_service import db
+
+            db.collection(TIMELINE_COLLECTION).document(key).set({
+                'screen_name': key,
+                'payload': payload,
+                'tweet_count': tweet_count,
+                'fetched_at': now,
+                'expires_at': expires_at
+            })
+        except Exception as e:
+            logger.warning(f"Could not cache timeline for @{key}: {e}")
+
+    @staticmethod
+    def get_or_fetch(screen_name: str, fetch: Callable[[str], List[Dict]]) -> List[Dict]:
+        """
+        Get an account's timeline from the cache, fetching it at most once if missing
+
+        If another thread is already fetching the same account, waits for its result
+        instead of making a second API call. Empty results (failed fetches) are not cached.
+
+        Args:
+            screen_name: X screen name (with or without @)
+            fetch: Called with the screen name to fetch the timeline from the API
+
+        Returns:
+            List of raw tweet dicts (a private copy for this caller)
+        """
+        key = TimelineCache._cache_key(screen_name)
+
+        payload = TimelineCache._load_payload(key)
+        if payload is not None:
+            logger.debug(f"Timeline cache hit for @{key}")
+            return _decode_timeline(payload)
+
+        with _in_flight_lock:
+            flight = _in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                _in_flight[key] = flight
+
+        if not is_leader:
+            logger.debug(f"Waiting for in-flight timeline fetch of @{key}")
+            if flight.done.wait(TIMELINE_FETCH_WAIT_SECONDS):
+                return _decode_timeline(flight.payload) if flight.payload is not None else []
+            logger.warning(f"Timed out waiting for timeline fetch of @{key}, fetching directly")
+            return fetch(screen_name)
+
+        try:
+            # Another fetch may have finished between the cache check and taking the lead
+            payload = TimelineCache._recall_payload(key)
+            if payload is not None:
+                return _decode_timeline(payload)
+
+            tweets = fetch(screen_name)
+            if tweets:
+                flight.payload = _encode_timeline(tweets)
+                TimelineCache._store_payload(key, flight.payload, len(tweets))
+            return tweets or []
+        finally:
+            with _in_flight_lock:
+                _in_flight.pop(key, None)
+            flight.done.set()
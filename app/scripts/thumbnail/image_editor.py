@@ -9,6 +9,7 @@ import base64
 import requests
 import logging
 from pathlib import Path
+from app.utils.prompt_registry import get_prompt
 from datetime import datetime
 from firebase_admin import storage as firebase_storage
 from firebase_admin import firestore
@@ -23,14 +24,8 @@ import fal_client
 PROMPTS_DIR = Path(__file__).parent / 'prompts'
 
 def load_prompt(filename: str) -> str:
-    """Load a prompt from text file"""
-    try:
-        prompt_path = PROMPTS_DIR / filename
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        logger.error(f"Error loading prompt {filename}: {e}")
-        raise
+    """Load a prompt from the prompt registry"""
+    return get_prompt(PROMPTS_DIR, filename)
 # Load environment variables
 load_dotenv()
 
@@ -101,7 +101,9 @@ function initializeAnalytics() {
         all: [],
         currentPage: 1,
         itemsPerPage: 12,
-        currentFilter: 'all'
+        currentFilter: 'all',
+        // cursors[i] is the server cursor that continues to page i + 1
+        cursors: [null]
     };
     let charts = {};
     
@@ -800,6 +802,7 @@ function initializeAnalytics() {
     function loadXPosts(filter) {
         xPostsData.currentFilter = filter;
         xPostsData.currentPage = 1;
+        xPostsData.cursors = [null];
 
         fetch(`/analytics/x/posts-paginated?page=1&per_page=${xPostsData.itemsPerPage}&filter=${filter}`, {
             credentials: 'include'
@@ -807,6 +810,7 @@ function initializeAnalytics() {
             .then(response => response.json())
             .then(data => {
                 if (!data.error) {
+                    xPostsData.cursors[1] = data.next_cursor || null;
                     xPostsData.all = data.posts || [];
                     renderXPosts();
                     renderXPostsPagination(data.total_posts, data.total_pages);
@@ -854,13 +858,16 @@ function initializeAnalytics() {
     window.changePage = function(page) {
         if (page < 1) return;
         xPostsData.currentPage = page;
+        const cursor = xPostsData.cursors[page - 1];
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
         
-        fetch(`/analytics/x/posts-paginated?page=${page}&per_page=${xPostsData.itemsPerPage}&filter=${xPostsData.currentFilter}`, {
+        fetch(`/analytics/x/posts-paginated?page=${page}&per_page=${xPostsData.itemsPerPage}&filter=${xPostsData.currentFilter}${cursorParam}`, {
             credentials: 'include'
         })
             .then(response => response.json())
             .then(data => {
                 if (!data.error) {
+                    xPostsData.cursors[page] = data.next_cursor || null;
                     xPostsData.all = data.posts || [];
                     renderXPosts();
                     renderXPostsPagination(data.total_posts, data.total_pages);
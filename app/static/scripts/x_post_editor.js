@@ -53,6 +53,7 @@
         hasPremium: window.hasPremium || false,
         totalCount: 0,
         hasMore: false,
+        nextCursor: null,
         isLoadingMore: false,
         isCreatingDraft: false
     };
@@ -151,6 +152,7 @@
                 state.loadedCount = data.loaded_count;
                 state.totalCount = data.total_count;
                 state.hasMore = data.has_more;
+                state.nextCursor = data.next_cursor || null;
                 
                 renderDrafts(data.drafts || []);
                 updateLoadMoreButton(); // Add this to show the button after initial load
@@ -235,13 +237,15 @@
             loadMoreText.style.display = 'none';
             loadMoreSpinner.style.display = 'flex';
             
-            const response = await fetch(`/x_post_editor/drafts?offset=${state.loadedCount}&limit=10`);
+            const cursorParam = state.nextCursor ? `&cursor=${encodeURIComponent(state.nextCursor)}` : '';
+            const response = await fetch(`/x_post_editor/drafts?offset=${state.loadedCount}&limit=10${cursorParam}`);
             const data = await response.json();
             
             if (data.success && data.drafts && data.drafts.length > 0) {
                 // Update state
                 state.loadedCount = data.loaded_count;
                 state.hasMore = data.has_more;
+                state.nextCursor = data.next_cursor || null;
                 
                 // Append new drafts
                 renderDrafts(data.drafts, true);
@@ -12,9 +12,12 @@ from functools import wraps
 import jwt
 import logging
 import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from app.system.auth.supabase import verify_supabase_token
-from google.cloud.firestore_v1.base_query import FieldFilter
 
 logger = logging.getLogger('auth_middleware')
 
@@ -27,6 +30,73 @@ COOKIE_HTTPONLY = True  # Not accessible from JavaScript
 COOKIE_SAMESITE = "Lax"  # Prevents CSRF, allows links
 COOKIE_MAX_AGE = 60 * 60 * 24 * 7  # 7 days
 
+# Paths that skip auth entirely (webhooks, callbacks, cron)
+SYSTEM_PATH_PREFIXES = ('/payment/webhook', '/music/suno/callback', '/cron/')
+
+# Define public paths (no authentication required) - exact matches
+PUBLIC_PATHS = [
+    '/auth/login',
+    '/auth/register',
+    '/auth/forgot-password',  # Allow access to forgot password page
+    '/auth/reset-password',   # Allow access to reset password page
+    '/auth/callback',
+    '/auth/session',
+    '/api/check-auth',
+    '/config/public-keys',
+    '/privacy-policy',
+    '/terms-conditions',
+    '/sitemap.xml',  # Allow access to sitemap.xml at root
+    '/robots.txt',   # Also allow robots.txt
+    '/favicon.ico',  # Allow access to favicon at root for browsers/crawlers
+    '/shared/note/',  # Allow public access to shared notes
+]
+
+# Define guest-accessible paths and API endpoints - prefix matches
+GUEST_ACCESSIBLE_PATHS = [
+    '/',  # Home page accessible to everyone (shows different content based on auth)
+    '/create-meme/',
+    '/create-meme/api/templates',
+    '/create-meme/api/trending-templates',
+    '/create-meme/api/meme-db-templates',
+    '/create-meme/api/template-details/',
+    '/meme-3-2-1/',  # Add Meme 3-2-1 as guest accessible
+    '/gifs/',  # Add GIFs as guest accessible
+    '/gifs/api/search',
+    '/gifs/api/trending',
+    '/gifs/api/categories',
+    '/gifs/api/category/',
+    '/gifs/api/search-suggestions',
+    '/meme-to-video/',  # Add Meme to Video as guest accessible
+    '/trending-x/',  # Add Trending X as guest accessible
+    '/trending-x/api/trends/',  # Allow guest access to view trending data
+    '/trending-x/api/countries',  # Allow guest access to country list
+    '/saved/',  # Add Saved Memes as guest accessible
+    '/blog/',  # Add Blog as guest accessible for SEO
+    '/player-stats/',  # Add Player Stats as guest accessible
+    '/player-stats/api/',  # Allow guest access to player stats API
+]
+
+# Compiled once at import: set lookup for public paths, a single anchored
+# regex alternation for guest prefixes (replaces per-request linear scans)
+_PUBLIC_PATHS_SET = frozenset(PUBLIC_PATHS)
+_GUEST_PATH_PATTERN = re.compile('|'.join(
+    re.escape(path) for path in sorted(GUEST_ACCESSIBLE_PATHS, key=len, reverse=True)
+))
+
+# Verified token payloads keyed by SHA-256 of the token; entries are dropped
+# once the token's exp passes, so a cached token is never accepted after expiry
+TOKEN_CACHE_MAX_SIZE = 2048
+_verified_token_cache = OrderedDict()
+_verified_token_cache_lock = threading.Lock()
+
+def is_public_path(path):
+    """Check whether a path needs no authentication at all"""
+    return path in _PUBLIC_PATHS_SET or path.startswith('/static/')
+
+def is_guest_accessible_path(path):
+    """Check whether a path is available to guests (prefix match)"""
+    return _GUEST_PATH_PATTERN.match(path) is not None
+
 def get_token_from_cookie():
     """
     Get JWT token from auth cookie
@@ -62,6 +132,18 @@ def verify_token(token):
         return None
         
     try:
+        token_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        now = datetime.now().timestamp()
+
+        # Reuse an earlier successful verification while the token is unexpired
+        with _verified_token_cache_lock:
+            cached = _verified_token_cache.get(token_key)
+            if cached is not None:
+                if cached.get('exp', 0) >= now:
+                    _verified_token_cache.move_to_end(token_key)
+                    return dict(cached)
+                del _verified_token_cache[token_key]
+
         # Use Supabase token verification
         payload = verify_supabase_token(token)
         
@@ -71,12 +153,16 @@ def verify_token(token):
             
         # Check if token is expired
         if 'exp' in payload:
-            now = datetime.now().timestamp()
             if payload['exp'] < now:
                 logger.warning("Token is expired")
                 return None
+
+            with _verified_token_cache_lock:
+                _verified_token_cache[token_key] = payload
+                while len(_verified_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                    _verified_token_cache.popitem(last=False)
                 
-        return payload
+        return dict(payload)
     except Exception as e:
         logger.error(f"Token verification error: {str(e)}")
         return None
@@ -271,61 +357,16 @@ def auth_middleware():
         Response or None: Redirect response if auth fails, None to continue request
     """
     # Skip for webhook, callback, and cron endpoints
-    if (request.path.startswith('/payment/webhook') or 
-        request.path.startswith('/music/suno/callback') or
-        request.path.startswith('/cron/')):
+    if request.path.startswith(SYSTEM_PATH_PREFIXES):
         logger.debug(f"Skipping auth for system endpoint: {request.path}")
         return None
         
-    # Define public paths (no authentication required)
-    public_paths = [
-        '/auth/login',
-        '/auth/register',
-        '/auth/forgot-password',  # Allow access to forgot password page
-        '/auth/reset-password',   # Allow access to reset password page
-        '/auth/callback',
-        '/auth/session',
-        '/api/check-auth',
-        '/config/public-keys',
-        '/privacy-policy',
-        '/terms-conditions',
-        '/sitemap.xml',  # Allow access to sitemap.xml at root
-        '/robots.txt',   # Also allow robots.txt
-        '/favicon.ico',  # Allow access to favicon at root for browsers/crawlers
-        '/shared/note/',  # Allow public access to shared notes
-    ]
-    
-    # Define guest-accessible paths and API endpoints
-    guest_accessible_paths = [
-        '/',  # Home page accessible to everyone (shows different content based on auth)
-        '/create-meme/',
-        '/create-meme/api/templates',
-        '/create-meme/api/trending-templates',
-        '/create-meme/api/meme-db-templates',
-        '/create-meme/api/template-details/',
-        '/meme-3-2-1/',  # Add Meme 3-2-1 as guest accessible
-        '/gifs/',  # Add GIFs as guest accessible
-        '/gifs/api/search',
-        '/gifs/api/trending',
-        '/gifs/api/categories',
-        '/gifs/api/category/',
-        '/gifs/api/search-suggestions',
-        '/meme-to-video/',  # Add Meme to Video as guest accessible
-        '/trending-x/',  # Add Trending X as guest accessible
-        '/trending-x/api/trends/',  # Allow guest access to view trending data
-        '/trending-x/api/countries',  # Allow guest access to country list
-        '/saved/',  # Add Saved Memes as guest accessible
-        '/blog/',  # Add Blog as guest accessible for SEO
-        '/player-stats/',  # Add Player Stats as guest accessible
-        '/player-stats/api/',  # Allow guest access to player stats API
-    ]
-    
     # Skip auth check for public routes and static files
-    if request.path in public_paths or request.path.startswith('/static/'):
+    if is_public_path(request.path):
         return None
     
     # Check if path is guest-accessible
-    is_guest_path = any(request.path.startswith(path) for path in guest_accessible_paths)
+    is_guest_path = is_guest_accessible_path(request.path)
     
     # Get token
     token = get_token_from_cookie() or get_token_from_header()
@@ -408,6 +449,7 @@ def auth_middleware():
     try:
         # Import here to avoid circular imports
         from app.system.services.firebase_service import UserService, db
+        from app.system.auth.permissions import get_workspace_membership
 
         # Get user data directly from Firebase
         user_data = UserService.get_user(g.user_id)
@@ -440,17 +482,10 @@ def auth_middleware():
 
         # Verify access to workspace if not own workspace
         if workspace_id and workspace_id != g.user_id:
-            # Check if user is a team member with active status
+            # Check if user is a team member with active status (cached briefly)
             if db:
-                membership_query = db.collection('team_members') \
-                    .where(filter=FieldFilter('member_id', '==', g.user_id)) \
-                    .where(filter=FieldFilter('owner_id', '==', workspace_id)) \
-                    .where(filter=FieldFilter('status', '==', 'active')) \
-                    .limit(1).get()
-
-                membership_list = list(membership_query)
-                if membership_list:
-                    membership = membership_list[0].to_dict()
+                membership = get_workspace_membership(g.user_id, workspace_id)
+                if membership:
                     g.active_workspace_id = workspace_id
                     g.workspace_permissions = membership.get('permissions', {})
                     g.workspace_role = membership.get('role', 'member')
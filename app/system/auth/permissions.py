@@ -4,10 +4,76 @@ Permission checking utilities for team access control
 
 from flask import g
 from app.system.services.firebase_service import db
+from google.cloud.firestore_v1.base_query import FieldFilter
+import threading
+import time
 import logging
+from collections import OrderedDict
 
 logger = logging.getLogger('permissions')
 
+# Team membership cache: (member_id, owner_id) -> (expires_at, membership or None)
+# Invalidated by the teams routes whenever a membership changes; an LRU so
+# entries for members who never come back don't accumulate
+MEMBERSHIP_CACHE_TTL_SECONDS = 60
+MEMBERSHIP_CACHE_MAX_SIZE = 4096
+_membership_cache = OrderedDict()
+_membership_cache_lock = threading.Lock()
+
+def get_workspace_membership(member_id, owner_id):
+    """
+    Get the active team membership of member_id in owner_id's workspace
+
+    Results (including "not a member") are cached for MEMBERSHIP_CACHE_TTL_SECONDS.
+
+    Returns:
+        dict or None: {'permissions': ..., 'role': ...} or None if no active membership
+    """
+    key = (member_id, owner_id)
+    with _membership_cache_lock:
+        cached = _membership_cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                _membership_cache.move_to_end(key)
+                return cached[1]
+            del _membership_cache[key]
+
+    membership_list = list(
+        db.collection('team_members')
+        .where(filter=FieldFilter('member_id', '==', member_id))
+        .where(filter=FieldFilter('owner_id', '==', owner_id))
+        .where(filter=FieldFilter('status', '==', 'active'))
+        .limit(1).get()
+    )
+
+    membership = None
+    if membership_list:
+        membership_data = membership_list[0].to_dict()
+        membership = {
+            'permissions': membership_data.get('permissions', {}),
+            'role': membership_data.get('role', 'member')
+        }
+
+    with _membership_cache_lock:
+        _membership_cache[key] = (time.monotonic() + MEMBERSHIP_CACHE_TTL_SECONDS, membership)
+        _membership_cache.move_to_end(key)
+        while len(_membership_cache) > MEMBERSHIP_CACHE_MAX_SIZE:
+            _membership_cache.popitem(last=False)
+
+    return membership
+
+def invalidate_workspace_membership(member_id=None, owner_id=None):
+    """
+    Drop cached memberships matching member_id and/or owner_id
+
+    Pass only owner_id to clear every member of a workspace (e.g. when the
+    team_members document ID is known but not the member's user ID).
+    """
+    with _membership_cache_lock:
+        for key in list(_membership_cache):
+            if (member_id is None or key[0] == member_id) and (owner_id is None or key[1] == owner_id):
+                del _membership_cache[key]
+
 def check_workspace_permission(permission_name):
     """
     Check if current user has a specific permission in the active workspace
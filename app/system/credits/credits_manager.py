@@ -17,6 +17,7 @@ from app.system.credits.config import (
     apply_margin
 )
 from app.system.ai_provider.ai_provider import get_ai_provider
+from app.system.services.firebase_service import UserService
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,17 +31,20 @@ class CreditsManager:
         self.db = firestore.client()
         self.default_margin = DEFAULT_MARGIN
     
-    def get_user_credits(self, user_id):
-        """Get the current credit balance for a user"""
+    def get_user_credits(self, user_id, use_cache=True):
+        """
+        Get the current credit balance for a user
+
+        Reads through UserService.get_user so the request-scoped user memo is
+        shared; pass use_cache=False when the balance feeds a write.
+        """
         try:
-            user_ref = self.db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            
-            if not user_doc.exists:
+            user_data = UserService.get_user(user_id, use_cache=use_cache)
+
+            if not user_data:
                 logger.warning(f"User not found: {user_id}")
                 return 0
-                
-            user_data = user_doc.to_dict()
+
             credits = user_data.get('credits', 0)
             
             # Always return rounded credits to prevent precision display issues
@@ -298,7 +302,7 @@ class CreditsManager:
             # Round to 4 decimal places for better precision with small amounts
             # Minimum charge of 0.0001 credits to avoid free API calls
             amount = max(0.0001, round(amount, 4))
-            current_credits = self.get_user_credits(user_id)
+            current_credits = self.get_user_credits(user_id, use_cache=False)
             
             if current_credits < amount:
                 return {
@@ -337,7 +341,10 @@ class CreditsManager:
             user_ref = self.db.collection('users').document(user_id)
             transaction_ref = user_ref.collection('transactions').document(transaction_id)
             
-            update_in_transaction(transaction, user_ref, new_credits, transaction_ref, transaction_data)
+            try:
+                update_in_transaction(transaction, user_ref, new_credits, transaction_ref, transaction_data)
+            finally:
+                UserService.invalidate_user_cache(user_id)
             
             logger.info(f"Credits deduction successful for user {user_id}: {amount} credits")
             
@@ -604,7 +611,7 @@ class CreditsManager:
             amount = round(amount, 2)
             
             # Get current credits
-            current_credits = self.get_user_credits(user_id)
+            current_credits = self.get_user_credits(user_id, use_cache=False)
             new_credits = round(current_credits + amount, 2)
             
             transaction_id = self.db.collection('users').document(user_id).collection('transactions').document().id
@@ -634,7 +641,10 @@ class CreditsManager:
             user_ref = self.db.collection('users').document(user_id)
             transaction_ref = user_ref.collection('transactions').document(transaction_id)
             
-            update_in_transaction(transaction, user_ref, new_credits, transaction_ref, transaction_data)
+            try:
+                update_in_transaction(transaction, user_ref, new_credits, transaction_ref, transaction_data)
+            finally:
+                UserService.invalidate_user_cache(user_id)
             
             logger.info(f"Credits addition successful for user {user_id}: {amount} credits, new balance: {new_credits}")
             
@@ -2,8 +2,11 @@ import firebase_admin
 from firebase_admin import credentials, storage, firestore
 import json
 import os
+import time
+import threading
 from datetime import datetime
 import logging
+from flask import g, has_request_context
 
 logger = logging.getLogger('firebase_service')
 
@@ -70,23 +73,75 @@ except Exception as e:
     storage_bucket = None
     firebase_app = None
 
+# Optional process-wide user cache (seconds, 0 = disabled). Writes that go
+# through UserService/CreditsManager invalidate it; keep the TTL short because
+# direct writes to users/{id} elsewhere (or on other instances) are not seen.
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '0') or 0)
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
 class UserService:
     """Service for user operations in Firestore"""
-    
+
     @staticmethod
-    def get_user(user_id):
-        """Get user by ID"""
+    def _request_cache():
+        """Per-request user memo stored on flask.g (None outside a request)"""
+        if not has_request_context():
+            return None
+        if not hasattr(g, '_user_cache'):
+            g._user_cache = {}
+        return g._user_cache
+
+    @staticmethod
+    def invalidate_user_cache(user_id):
+        """Drop a user from the request memo and the process-wide cache"""
+        request_cache = UserService._request_cache()
+        if request_cache is not None:
+            request_cache.pop(user_id, None)
+        with _user_cache_lock:
+            _user_cache.pop(user_id, None)
+
+    @staticmethod
+    def get_user(user_id, use_cache=True):
+        """
+        Get user by ID
+
+        Memoized for the current request on flask.g, and for
+        USER_CACHE_TTL_SECONDS across requests when enabled.
+        Pass use_cache=False to force a Firestore read.
+        """
         if not db:
             logger.error("Firestore not initialized")
             return None
-            
+
+        request_cache = UserService._request_cache()
+        if use_cache:
+            if request_cache is not None and user_id in request_cache:
+                return dict(request_cache[user_id])
+
+            if USER_CACHE_TTL_SECONDS > 0:
+                with _user_cache_lock:
+                    cached = _user_cache.get(user_id)
+                if cached and cached[0] > time.monotonic():
+                    if request_cache is not None:
+                        request_cache[user_id] = cached[1]
+                    return dict(cached[1])
+
         try:
             logger.info(f"Fetching user {user_id} from Firestore")
             doc_ref = db.collection('users').document(user_id)
             doc = doc_ref.get()
             if doc.exists:
                 logger.info(f"User {user_id} found in Firestore")
-                return doc.to_dict()
+                user_data = doc.to_dict()
+
+                if request_cache is not None:
+                    request_cache[user_id] = user_data
+                if USER_CACHE_TTL_SECONDS > 0:
+                    with _user_cache_lock:
+                        _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL_SECONDS, user_data)
+
+                return dict(user_data)
             else:
                 logger.info(f"User {user_id} not found in Firestore")
                 return None
@@ -123,6 +178,7 @@ class UserService:
 
             # Save to Firestore
             doc_ref.set(user_data)
+            UserService.invalidate_user_cache(user_id)
             logger.info(f"User {user_id} created successfully in Firestore")
 
             # Initialize user directories
@@ -152,7 +208,10 @@ class UserService:
         try:
             logger.info(f"Updating user {user_id} with data: {update_data}")
             doc_ref = db.collection('users').document(user_id)
-            doc_ref.update(update_data)
+            try:
+                doc_ref.update(update_data)
+            finally:
+                UserService.invalidate_user_cache(user_id)
             logger.info(f"User {user_id} updated successfully")
             return doc_ref.get().to_dict()
         except Exception as e:
@@ -0,0 +1,43 @@
+"""
+Pagination Cursor Utility - Opaque page tokens for cursor-paginated endpoints
+Pagination state (e.g. the last document's sort key and ID) is round-tripped to
+the client as URL-safe base64 JSON, so endpoints can resume a Firestore query
+with start_after instead of an offset.
+"""
+import json
+import base64
+import logging
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(data: Dict) -> str:
+    """Encode pagination state as an opaque URL-safe token"""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str], required: Iterable[str] = ()) -> Optional[Dict]:
+    """
+    Decode a token produced by encode_cursor
+
+    Args:
+        cursor: Token from the client
+        required: Keys the decoded state must have a value for
+
+    Returns:
+        The pagination state, or None if the token is missing or malformed
+    """
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        logger.warning(f"Ignoring malformed pagination cursor: {cursor[:40]}")
+        return None
+
+    if not isinstance(data, dict) or not all(data.get(key) for key in required):
+        logger.warning(f"Ignoring malformed pagination cursor: {cursor[:40]}")
+        return None
+    return data
@@ -0,0 +1,220 @@
+"""
+Prompt Registry - Process-wide cache of prompt files and their sections
+Prompt files are read and split into `############# NAME #############` sections once;
+generation code then gets prompts and format templates from memory.
+"""
+import os
+import re
+import string
+import logging
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SECTION_MARKER = '#############'
+_SECTION_HEADER_PATTERN = re.compile(r'############# (.+?) #############')
+
+# Root that preload_prompts() scans for prompts/ directories
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+
+# Re-stat prompt files on every lookup and reload edited ones (development only)
+PROMPT_HOT_RELOAD = (os.environ.get('FLASK_ENV') == 'development'
+                     or os.environ.get('PROMPT_HOT_RELOAD') == 'True')
+# Otherwise check each file's mtime at most this often, so edits made through the
+# admin prompt editor reach every worker without a restart
+PROMPT_RELOAD_CHECK_SECONDS = 0 if PROMPT_HOT_RELOAD else 60
+
+_formatter = string.Formatter()
+
+
+class PromptTemplate:
+    """
+    A prompt pre-parsed for str.format-style substitution
+
+    format(**kwargs) gives the same result as str.format but reuses the parsed
+    literal/field chunks instead of re-parsing the prompt on every call.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._chunks: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        self._simple = True
+
+        for literal, field_name, format_spec, conversion in _formatter.parse(text):
+            if field_name is not None and (not field_name.isidentifier() or '{' in (format_spec or '')):
+                # Positional, indexed, attribute or nested fields: leave to str.format
+                self._simple = False
+            self._chunks.append((literal, field_name, format_spec or '', conversion))
+
+    def format(self, **kwargs) -> str:
+        if not self._simple:
+            return self.text.format(**kwargs)
+
+        parts = []
+        for literal, field_name, format_spec, conversion in self._chunks:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value = kwargs[field_name]
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, format_spec))
+        return ''.join(parts)
+
+    def __str__(self):
+        return self.text
+
+
+class _PromptFile:
+    """One loaded prompt file: full text, sections and compiled templates"""
+
+    def __init__(self, path: Path, mtime: float, content: str):
+        self.path = path
+        self.mtime = mtime
+        self.checked_at = time.monotonic()
+        self.text = content.strip()
+        self.sections = self._split_sections(content)
+        self.templates: Dict[Optional[str], PromptTemplate] = {}
+
+    @staticmethod
+    def _split_sections(content: str) -> Dict[str, str]:
+        """
+        Split a prompt file into its sections
+
+        A section runs from the line after its marker to the next line starting
+        with the marker prefix (or the end of the file).
+        """
+        sections = {}
+        for match in _SECTION_HEADER_PATTERN.finditer(content):
+            name = match.group(1)
+            if name in sections:
+                continue
+
+            content_start = match.end()
+            if content_start < len(content) and content[content_start] == '\n':
+                content_start += 1
+
+            next_section = content.find('\n' + SECTION_MARKER, content_start)
+            section_content = content[content_start:] if next_section == -1 else content[content_start:next_section]
+            sections[name] = section_content.strip()
+        return sections
+
+
+_prompt_files: Dict[Path, _PromptFile] = {}
+_prompt_files_lock = threading.Lock()
+# (prompts_dir, filename) -> resolved path, so lookups don't touch the filesystem
+_resolved_paths: Dict[Tuple[str, str], Path] = {}
+
+
+def _prompt_path(prompts_dir: Union[str, Path], filename: str) -> Path:
+    key = (str(prompts_dir), filename)
+    path = _resolved_paths.get(key)
+    if path is None:
+        path = Path(prompts_dir).resolve() / filename
+        _resolved_paths[key] = path
+    return path
+
+
+def _read_prompt_file(path: Path) -> _PromptFile:
+    mtime = path.stat().st_mtime
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return _PromptFile(path, mtime, content)
+
+
+def _get_prompt_file(path: Path) -> _PromptFile:
+    """Get a prompt file from the registry, loading (or reloading) it if needed"""
+    prompt_file = _prompt_files.get(path)
+
+    if prompt_file is not None:
+        now = time.monotonic()
+        if now - prompt_file.checked_at >= PROMPT_RELOAD_CHECK_SECONDS:
+            prompt_file.checked_at = now
+            try:
+                if path.stat().st_mtime != prompt_file.mtime:
+                    logger.info(f"Prompt file changed, reloading: {path}")
+                    prompt_file = None
+            except FileNotFoundError:
+                prompt_file = None
+
+    if prompt_file is None:
+        if not path.exists():
+            logger.error(f"Prompt file not found: {path}")
+            raise FileNotFoundError(f"Prompt file not found: {path}")
+        prompt_file = _read_prompt_file(path)
+        with _prompt_files_lock:
+            _prompt_files[path] = prompt_file
+
+    return prompt_file
+
+
+def get_prompt(prompts_dir: Union[str, Path], filename: str, section: str = None) -> str:
+    """
+    Get a prompt (or one section of it) from the registry
+
+    Args:
+        prompts_dir: The feature's prompts/ directory
+        filename: Prompt file name inside prompts_dir
+        section: Optional `############# SECTION #############` name
+
+    Raises:
+        FileNotFoundError: If the prompt file does not exist
+        ValueError: If the section is not in the file
+    """
+    try:
+        prompt_file = _get_prompt_file(_prompt_path(prompts_dir, filename))
+
+        if not section:
+            return prompt_file.text
+
+        if section not in prompt_file.sections:
+            logger.error(f"Section '{section}' not found in {filename}")
+            raise ValueError(f"Section '{section}' not found")
+
+        return prompt_file.sections[section]
+    except Exception as e:
+        logger.error(f"Error loading prompt {filename}, section {section}: {e}")
+        raise
+
+
+def get_prompt_template(prompts_dir: Union[str, Path], filename: str, section: str = None) -> PromptTemplate:
+    """Get a prompt (or section) as a PromptTemplate, compiled once per file version"""
+    prompt_file = _get_prompt_file(_prompt_path(prompts_dir, filename))
+
+    template = prompt_file.templates.get(section)
+    if template is None:
+        template = PromptTemplate(get_prompt(prompts_dir, filename, section))
+        prompt_file.templates[section] = template
+    return template
+
+
+def reload_prompt_file(path: Union[str, Path]):
+    """Drop a prompt file from the registry so the next lookup reads it again"""
+    with _prompt_files_lock:
+        _prompt_files.pop(Path(path).resolve(), None)
+
+
+def preload_prompts(scripts_dir: Union[str, Path] = SCRIPTS_DIR) -> int:
+    """
+    Load every prompt file under the scripts' prompts/ directories
+
+    Called once at startup so no request pays for reading prompt files.
+
+    Returns:
+        Number of prompt files loaded
+    """
+    loaded = 0
+    for path in sorted(Path(scripts_dir).resolve().glob('*/prompts/*.txt')):
+        try:
+            prompt_file = _read_prompt_file(path)
+            with _prompt_files_lock:
+                _prompt_files[path] = prompt_file
+            loaded += 1
+        except Exception as e:
+            logger.warning(f"Could not preload prompt file {path}: {e}")
+
+    logger.info(f"Preloaded {loaded} prompt files (hot reload {'on' if PROMPT_HOT_RELOAD else 'off'})")
+    return loaded
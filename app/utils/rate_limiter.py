@@ -0,0 +1,120 @@
+"""
+Rate Limiter Utility - Thread-safe token buckets shared across the process
+Lets concurrent workers overlap requests while keeping a per-host request rate
+"""
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to `capacity`
+
+    Each request takes one token; acquire() blocks until a token is available,
+    so N workers sharing a bucket never exceed the configured rate combined.
+
+    The rate adapts to the server: throttled() (call on HTTP 429) halves it and
+    pauses the bucket, succeeded() creeps it back up towards the configured rate.
+    """
+
+    # Fraction of the configured rate regained per successful request
+    RECOVERY_STEP = 0.1
+    # Lowest rate throttled() backs off to, as a fraction of the configured rate
+    MIN_RATE_FRACTION = 0.125
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = float(rate)
+        self.max_rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        # _last_refill sits in the future while the bucket is paused
+        if now <= self._last_refill:
+            return
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Block until `tokens` are available and take them
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill()
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return waited
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def set_rate(self, rate: float):
+        """Change the refill rate (e.g. to back off after a 429)"""
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def throttled(self, retry_after: float = None) -> float:
+        """
+        Back off after the server rejected a request for exceeding its rate limit
+
+        Halves the rate (down to MIN_RATE_FRACTION of the configured rate), drops any
+        saved-up burst and pauses every waiter for `retry_after` seconds (or one
+        interval at the new rate if the server gave no hint).
+
+        Returns:
+            float: The new rate
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.max_rate * self.MIN_RATE_FRACTION, self.rate / 2)
+            self._tokens = 0.0
+            pause = retry_after if retry_after and retry_after > 0 else 1.0 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._last_refill = self._paused_until
+            return self.rate
+
+    def succeeded(self):
+        """Record a successful request, recovering the rate additively after a backoff"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: float = 1) -> TokenBucket:
+    """
+    Get the process-wide token bucket for `name` (usually an API host)
+
+    The bucket is created on first use; later calls return the same instance
+    regardless of the rate passed, so every caller shares one budget.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            _buckets[name] = bucket
+            logger.debug(f"Created rate limiter for {name}: {rate}/s, burst {capacity}")
+        return bucket
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark the X analytics chart series: per-post Python loops vs analytics_engine
+Replays the impressions/engagement chart computation the way the analytics routes
+did before the vectorized engine (old_chart_series) and the way they do now
+(engine_chart_series), on synthetic posts.
+
+Usage: python benchmarks/bench_analytics_engine.py [--posts 10000 100000] [--repeat 20] [--check]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.scripts.accounts.x_posts_snapshot import XPostsSnapshot
+from app.scripts.accounts.analytics_engine import (
+    ROLLING_WINDOW, TimeBuckets, BucketedPosts, rolling_mean, rolling_ratio,
+    values_as_of, optional_floats
+)
+
+# (timeframe days, group by week) as requested by the dashboard charts
+CHART_CASES = ((30, False), (180, True))
+
+
+def old_chart_series(all_posts, timeframe_days, group_by_week):
+    """Chart rows computed with the pre-engine loops (posts sorted oldest first)"""
+    cutoff_date = datetime.now() - timedelta(days=timeframe_days)
+    cutoff_timestamp = cutoff_date.timestamp()
+    has_rolling = len(all_posts) >= ROLLING_WINDOW
+
+    rolling_views, rolling_engagement = {}, {}
+    if has_rolling:
+        for i, post in enumerate(all_posts):
+            if i >= ROLLING_WINDOW - 1:
+                window = all_posts[i - ROLLING_WINDOW + 1:i + 1]
+                total_views = sum(p.get('views', 0) for p in window)
+                rolling_views[post['created_at_timestamp']] = total_views / len(window)
+                total_engagement = sum(
+                    p.get('likes', 0) + p.get('retweets', 0) + p.get('replies', 0) + p.get('bookmarks', 0)
+                    for p in window
+                )
+                if total_views > 0:
+                    rolling_engagement[post['created_at_timestamp']] = (total_engagement / total_views) * 100
+
+    current_date = datetime.now().date()
+    timeline = {}
+    if group_by_week:
+        week_start = cutoff_date.date() - timedelta(days=cutoff_date.weekday())
+        current_week_start = current_date - timedelta(days=current_date.weekday())
+        while week_start <= current_week_start:
+            timeline[week_start.strftime('%Y-%m-%d')] = {
+                'views': 0, 'engagement': 0, 'count': 0, 'posts': [],
+                'week_end': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
+            }
+            week_start += timedelta(days=7)
+    else:
+        day = cutoff_date.date()
+        while day <= current_date:
+            timeline[day.strftime('%Y-%m-%d')] = {'views': 0, 'engagement': 0, 'count': 0, 'posts': [], 'week_end': None}
+            day += timedelta(days=1)
+
+    for post in all_posts:
+        timestamp = post['created_at_timestamp']
+        if timestamp >= cutoff_timestamp:
+            post_date = datetime.fromtimestamp(timestamp)
+            if group_by_week:
+                key = (post_date - timedelta(days=post_date.weekday())).strftime('%Y-%m-%d')
+            else:
+                key = post_date.strftime('%Y-%m-%d')
+            if key in timeline:
+                timeline[key]['views'] += post['views']
+                timeline[key]['count'] += 1
+                timeline[key]['posts'].append(post)
+                timeline[key]['engagement'] += post['likes'] + post['retweets'] + post['replies'] + post['bookmarks']
+
+    rows = []
+    for key in sorted(timeline):
+        bucket = timeline[key]
+        averages = []
+        for table in (rolling_views, rolling_engagement):
+            value = None
+            if has_rolling:
+                if group_by_week:
+                    if bucket['posts']:
+                        latest = max(bucket['posts'], key=lambda p: p['created_at_timestamp'])
+                        value = table.get(latest['created_at_timestamp'])
+                else:
+                    target = datetime.strptime(key, '%Y-%m-%d').timestamp()
+                    for timestamp, average in table.items():
+                        if timestamp <= target:
+                            value = average
+                        else:
+                            break
+            averages.append(value)
+        engagement_rate = (bucket['engagement'] / bucket['views']) * 100 if bucket['views'] > 0 else 0
+        rows.append((key, bucket['views'], bucket['count'], averages[0], engagement_rate,
+                     bucket['engagement'], averages[1], bucket['week_end']))
+    return rows
+
+
+def engine_chart_series(snapshot, timeframe_days, group_by_week):
+    """Chart rows computed with analytics_engine, as the analytics routes do now"""
+    cutoff_date = datetime.now() - timedelta(days=timeframe_days)
+    dated = snapshot.dated_count
+    timestamps = snapshot.timestamps[:dated]
+    views = snapshot.views[:dated]
+    engagement = (snapshot.likes + snapshot.retweets + snapshot.replies + snapshot.bookmarks)[:dated]
+
+    buckets = TimeBuckets(cutoff_date.date(), datetime.now().date(), by_week=group_by_week)
+    bucketed = BucketedPosts(timestamps, buckets, snapshot.window_start(cutoff_date.timestamp()))
+    bucket_views = bucketed.sums(views)
+    bucket_engagement = bucketed.sums(engagement)
+    counts = bucketed.counts().tolist()
+
+    engagement_rates = np.zeros(len(buckets))
+    has_views = bucket_views > 0
+    engagement_rates[has_views] = (bucket_engagement[has_views] / bucket_views[has_views]) * 100
+
+    rolling_views = [None] * len(buckets)
+    rolling_engagement = [None] * len(buckets)
+    if dated >= ROLLING_WINDOW:
+        view_means = rolling_mean(views)
+        engagement_ratios = rolling_ratio(engagement, views)
+        if group_by_week:
+            rolling_views = optional_floats(bucketed.last_values(view_means))
+            rolling_engagement = optional_floats(bucketed.last_values(engagement_ratios))
+        else:
+            rolling_views = optional_floats(values_as_of(timestamps, view_means, buckets.starts))
+            rolling_engagement = optional_floats(values_as_of(timestamps, engagement_ratios, buckets.starts))
+
+    bucket_views = bucket_views.tolist()
+    bucket_engagement = bucket_engagement.tolist()
+    engagement_rates = engagement_rates.tolist()
+    return [
+        (key, bucket_views[i], counts[i], rolling_views[i], engagement_rates[i],
+         bucket_engagement[i], rolling_engagement[i], buckets.week_ends[i])
+        for i, key in enumerate(buckets.keys)
+    ]
+
+
+def make_posts(count, span_days):
+    """Synthetic posts spread over the last span_days (some in the future, some without views)"""
+    now = time.time()
+    return [{
+        'created_at_timestamp': now - random.random() * span_days * 86400 + random.choice([0, 0, 86400]),
+        'views': random.choice([0, 0, random.randint(0, 5000)]),
+        'likes': random.randint(0, 50),
+        'retweets': random.randint(0, 5),
+        'replies': random.randint(0, 5),
+        'bookmarks': random.randint(0, 3)
+    } for _ in range(count)]
+
+
+def check_equivalence():
+    """Assert both implementations produce identical rows on edge-case sizes and spans"""
+    for count in (0, 5, 9, 10, 11, 40, 500, 3000):
+        for span_days in (3, 20, 400):
+            snapshot = XPostsSnapshot(make_posts(count, span_days))
+            for timeframe_days, group_by_week in ((7, False), (30, False), (90, False), (180, True)):
+                expected = old_chart_series(snapshot.dated_posts, timeframe_days, group_by_week)
+                actual = engine_chart_series(snapshot, timeframe_days, group_by_week)
+                assert expected == actual, (count, span_days, timeframe_days, group_by_week)
+    print("✓ Old and engine chart series are identical")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, nargs='+', default=[10_000, 100_000], help='Post counts to time')
+    parser.add_argument('--span-days', type=int, default=720, help='Days the synthetic posts are spread over')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs of the engine path (averaged)')
+    parser.add_argument('--check', action='store_true', help='Verify both paths agree before timing')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.check:
+        check_equivalence()
+
+    for count in args.posts:
+        snapshot = XPostsSnapshot(make_posts(count, args.span_days))
+        for timeframe_days, group_by_week in CHART_CASES:
+            started = time.perf_counter()
+            old_chart_series(snapshot.dated_posts, timeframe_days, group_by_week)
+            old_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                engine_chart_series(snapshot, timeframe_days, group_by_week)
+            engine_seconds = (time.perf_counter() - started) / args.repeat
+
+            grouping = 'weekly' if group_by_week else 'daily'
+            print(f"{count:>7} posts, {timeframe_days}d {grouping}: "
+                  f"loops {old_seconds * 1000:8.1f} ms | engine {engine_seconds * 1000:6.2f} ms | "
+                  f"{old_seconds / engine_seconds:6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
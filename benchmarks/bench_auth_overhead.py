@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-request auth overhead: before vs after the verified-token cache
+"Before" is what auth_middleware did per request until the cache: scan the public and
+guest path lists and decode/verify the JWT with verify_supabase_token. "After" is the
+compiled path matchers plus verify_token, which serves repeat tokens from its LRU.
+
+Uses a locally signed HS256 token, so no Supabase project is needed.
+
+Usage: python benchmarks/bench_auth_overhead.py [--number 20000]
+"""
+import os
+import sys
+import time
+import timeit
+import argparse
+
+# Add the repository root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local config so get_config() succeeds and tokens verify against a known secret
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'benchmark')
+os.environ.setdefault('SUPABASE_JWT_SECRET', 'benchmark-secret')
+
+import jwt
+from app.system.auth import middleware
+from app.system.auth.supabase import verify_supabase_token
+
+# A mix of what hits the middleware: public, guest, and authenticated pages/APIs
+SAMPLE_PATHS = [
+    '/auth/login',
+    '/gifs/api/search',
+    '/analytics/api/x/impressions',
+    '/brain-dump/api/notes',
+]
+
+
+def old_path_checks(path):
+    """Path matching as auth_middleware did it per request: list scans"""
+    public = path in list(middleware.PUBLIC_PATHS) or path.startswith('/static/')
+    guest = any(path.startswith(prefix) for prefix in list(middleware.GUEST_ACCESSIBLE_PATHS))
+    return public, guest
+
+
+def new_path_checks(path):
+    """Path matching with the import-time compiled matchers"""
+    return middleware.is_public_path(path), middleware.is_guest_accessible_path(path)
+
+
+def make_token():
+    """HS256 token shaped like a Supabase access token, valid for an hour"""
+    return jwt.encode({
+        'sub': 'benchmark-user',
+        'aud': 'authenticated',
+        'exp': int(time.time()) + 3600,
+        'email': 'benchmark@example.com'
+    }, os.environ['SUPABASE_JWT_SECRET'], algorithm='HS256')
+
+
+def per_call_microseconds(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='Calls per timing run')
+    args = parser.parse_args()
+
+    token = make_token()
+    assert verify_supabase_token(token) is not None, "Token does not verify with the benchmark secret"
+    assert middleware.verify_token(token) is not None
+    for path in SAMPLE_PATHS:
+        assert old_path_checks(path) == new_path_checks(path), path
+
+    path_before = per_call_microseconds(lambda: [old_path_checks(p) for p in SAMPLE_PATHS], args.number) / len(SAMPLE_PATHS)
+    path_after = per_call_microseconds(lambda: [new_path_checks(p) for p in SAMPLE_PATHS], args.number) / len(SAMPLE_PATHS)
+    token_before = per_call_microseconds(lambda: verify_supabase_token(token), args.number)
+    token_after = per_call_microseconds(lambda: middleware.verify_token(token), args.number)
+
+    print(f"{'':<22}{'before':>10}{'after':>10}")
+    print(f"{'path matching':<22}{path_before:>8.2f}us{path_after:>8.2f}us")
+    print(f"{'token verification':<22}{token_before:>8.2f}us{token_after:>8.2f}us")
+    print(f"{'per request':<22}{path_before + token_before:>8.2f}us{path_after + token_after:>8.2f}us")
+
+
+if __name__ == '__main__':
+    main()
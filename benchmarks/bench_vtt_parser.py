@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark VTT caption parsing: parse time and peak memory on 10 min / 1 h / 3 h fixtures
+Times VTTParser.parse_vtt on the whole text and parse_vtt_lines streaming the file.
+With --baseline, the vtt_parser.py of that git revision (e.g. the commit before the
+single-pass tokenizer) is loaded alongside, checked for identical output and timed too.
+
+Usage: python benchmarks/bench_vtt_parser.py [--repeat 3] [--baseline <git-rev>]
+"""
+import os
+import sys
+import time
+import types
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.scripts.optimize_video.vtt_parser import VTTParser
+from vtt_fixtures import FIXTURE_LENGTHS, write_fixtures
+
+PARSER_PATH = 'app/scripts/optimize_video/vtt_parser.py'
+
+
+def load_baseline_parser(revision: str):
+    """VTTParser class from vtt_parser.py as of a git revision"""
+    source = subprocess.run(
+        ['git', 'show', f'{revision}:{PARSER_PATH}'],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    module = types.ModuleType('vtt_parser_baseline')
+    exec(compile(source, f'{revision}:{PARSER_PATH}', 'exec'), module.__dict__)
+    return module.VTTParser
+
+
+def measure(parse, repeat: int):
+    """(best wall time in seconds, peak traced memory in bytes) of parse()"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (best is reported)')
+    parser.add_argument('--baseline', help='Git revision whose vtt_parser.py to compare against')
+    args = parser.parse_args()
+
+    # The parsers log per cue at INFO/DEBUG
+    logging.disable(logging.CRITICAL)
+    baseline = load_baseline_parser(args.baseline) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        paths = write_fixtures(fixture_dir)
+
+        for name in FIXTURE_LENGTHS:
+            path = paths[name]
+            with open(path, encoding='utf-8') as f:
+                vtt = f.read()
+
+            result = VTTParser.parse_vtt(vtt)
+            print(f"{name} ({len(vtt) / 1e6:.1f} MB VTT, {len(result['per_word'])} words)")
+
+            def parse_streamed():
+                with open(path, encoding='utf-8') as f:
+                    return VTTParser.parse_vtt_lines(f)
+
+            cases = [('parse_vtt', lambda: VTTParser.parse_vtt(vtt)), ('parse_vtt_lines', parse_streamed)]
+            if baseline is not None:
+                assert baseline.parse_vtt(vtt) == result, f"{name}: output differs from {args.baseline}"
+                cases.insert(0, (f'baseline {args.baseline[:10]}', lambda: baseline.parse_vtt(vtt)))
+
+            for label, parse in cases:
+                seconds, peak = measure(parse, args.repeat)
+                print(f"  {label:<22} {seconds * 1000:8.1f} ms   peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
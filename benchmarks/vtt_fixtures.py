@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Synthetic YouTube auto-caption VTT fixtures for the caption parsing benchmark
+Cues follow YouTube's rolling format: a timed cue repeating the previous line and
+carrying the new words as <c> tags with inline timestamps, then a 10 ms cue with
+the plain text.
+
+Usage: python benchmarks/vtt_fixtures.py [output_dir]   (writes 10min.vtt, 1h.vtt, 3h.vtt)
+"""
+import os
+import sys
+import random
+
+# Fixture name -> video length in minutes
+FIXTURE_LENGTHS = {
+    '10min': 10,
+    '1h': 60,
+    '3h': 180
+}
+
+WORDS = ("so you're not sure which cards to upgrade in clash royale "
+         "I hired the coach and he's going").split()
+WORD_SECONDS = 0.3
+
+
+def _timestamp(seconds: float) -> str:
+    h = int(seconds // 3600)
+    m = int(seconds % 3600 // 60)
+    s = int(seconds % 60)
+    ms = int(round((seconds % 1) * 1000)) % 1000
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def make_vtt(minutes: int, seed: int = 1) -> str:
+    """VTT text covering `minutes` of speech (deterministic for a given seed)"""
+    rnd = random.Random(seed)
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    start = 0.0
+    previous_text = ""
+
+    while start < minutes * 60:
+        words = [rnd.choice(WORDS) for _ in range(rnd.randint(4, 9))]
+        end = start + len(words) * WORD_SECONDS
+
+        lines.append(f"{_timestamp(start)} --> {_timestamp(end)} align:start position:0%")
+        lines.append(previous_text)
+        tagged = words[0] + "".join(
+            f"<{_timestamp(start + i * WORD_SECONDS)}><c> {word}</c>" for i, word in enumerate(words[1:], 1)
+        )
+        lines.extend([tagged, ""])
+
+        lines.append(f"{_timestamp(end)} --> {_timestamp(end + 0.01)} align:start position:0%")
+        lines.extend([" ".join(words), " ", ""])
+
+        previous_text = " ".join(words)
+        start = end + 0.01
+
+    return "\n".join(lines)
+
+
+def write_fixtures(output_dir: str) -> dict:
+    """Write every fixture to output_dir; returns fixture name -> path"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for name, minutes in FIXTURE_LENGTHS.items():
+        path = os.path.join(output_dir, f"{name}.vtt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_vtt(minutes))
+        paths[name] = path
+    return paths
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+    for name, path in write_fixtures(target).items():
+        print(f"✓ {name}: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
@@ -207,6 +207,10 @@ app.register_blueprint(teams_bp)
 # Register Cron blueprint
 app.register_blueprint(cron_bp)
 
+# Load every prompts/ directory once so AI calls never read prompt files
+from app.utils.prompt_registry import preload_prompts
+preload_prompts()
+
 # Routes for SEO files at root URL
 @app.route('/sitemap.xml')
 def sitemap_xml():